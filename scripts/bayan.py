@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Single command-line entry point for the Bayan data and model scripts
+Each subcommand imports its script only when it runs, and no script loads
+torch, tensorflow or transformers until its command actually needs them
+"""
+
+import argparse
+import importlib
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+# name -> (module, summary, needs heavy dependencies)
+COMMANDS: Dict[str, Tuple[str, str, bool]] = {
+    'prepare': ('prepare_training_data', "Build training texts and train/val shards", False),
+    'split': ('dataset_split', "Hash-based grouped train/validation split", False),
+    'hadith': ('hadith_loader', "Validate and benchmark hadith collections", False),
+    'tafsir': ('tafsir_windows', "Show how tafsir commentary is windowed", False),
+    'normalize': ('arabic_normalizer', "Arabic normalization benchmark", False),
+    'search-index': ('build_search_index', "Build or query the offline search index", False),
+    'morphology': ('build_morphology_index', "Build or query the root/morphology index", False),
+    'bundle': ('compile_assets', "Compile JSON assets into the SQLite bundle", False),
+    'pipeline': ('run_pipeline', "Run the cached prepare → train → export pipeline", False),
+    'evaluate': ('checkpoint_evaluator', "Evaluate training checkpoints asynchronously", False),
+    'train': ('train_simple_model', "Fine-tune the simple model", True),
+    'train-full': ('train_islamic_model', "Train the full model", True),
+    'sweep': ('hyperparameter_sweep', "ASHA hyperparameter sweep", True),
+    'speculative': ('speculative_decoding', "Speculative decoding benchmark", True),
+    'export': ('optimize_for_mobile', "Convert the trained model for mobile", True),
+    'delta': ('model_delta', "Build, apply or report model delta updates", False),
+    'timetable': ('prayer_timetable', "Precompute prayer timetables and the Hijri calendar", True),
+}
+
+# Modules a lightweight command must not pull in
+HEAVY_MODULES = ('torch', 'tensorflow', 'transformers', 'sklearn', 'pandas', 'numpy')
+# Modules no command may pull in before parsing its arguments
+ML_FRAMEWORKS = ('torch', 'tensorflow', 'transformers')
+
+
+def run_command(name: str, argv: List[str]):
+    """Import the subcommand's script and hand it the remaining arguments"""
+    module_name = COMMANDS[name][0]
+    module = importlib.import_module(module_name)
+    sys.argv = [f"bayan {name}", *argv]
+    return module.main()
+
+
+def _measure(command: List[str]) -> Tuple[float, Optional[float], int]:
+    """Wall seconds, peak RSS in MB (POSIX only) and exit code of a child process"""
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if hasattr(os, 'wait4'):
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+    else:
+        process.wait()
+        rss_mb = None
+    return time.perf_counter() - start, rss_mb, process.returncode
+
+
+def heavy_imports(module_name: str) -> Optional[List[str]]:
+    """Heavy frameworks loaded as a side effect of importing a script (None if it fails to import)"""
+    probe = (f"import sys; sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r}); "
+             f"import {module_name}; "
+             f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return [name for name in result.stdout.strip().split(',') if name]
+
+
+def startup_benchmark(budget_ms: float = 250.0, runs: int = 5) -> bool:
+    """Time `bayan <command> --help` for every command and fail on any over budget
+
+    Lightweight commands may not import any heavy module; the others may
+    use numpy but must defer ML frameworks until after argument parsing.
+    """
+    print(f"⏱️  Startup benchmark ({runs} runs each, budget {budget_ms:.0f} ms)")
+    script = os.path.abspath(__file__)
+    baseline = statistics.median(_measure([sys.executable, '-c', 'pass'])[0] for _ in range(runs))
+    print(f"  {'python -c pass':<16}{baseline * 1000:>8.0f} ms")
+
+    ok = True
+    for name, (module_name, _, heavy) in COMMANDS.items():
+        samples = [_measure([sys.executable, script, name, '--help']) for _ in range(runs)]
+        median_ms = statistics.median(seconds for seconds, _, _ in samples) * 1000
+        rss = max((rss for _, rss, _ in samples if rss is not None), default=None)
+
+        problems = []
+        if any(code != 0 for _, _, code in samples):
+            problems.append("--help exited non-zero")
+        if median_ms > budget_ms:
+            problems.append(f"over budget by {median_ms - budget_ms:.0f} ms")
+        loaded = heavy_imports(module_name)
+        forbidden = ML_FRAMEWORKS if heavy else HEAVY_MODULES
+        if loaded is None:
+            problems.append(f"cannot import {module_name}")
+        elif any(module in forbidden for module in loaded):
+            problems.append(f"imports {', '.join(m for m in loaded if m in forbidden)}")
+        ok = ok and not problems
+
+        rss_text = f"{rss:>7.0f} MB" if rss is not None else ''
+        status = '❌ ' + '; '.join(problems) if problems else '✅'
+        print(f"  {name:<16}{median_ms:>8.0f} ms{rss_text}  {status}")
+
+    print("✅ All commands within budget" if ok else "❌ Startup budget exceeded")
+    return ok
+
+
+def main():
+    """Dispatch to a subcommand"""
+    parser = argparse.ArgumentParser(
+        prog='bayan',
+        description="Bayan al-Quran data, training and export tools",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n" + "\n".join(
+            f"  {name:<16}{summary}{' (heavy dependencies)' if heavy else ''}"
+            for name, (_, summary, heavy) in COMMANDS.items()
+        ) + "\n  startup-benchmark  Check --help latency and imports of every command",
+    )
+    parser.add_argument('command', choices=[*COMMANDS, 'startup-benchmark'], metavar='command')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help="Arguments for the command")
+    args = parser.parse_args()
+
+    if args.command == 'startup-benchmark':
+        bench = argparse.ArgumentParser(prog='bayan startup-benchmark')
+        bench.add_argument('--budget-ms', type=float, default=250.0)
+        bench.add_argument('--runs', type=int, default=5)
+        options = bench.parse_args(args.args)
+        if not startup_benchmark(options.budget_ms, options.runs):
+            sys.exit(1)
+        return
+
+    return run_command(args.command, args.args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Root and morphology index builder for the word-by-word analysis data
+Precomputes root occurrences, the related-word graph and part-of-speech
+facets into compact arrays so lookups never scan the Quran
+"""
+
+import argparse
+import json
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from typing import Dict, List, Tuple
+
+from build_search_index import decode_varint, encode_varint, normalize_for_search
+
+MORPHOLOGY_MAGIC = b'BAYANMRF'
+MORPHOLOGY_VERSION = 1
+HEADER_FORMAT = '<8sIIIIII'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+Occurrence = Tuple[int, int, int]
+
+
+def normalize_root(root: str) -> str:
+    """Accept roots written as 'ر ح م', 'ر-ح-م' or 'رحم'"""
+    return re.sub(r'[\s\-]+', '', normalize_for_search(root))
+
+
+def normalize_word(word: str) -> str:
+    return normalize_for_search(word).strip()
+
+
+def _write_array(out: bytearray, values: array):
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    out.extend(values.tobytes())
+
+
+def _read_array(data: bytes, pos: int, typecode: str, count: int) -> Tuple[array, int]:
+    values = array(typecode)
+    end = pos + values.itemsize * count
+    values.frombytes(data[pos:end])
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values, end
+
+
+class MorphologyIndexBuilder:
+    """Collect root, word and facet data from complete_quran.json"""
+
+    def __init__(self):
+        self.root_occurrences: Dict[str, List[Tuple[int, int, int, str]]] = {}
+        self.related: Dict[str, set] = {}
+        self.word_roots: Dict[str, str] = {}
+        self.facets: Dict[str, List[Tuple[int, int, int]]] = {}
+
+    def add_quran(self, quran_path: str):
+        """Walk every analysed word once"""
+        print(f"📖 Loading word analysis from {quran_path}...")
+
+        with open(quran_path, 'r', encoding='utf-8') as f:
+            quran = json.load(f)
+
+        total_words = 0
+        for surah in quran['surahs']:
+            surah_number = surah['number']
+            for ayah in surah['ayahs']:
+                ayah_number = ayah['ayahNumber']
+                for index, word in enumerate(ayah.get('words', []), start=1):
+                    position = word.get('position', index)
+                    surface = normalize_word(word.get('arabic', ''))
+                    root = normalize_root(word.get('root', ''))
+                    location = (surah_number, ayah_number, position)
+
+                    if surface:
+                        self.related.setdefault(surface, set())
+                        for related_word in word.get('relatedWords', []):
+                            related_word = normalize_word(related_word)
+                            if related_word and related_word != surface:
+                                self.related[surface].add(related_word)
+                                self.related.setdefault(related_word, set()).add(surface)
+
+                    if root:
+                        self.root_occurrences.setdefault(root, []).append(location + (surface,))
+                        if surface:
+                            self.word_roots[surface] = root
+
+                    if word.get('partOfSpeech'):
+                        self.facets.setdefault(f"pos:{word['partOfSpeech']}", []).append(location)
+                    if word.get('grammar'):
+                        self.facets.setdefault(f"grammar:{word['grammar']}", []).append(location)
+                    total_words += 1
+
+        print(f"✅ Indexed {total_words} words under {len(self.root_occurrences)} roots")
+
+    def serialize(self) -> bytes:
+        """Lay the index out as a string table followed by flat arrays"""
+        roots = sorted(self.root_occurrences)
+        words = sorted(self.related.keys() | self.word_roots.keys())
+        word_ids = {word: i for i, word in enumerate(words)}
+        facet_names = sorted(self.facets)
+
+        strings = bytearray()
+        for text in roots + words + facet_names:
+            encoded = text.encode('utf-8')
+            encode_varint(len(encoded), strings)
+            strings.extend(encoded)
+
+        # Root occurrences in CSR form: root_offsets[i]..root_offsets[i+1]
+        root_offsets = array('I', [0])
+        surahs, ayahs, positions, occurrence_words = array('H'), array('H'), array('H'), array('i')
+        occurrence_ids: Dict[Occurrence, int] = {}
+        for root in roots:
+            for surah, ayah, position, surface in sorted(self.root_occurrences[root]):
+                occurrence_ids.setdefault((surah, ayah, position), len(surahs))
+                surahs.append(surah)
+                ayahs.append(ayah)
+                positions.append(position)
+                occurrence_words.append(word_ids.get(surface, -1))
+            root_offsets.append(len(surahs))
+
+        # Related-word graph in CSR form plus each word's root id
+        word_offsets = array('I', [0])
+        edges = array('I')
+        root_ids = {root: i for i, root in enumerate(roots)}
+        word_root_ids = array('i')
+        for word in words:
+            edges.extend(sorted(word_ids[w] for w in self.related.get(word, ())))
+            word_offsets.append(len(edges))
+            word_root_ids.append(root_ids.get(self.word_roots.get(word, ''), -1))
+
+        # Facets reference occurrences; words without a root get their own rows
+        facet_offsets = array('I', [0])
+        facet_members = array('I')
+        for name in facet_names:
+            for location in sorted(self.facets[name]):
+                if location not in occurrence_ids:
+                    occurrence_ids[location] = len(surahs)
+                    surahs.append(location[0])
+                    ayahs.append(location[1])
+                    positions.append(location[2])
+                    occurrence_words.append(-1)
+                facet_members.append(occurrence_ids[location])
+            facet_offsets.append(len(facet_members))
+
+        header = struct.pack(
+            HEADER_FORMAT, MORPHOLOGY_MAGIC, MORPHOLOGY_VERSION, len(roots), len(surahs),
+            len(words), len(edges), len(facet_names)
+        )
+        body = bytearray(strings)
+        for values in (root_offsets, surahs, ayahs, positions, occurrence_words,
+                       word_offsets, edges, word_root_ids, facet_offsets, facet_members):
+            _write_array(body, values)
+        return header + bytes(body)
+
+    def save(self, output_path: str) -> str:
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        data = self.serialize()
+        with open(output_path, 'wb') as f:
+            f.write(data)
+
+        print(f"💾 Morphology index saved to {output_path} ({len(data) / 1024:.1f} KB)")
+        return output_path
+
+
+class MorphologyIndex:
+    """Constant-time root, related-word and facet lookups"""
+
+    def __init__(self, data: bytes):
+        (magic, version, num_roots, num_occurrences, num_words,
+         num_edges, num_facets) = struct.unpack_from(HEADER_FORMAT, data, 0)
+        if magic != MORPHOLOGY_MAGIC or version != MORPHOLOGY_VERSION:
+            raise ValueError("Unsupported morphology index format")
+
+        pos = HEADER_SIZE
+        strings = []
+        for _ in range(num_roots + num_words + num_facets):
+            length, pos = decode_varint(data, pos)
+            strings.append(data[pos:pos + length].decode('utf-8'))
+            pos += length
+
+        self.roots = strings[:num_roots]
+        self.words = strings[num_roots:num_roots + num_words]
+        self.facet_names = strings[num_roots + num_words:]
+        self.root_ids = {root: i for i, root in enumerate(self.roots)}
+        self.word_ids = {word: i for i, word in enumerate(self.words)}
+        self.facet_ids = {name: i for i, name in enumerate(self.facet_names)}
+
+        self.root_offsets, pos = _read_array(data, pos, 'I', num_roots + 1)
+        self.surahs, pos = _read_array(data, pos, 'H', num_occurrences)
+        self.ayahs, pos = _read_array(data, pos, 'H', num_occurrences)
+        self.positions, pos = _read_array(data, pos, 'H', num_occurrences)
+        self.occurrence_words, pos = _read_array(data, pos, 'i', num_occurrences)
+        self.word_offsets, pos = _read_array(data, pos, 'I', num_words + 1)
+        self.edges, pos = _read_array(data, pos, 'I', num_edges)
+        self.word_root_ids, pos = _read_array(data, pos, 'i', num_words)
+        self.facet_offsets, pos = _read_array(data, pos, 'I', num_facets + 1)
+        self.facet_members, pos = _read_array(data, pos, 'I', self.facet_offsets[-1])
+
+    @classmethod
+    def load(cls, index_path: str) -> 'MorphologyIndex':
+        with open(index_path, 'rb') as f:
+            return cls(f.read())
+
+    def _root_range(self, root: str) -> Tuple[int, int]:
+        root_id = self.root_ids.get(normalize_root(root))
+        if root_id is None:
+            return 0, 0
+        return self.root_offsets[root_id], self.root_offsets[root_id + 1]
+
+    def root_count(self, root: str) -> int:
+        """Number of occurrences of a root"""
+        start, end = self._root_range(root)
+        return end - start
+
+    def root_occurrences(self, root: str) -> List[Occurrence]:
+        """All (surah, ayah, position) occurrences of a root"""
+        start, end = self._root_range(root)
+        return list(zip(self.surahs[start:end], self.ayahs[start:end], self.positions[start:end]))
+
+    def words_for_root(self, root: str) -> List[str]:
+        """Distinct surface forms derived from a root"""
+        start, end = self._root_range(root)
+        ids = sorted({i for i in self.occurrence_words[start:end] if i >= 0})
+        return [self.words[i] for i in ids]
+
+    def root_of(self, word: str) -> str:
+        word_id = self.word_ids.get(normalize_word(word))
+        if word_id is None or self.word_root_ids[word_id] < 0:
+            return ""
+        return self.roots[self.word_root_ids[word_id]]
+
+    def related_words(self, word: str) -> List[str]:
+        """Neighbours of a word in the related-word graph"""
+        word_id = self.word_ids.get(normalize_word(word))
+        if word_id is None:
+            return []
+        start, end = self.word_offsets[word_id], self.word_offsets[word_id + 1]
+        return [self.words[i] for i in self.edges[start:end]]
+
+    def facet(self, name: str) -> List[Occurrence]:
+        """Occurrences for a facet such as 'pos:noun' or 'grammar:genitive'"""
+        facet_id = self.facet_ids.get(name)
+        if facet_id is None:
+            return []
+        start, end = self.facet_offsets[facet_id], self.facet_offsets[facet_id + 1]
+        return [(self.surahs[i], self.ayahs[i], self.positions[i]) for i in self.facet_members[start:end]]
+
+    def facet_counts(self) -> Dict[str, int]:
+        return {
+            name: self.facet_offsets[i + 1] - self.facet_offsets[i]
+            for i, name in enumerate(self.facet_names)
+        }
+
+
+def linear_root_scan(quran: dict, root: str) -> List[Occurrence]:
+    """Reference lookup: scan every ayah's words for the root"""
+    target = normalize_root(root)
+    occurrences = []
+    for surah in quran['surahs']:
+        for ayah in surah['ayahs']:
+            for index, word in enumerate(ayah.get('words', []), start=1):
+                if normalize_root(word.get('root', '')) == target:
+                    occurrences.append((surah['number'], ayah['ayahNumber'], word.get('position', index)))
+    return sorted(occurrences)
+
+
+def benchmark(quran_path: str, repeats: int = 200):
+    """Compare indexed root lookups against the linear scan"""
+    print("⏱️  Benchmarking root lookups...")
+
+    builder = MorphologyIndexBuilder()
+    builder.add_quran(quran_path)
+    index = MorphologyIndex(builder.serialize())
+
+    with open(quran_path, 'r', encoding='utf-8') as f:
+        quran = json.load(f)
+
+    for root in index.roots:
+        if index.root_occurrences(root) != linear_root_scan(quran, root):
+            raise AssertionError(f"Index disagrees with linear scan for root {root}")
+    print(f"✅ Index matches linear scan for all {len(index.roots)} roots")
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for root in index.roots:
+            linear_root_scan(quran, root)
+    scan_us = (time.perf_counter() - start) * 1e6 / (repeats * len(index.roots))
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for root in index.roots:
+            index.root_occurrences(root)
+    index_us = (time.perf_counter() - start) * 1e6 / (repeats * len(index.roots))
+
+    print(f"  Linear scan: {scan_us:.1f} µs/root")
+    print(f"  Index:       {index_us:.1f} µs/root ({scan_us / index_us:.0f}x faster)")
+    return scan_us, index_us
+
+
+def main():
+    """Build the morphology index, look up a root or benchmark"""
+    parser = argparse.ArgumentParser(description="Root and morphology lookup index")
+    parser.add_argument('command', choices=['build', 'root', 'benchmark'], nargs='?', default='build')
+    parser.add_argument('root', nargs='?', default='')
+    parser.add_argument('--quran', default='assets/data/quran/complete_quran.json')
+    parser.add_argument('--index', default='assets/data/quran/morphology_index.bin')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        builder = MorphologyIndexBuilder()
+        builder.add_quran(args.quran)
+        builder.save(args.index)
+    elif args.command == 'root':
+        if not os.path.exists(args.index):
+            print(f"❌ Morphology index not found at {args.index}")
+            print("Please run build_morphology_index.py build first")
+            return
+        index = MorphologyIndex.load(args.index)
+        print(f"🌱 Root {args.root}: {index.root_count(args.root)} occurrences")
+        for surah, ayah, position in index.root_occurrences(args.root):
+            print(f"  {surah}:{ayah} word {position}")
+        print(f"📝 Forms: {', '.join(index.words_for_root(args.root))}")
+    else:
+        benchmark(args.quran)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+"""
+Search index builder for offline Quran and Hadith search
+Builds a diacritic-aware inverted index with delta-encoded posting lists
+and provides a BM25 query engine with phrase and prefix matching
+"""
+
+import argparse
+import bisect
+import heapq
+import json
+import math
+import os
+import re
+import struct
+import time
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from arabic_normalizer import search_normalizer
+
+INDEX_MAGIC = b'BAYANIDX'
+INDEX_VERSION = 2
+HEADER_FORMAT = '<8sIIIfQQQ'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# Gap inserted between fields so phrase queries never match across them
+FIELD_POSITION_GAP = 100
+
+TOKEN_PATTERN = re.compile(r'[\u0621-\u064A\u0671-\u06D3]+|[a-z0-9]+')
+
+# The definite article is dropped so الرحمن and رحمن* meet; words left with
+# fewer letters than this keep it (الله stays الله, not له)
+ARTICLE = 'ال'
+MIN_STEM_LETTERS = 3
+
+# Prefix queries matching more indexed terms than this are rejected
+MAX_PREFIX_TERMS = 64
+
+
+def normalize_for_search(text: str) -> str:
+    """Strip harakat and tatweel and unify letter forms for matching"""
+    return search_normalizer.normalize(text)
+
+
+def strip_article(term: str) -> str:
+    """Drop a leading definite article unless too little of the word is left"""
+    if term.startswith(ARTICLE) and len(term) - len(ARTICLE) >= MIN_STEM_LETTERS:
+        return term[len(ARTICLE):]
+    return term
+
+
+def tokenize(text: str) -> List[str]:
+    """Split normalized text into Arabic and Latin search terms"""
+    return [strip_article(term) for term in TOKEN_PATTERN.findall(normalize_for_search(text))]
+
+
+def prefix_forms(prefix: str) -> List[str]:
+    """Indexed-term prefixes for a typed prefix, normalized like tokenize()
+
+    الرح* becomes رح*; a short remainder (الل*) also keeps the article form,
+    because words like الله are indexed with it.
+    """
+    if not prefix.startswith(ARTICLE) or prefix == ARTICLE:
+        return [prefix]
+    remainder = prefix[len(ARTICLE):]
+    return [remainder, prefix] if len(remainder) < MIN_STEM_LETTERS else [remainder]
+
+
+def encode_varint(value: int, out: bytearray):
+    """Append an unsigned LEB128 varint to out"""
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data, pos: int) -> Tuple[int, int]:
+    """Decode an unsigned LEB128 varint, returning (value, next position)"""
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def iter_quran_documents(quran_path: str) -> Iterator[Tuple[str, List[str]]]:
+    """Yield (key, fields) for every ayah: Arabic text then translations"""
+    with open(quran_path, 'r', encoding='utf-8') as f:
+        quran = json.load(f)
+
+    for surah in quran['surahs']:
+        for ayah in surah['ayahs']:
+            fields = [ayah.get('arabicText', '')]
+            fields.extend(t.get('text', '') for t in ayah.get('translations', []))
+            yield f"quran:{surah['number']}:{ayah['ayahNumber']}", fields
+
+
+def iter_hadith_documents(hadith_path: str) -> Iterator[Tuple[str, List[str]]]:
+    """Yield (key, fields) for every hadith in a collection file"""
+    with open(hadith_path, 'r', encoding='utf-8') as f:
+        hadith_data = json.load(f)
+
+    collection = Path(hadith_path).stem
+    for number, hadith in enumerate(hadith_data['hadiths'], start=1):
+        fields = [hadith.get('textArabic', ''), hadith.get('textEnglish', '')]
+        yield f"hadith:{collection}:{hadith.get('id', number)}", fields
+
+
+class SearchIndexBuilder:
+    """Build an inverted index over ayahs and hadiths"""
+
+    def __init__(self):
+        self.doc_keys: List[str] = []
+        self.doc_lengths: List[int] = []
+        self.postings: Dict[str, Dict[int, List[int]]] = {}
+
+    def add_document(self, key: str, fields: Iterable[str]):
+        """Index one document made of several text fields"""
+        doc_id = len(self.doc_keys)
+        position = 0
+        length = 0
+
+        for field in fields:
+            for term in tokenize(field):
+                self.postings.setdefault(term, {}).setdefault(doc_id, []).append(position)
+                position += 1
+                length += 1
+            position += FIELD_POSITION_GAP
+
+        self.doc_keys.append(key)
+        self.doc_lengths.append(length)
+
+    def add_quran(self, quran_path: str):
+        """Index every ayah with its Arabic text and all translations"""
+        print(f"📖 Indexing Quran from {quran_path}...")
+
+        count = 0
+        for key, fields in iter_quran_documents(quran_path):
+            self.add_document(key, fields)
+            count += 1
+
+        print(f"✅ Indexed {count} ayahs")
+
+    def add_hadith(self, hadith_path: str):
+        """Index every hadith with its Arabic and English text"""
+        print(f"📚 Indexing Hadith from {hadith_path}...")
+
+        count = 0
+        for key, fields in iter_hadith_documents(hadith_path):
+            self.add_document(key, fields)
+            count += 1
+
+        print(f"✅ Indexed {count} hadiths from {Path(hadith_path).stem}")
+
+    def serialize(self) -> bytes:
+        """Encode documents, term dictionary and postings into one buffer"""
+        doc_table = bytearray()
+        for key, length in zip(self.doc_keys, self.doc_lengths):
+            key_bytes = key.encode('utf-8')
+            encode_varint(len(key_bytes), doc_table)
+            doc_table.extend(key_bytes)
+            encode_varint(length, doc_table)
+
+        # Postings: per doc the doc-id gap, term frequency and position gaps
+        postings_blob = bytearray()
+        dictionary = bytearray()
+        previous_term = b''
+        previous_offset = 0
+
+        for term in sorted(self.postings):
+            doc_positions = self.postings[term]
+            start = len(postings_blob)
+            previous_doc = 0
+            for doc_id in sorted(doc_positions):
+                positions = doc_positions[doc_id]
+                encode_varint(doc_id - previous_doc, postings_blob)
+                encode_varint(len(positions), postings_blob)
+                previous_position = 0
+                for position in positions:
+                    encode_varint(position - previous_position, postings_blob)
+                    previous_position = position
+                previous_doc = doc_id
+
+            # Front-coded dictionary entry
+            term_bytes = term.encode('utf-8')
+            shared = 0
+            limit = min(len(term_bytes), len(previous_term))
+            while shared < limit and term_bytes[shared] == previous_term[shared]:
+                shared += 1
+            encode_varint(shared, dictionary)
+            encode_varint(len(term_bytes) - shared, dictionary)
+            dictionary.extend(term_bytes[shared:])
+            encode_varint(len(doc_positions), dictionary)
+            encode_varint(start - previous_offset, dictionary)
+            encode_varint(len(postings_blob) - start, dictionary)
+            previous_term = term_bytes
+            previous_offset = start
+
+        num_docs = len(self.doc_keys)
+        avg_length = sum(self.doc_lengths) / num_docs if num_docs else 0.0
+        doc_offset = HEADER_SIZE
+        dict_offset = doc_offset + len(doc_table)
+        postings_offset = dict_offset + len(dictionary)
+
+        header = struct.pack(
+            HEADER_FORMAT, INDEX_MAGIC, INDEX_VERSION, num_docs, len(self.postings),
+            avg_length, doc_offset, dict_offset, postings_offset
+        )
+        return header + bytes(doc_table) + bytes(dictionary) + bytes(postings_blob)
+
+    def save(self, output_path: str) -> str:
+        """Write the index to a single binary file"""
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        data = self.serialize()
+        with open(output_path, 'wb') as f:
+            f.write(data)
+
+        print(f"💾 Search index saved to {output_path}")
+        print(f"📊 {len(self.doc_keys)} documents, {len(self.postings)} terms, {len(data) / 1024:.1f} KB")
+        return output_path
+
+
+class SearchIndex:
+    """Query engine over a serialized search index"""
+
+    def __init__(self, data: bytes, k1: float = 1.2, b: float = 0.75, postings_cache_size: int = 1024):
+        (magic, version, num_docs, num_terms, avg_length,
+         doc_offset, dict_offset, postings_offset) = struct.unpack_from(HEADER_FORMAT, data, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError("Unsupported search index format")
+
+        self.data = data
+        self.k1 = k1
+        self.b = b
+        self.num_docs = num_docs
+        self.avg_length = avg_length or 1.0
+        self.postings_offset = postings_offset
+        # Decoded lists of recently queried terms; bounded so memory stays flat
+        self._cached_postings = lru_cache(maxsize=postings_cache_size)(self._decode_postings)
+
+        self.doc_keys: List[str] = []
+        self.doc_lengths: List[int] = []
+        pos = doc_offset
+        for _ in range(num_docs):
+            key_length, pos = decode_varint(data, pos)
+            self.doc_keys.append(data[pos:pos + key_length].decode('utf-8'))
+            pos += key_length
+            length, pos = decode_varint(data, pos)
+            self.doc_lengths.append(length)
+
+        # Terms stay sorted so prefix queries are a bisect away
+        self.terms: List[str] = []
+        self.term_info: Dict[str, Tuple[int, int, int]] = {}
+        pos = dict_offset
+        previous_term = b''
+        offset = 0
+        for _ in range(num_terms):
+            shared, pos = decode_varint(data, pos)
+            suffix_length, pos = decode_varint(data, pos)
+            term_bytes = previous_term[:shared] + data[pos:pos + suffix_length]
+            pos += suffix_length
+            df, pos = decode_varint(data, pos)
+            offset_gap, pos = decode_varint(data, pos)
+            size, pos = decode_varint(data, pos)
+            offset += offset_gap
+            term = term_bytes.decode('utf-8')
+            self.terms.append(term)
+            self.term_info[term] = (df, offset, size)
+            previous_term = term_bytes
+
+    @classmethod
+    def load(cls, index_path: str, **kwargs) -> 'SearchIndex':
+        """Load an index file written by SearchIndexBuilder"""
+        with open(index_path, 'rb') as f:
+            return cls(f.read(), **kwargs)
+
+    def postings(self, term: str) -> Dict[int, List[int]]:
+        """Decode (and cache) the posting list for a term"""
+        return self._cached_postings(term)
+
+    def _decode_postings(self, term: str) -> Dict[int, List[int]]:
+        info = self.term_info.get(term)
+        if info is None:
+            return {}
+
+        df, offset, _ = info
+        data = self.data
+        pos = self.postings_offset + offset
+        result: Dict[int, List[int]] = {}
+        doc_id = 0
+        for _ in range(df):
+            gap, pos = decode_varint(data, pos)
+            doc_id += gap
+            tf, pos = decode_varint(data, pos)
+            positions = []
+            position = 0
+            for _ in range(tf):
+                delta, pos = decode_varint(data, pos)
+                position += delta
+                positions.append(position)
+            result[doc_id] = positions
+        return result
+
+    def expand_prefix(self, prefix: str, limit: int = MAX_PREFIX_TERMS) -> List[str]:
+        """Indexed terms starting with prefix; ValueError if there are more than limit"""
+        matches = []
+        for form in prefix_forms(prefix):
+            start = bisect.bisect_left(self.terms, form)
+            end = bisect.bisect_left(self.terms, form + '\U0010FFFF', start)
+            matches.extend(self.terms[start:end])
+        if len(matches) > limit:
+            raise ValueError(f"{prefix}* matches {len(matches)} terms (limit {limit}); type more of the word")
+        return matches
+
+    def idf(self, term: str) -> float:
+        df = self.term_info[term][0] if term in self.term_info else 0
+        return math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+
+    def _score_term(self, term: str, scores: Dict[int, float], restrict: Optional[set] = None):
+        idf = self.idf(term)
+        k1 = self.k1
+        b = self.b
+        for doc_id, positions in self.postings(term).items():
+            if restrict is not None and doc_id not in restrict:
+                continue
+            tf = len(positions)
+            norm = k1 * (1 - b + b * self.doc_lengths[doc_id] / self.avg_length)
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+
+    def phrase_matches(self, terms: List[str]) -> set:
+        """Documents containing the terms at consecutive positions"""
+        lists = [self.postings(term) for term in terms]
+        if not lists or any(not postings for postings in lists):
+            return set()
+
+        candidates = set(lists[0])
+        for postings in lists[1:]:
+            candidates &= postings.keys()
+
+        matches = set()
+        for doc_id in candidates:
+            starts = set(lists[0][doc_id])
+            for offset, postings in enumerate(lists[1:], start=1):
+                starts &= {p - offset for p in postings[doc_id]}
+                if not starts:
+                    break
+            if starts:
+                matches.add(doc_id)
+        return matches
+
+    def parse_query(self, query: str) -> Tuple[List[List[str]], List[str], List[str]]:
+        """Split a query into phrases, plain terms and prefixes"""
+        phrases = [tokenize(p) for p in re.findall(r'"([^"]+)"', query)]
+        remainder = re.sub(r'"[^"]*"', ' ', query)
+
+        terms, prefixes = [], []
+        for raw in remainder.split():
+            if raw.endswith('*'):
+                # Not tokenize(): a partial word must keep its article for prefix_forms
+                prefixes.extend(TOKEN_PATTERN.findall(normalize_for_search(raw[:-1])))
+            else:
+                terms.extend(tokenize(raw))
+        return [p for p in phrases if p], terms, prefixes
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """Rank documents with BM25; phrases act as required filters"""
+        phrases, terms, prefixes = self.parse_query(query)
+
+        restrict = None
+        for phrase in phrases:
+            matches = self.phrase_matches(phrase)
+            restrict = matches if restrict is None else restrict & matches
+            terms.extend(phrase)
+        if restrict is not None and not restrict:
+            return []
+
+        scores: Dict[int, float] = {}
+        for term in terms:
+            self._score_term(term, scores, restrict)
+        for prefix in prefixes:
+            for term in self.expand_prefix(prefix):
+                self._score_term(term, scores, restrict)
+
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [(self.doc_keys[doc_id], score) for doc_id, score in best]
+
+
+def build_index(quran_path: str, hadith_dir: str) -> SearchIndexBuilder:
+    """Index the Quran and every hadith collection"""
+    builder = SearchIndexBuilder()
+    builder.add_quran(quran_path)
+    for hadith_path in sorted(Path(hadith_dir).glob('*.json')):
+        builder.add_hadith(str(hadith_path))
+    return builder
+
+
+# Letters that survive normalization, for minting new vocabulary in the benchmark
+ARABIC_SUFFIX_LETTERS = 'بتثجحخدذرزسشصضطظعغفقكلمنو'
+LATIN_SUFFIX_LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def _new_word(arabic: bool, number: int) -> str:
+    """The number-th minted word of a script; never splits under tokenize()"""
+    letters = ARABIC_SUFFIX_LETTERS if arabic else LATIN_SUFFIX_LETTERS
+    word = 'ق' if arabic else 'q'
+    while number:
+        number, digit = divmod(number, len(letters))
+        word += letters[digit]
+    return word
+
+
+class _PitmanYorVocabulary:
+    """Term sampler whose vocabulary grows with the text like natural language
+
+    Seeded with the real corpus counts. A token is a new word with
+    probability (discount * vocabulary) / tokens and otherwise an existing
+    word w with probability proportional to count(w) - discount, which
+    gives Zipf term frequencies and Heaps-law vocabulary growth.
+    """
+
+    def __init__(self, tokens: List[str], arabic: bool, rng, discount: float = 0.5):
+        self.tokens = list(tokens)
+        self.counts = Counter(tokens)
+        self.arabic = arabic
+        self.rng = rng
+        self.discount = discount
+        self.minted = 0
+
+    def sample(self) -> str:
+        rng = self.rng
+        if not self.tokens or rng.random() * len(self.tokens) < self.discount * len(self.counts):
+            self.minted += 1
+            term = _new_word(self.arabic, self.minted)
+        else:
+            while True:
+                term = self.tokens[rng.randrange(len(self.tokens))]
+                if rng.random() * self.counts[term] >= self.discount:
+                    break
+        self.tokens.append(term)
+        self.counts[term] += 1
+        return term
+
+
+def _fit_exponent(sizes: List[int], latencies: List[float]) -> float:
+    """Least-squares slope of log(latency) against log(size)"""
+    xs = [math.log(n) for n in sizes]
+    ys = [math.log(t) for t in latencies]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    return (sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+            / sum((x - mean_x) ** 2 for x in xs))
+
+
+def benchmark(quran_path: str, hadith_dir: str, scales=(1, 2, 4, 8, 16, 32), repeats: int = 200,
+              seed: int = 0):
+    """Measure query latency and a pre-tokenized linear scan as the corpus grows
+
+    The real documents come first. Further documents copy the field
+    layout and lengths of random real ones, with their terms drawn from a
+    Pitman-Yor process seeded with the real term counts (one per script),
+    so new text keeps Zipf term frequencies and adds vocabulary at the
+    Heaps-law rate. The fitted log-log exponent of each query is reported
+    as measured: BM25 scoring walks every posting of the query terms, so
+    a term whose share of the text is stable costs time in proportion to
+    the corpus.
+    """
+    import random
+
+    print("⏱️  Benchmarking query latency against corpus size...")
+
+    base = [(key, [tokenize(field) for field in fields]) for key, fields in iter_quran_documents(quran_path)]
+    for hadith_path in sorted(Path(hadith_dir).glob('*.json')):
+        base.extend((key, [tokenize(field) for field in fields])
+                    for key, fields in iter_hadith_documents(str(hadith_path)))
+
+    rng = random.Random(seed)
+    all_terms = [term for _, fields in base for field in fields for term in field]
+    vocabularies = {
+        arabic: _PitmanYorVocabulary([t for t in all_terms if t.isascii() != arabic], arabic, rng)
+        for arabic in (True, False)
+    }
+
+    queries = ['الرحمن', 'mercy', '"most merciful"', 'رح*', 'allah guidance', 'prayer*']
+    results = []
+    documents: List[Tuple[str, List[List[str]]]] = list(base)
+    for scale in scales:
+        while len(documents) < scale * len(base):
+            key, fields = base[rng.randrange(len(base))]
+            grown = []
+            for field in fields:
+                # Fields keep their script: Arabic text, then translations
+                arabic = any(not term.isascii() for term in field)
+                grown.append([vocabularies[arabic].sample() for _ in field])
+            documents.append((f"{key}#{len(documents)}", grown))
+
+        builder = SearchIndexBuilder()
+        for key, fields in documents:
+            builder.add_document(key, (' '.join(field) for field in fields))
+        data = builder.serialize()
+        index = SearchIndex(data)
+
+        # Warm the postings cache once, then time steady-state queries
+        per_query = {}
+        for query in queries:
+            index.search(query)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                index.search(query)
+            per_query[query] = (time.perf_counter() - start) * 1000 / repeats
+        index_ms = sum(per_query.values()) / len(queries)
+
+        # Baseline: test every already-tokenized document, as search does without an index
+        needles = [tokenize(query) for query in queries]
+        flat = [[term for field in fields for term in field] for _, fields in documents]
+        start = time.perf_counter()
+        for query_needles in needles:
+            for terms in flat:
+                any(term.startswith(needle) for term in terms for needle in query_needles)
+        scan_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        results.append((len(documents), per_query, index_ms, scan_ms))
+        print(f"  {len(documents):>7} docs, {len(builder.postings):>8} terms ({len(data) / 1024:>8.1f} KB): "
+              f"index {index_ms:.3f} ms/query, linear scan {scan_ms:.3f} ms/query")
+
+    sizes = [n for n, _, _, _ in results]
+    print("📈 Fitted latency growth exponent (0 = flat, below 1 = sub-linear, 1.0 = linear):")
+    for query in queries:
+        print(f"    {query:<18} {_fit_exponent(sizes, [timings[query] for _, timings, _, _ in results]):.2f}")
+    print(f"    {'index (mean)':<18} {_fit_exponent(sizes, [i for _, _, i, _ in results]):.2f}")
+    print(f"    {'linear scan':<18} {_fit_exponent(sizes, [s for _, _, _, s in results]):.2f}")
+    _, _, index_ms, scan_ms = results[-1]
+    print(f"⚡ At {sizes[-1]} documents the index answers {scan_ms / index_ms:.0f}x faster than the scan")
+    return results
+
+
+def main():
+    """Build the search index, run a query or benchmark"""
+    parser = argparse.ArgumentParser(description="Offline Quran and Hadith search index")
+    parser.add_argument('command', choices=['build', 'query', 'benchmark'], nargs='?', default='build')
+    parser.add_argument('query', nargs='?', default='')
+    parser.add_argument('--quran', default='assets/data/quran/complete_quran.json')
+    parser.add_argument('--hadith-dir', default='assets/data/hadith')
+    parser.add_argument('--index', default='assets/data/search/search_index.bin')
+    parser.add_argument('--top-k', type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_index(args.quran, args.hadith_dir).save(args.index)
+    elif args.command == 'query':
+        if not os.path.exists(args.index):
+            print(f"❌ Search index not found at {args.index}")
+            print("Please run build_search_index.py build first")
+            return
+        index = SearchIndex.load(args.index)
+        try:
+            results = index.search(args.query, top_k=args.top_k)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        for key, score in results:
+            print(f"{score:8.3f}  {key}")
+    else:
+        benchmark(args.quran, args.hadith_dir)
+
+
+if __name__ == "__main__":
+    main()
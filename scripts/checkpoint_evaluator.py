@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Asynchronous checkpoint evaluator for Islamic AI model training
+Runs in its own process, watches the training output directory and
+computes per-source perplexity for every new checkpoint so the training
+loop never stops for evaluation
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+TRAINING_COMPLETE_MARKER = "training_complete"
+EVAL_RESULTS_FILE = "eval_results.json"
+EVAL_HISTORY_FILE = "eval_history.jsonl"
+BEST_CHECKPOINT_FILE = "best_checkpoint.json"
+
+CHECKPOINT_PATTERN = re.compile(r'^checkpoint-(\d+)$')
+
+
+def list_checkpoints(output_dir: str) -> List[Path]:
+    """Checkpoint directories ordered by step"""
+    checkpoints = []
+    for path in Path(output_dir).glob('checkpoint-*'):
+        match = CHECKPOINT_PATTERN.match(path.name)
+        if match and path.is_dir():
+            checkpoints.append((int(match.group(1)), path))
+    return [path for _, path in sorted(checkpoints)]
+
+
+def checkpoint_ready(path: Path, since: float = 0.0) -> bool:
+    """Trainer writes trainer_state.json after the weights, so it marks completion
+
+    Checkpoints completed before since (an earlier run's leftovers) are not ready.
+    """
+    has_weights = any((path / name).exists() for name in ('model.safetensors', 'pytorch_model.bin'))
+    state = path / 'trainer_state.json'
+    return has_weights and state.exists() and state.stat().st_mtime >= since
+
+
+def checkpoint_evaluated(path: Path) -> bool:
+    """Results exist and are newer than the checkpoint they describe"""
+    results, state = path / EVAL_RESULTS_FILE, path / 'trainer_state.json'
+    return results.exists() and state.exists() and results.stat().st_mtime >= state.stat().st_mtime
+
+
+def read_best(output_dir: str) -> Optional[Dict]:
+    best_path = Path(output_dir) / BEST_CHECKPOINT_FILE
+    if not best_path.exists():
+        return None
+    with open(best_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class CheckpointEvaluator:
+    """Evaluate checkpoints with length-bucketed, dynamically padded batches"""
+
+    def __init__(self, output_dir: str, validation_source: str, batch_size: int = 8,
+                 max_length: int = 256, num_threads: int = 1, keep_last: int = 2, since: float = 0.0):
+        self.output_dir = output_dir
+        self.since = since
+        self.validation_source = validation_source
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.num_threads = num_threads
+        self.keep_last = keep_last
+        self.texts_by_source = self._load_validation_texts()
+        self._encoded_cache: Dict[int, Dict[str, List[List[int]]]] = {}
+
+    def _load_validation_texts(self) -> Dict[str, List[str]]:
+        """Texts by source from a directory of JSONL shards or a single JSONL file"""
+        source_path = Path(self.validation_source)
+        paths = sorted(source_path.glob('*.jsonl')) if source_path.is_dir() else [source_path]
+        texts: Dict[str, List[str]] = {}
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        texts.setdefault(record.get('source', 'other'), []).append(record['text'])
+
+        total = sum(len(v) for v in texts.values())
+        print(f"📚 Loaded {total} validation texts: { {k: len(v) for k, v in texts.items()} }")
+        return texts
+
+    def evaluate(self, checkpoint: Path) -> Dict:
+        """Token-weighted loss and perplexity per source and overall"""
+        import torch
+        import torch.nn.functional as F
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        torch.set_num_threads(self.num_threads)
+        tokenizer = AutoTokenizer.from_pretrained(checkpoint)
+        model = AutoModelForCausalLM.from_pretrained(checkpoint)
+        model.eval()
+        pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+
+        # Checkpoints share a tokenizer, so validation texts are encoded once
+        encoded_by_source = self._encoded_cache.get(len(tokenizer))
+        if encoded_by_source is None:
+            encoded_by_source = {
+                source: sorted(
+                    (tokenizer(text, truncation=True, max_length=self.max_length)['input_ids'] for text in texts),
+                    key=len  # Sorting by length keeps padding inside each batch small
+                )
+                for source, texts in self.texts_by_source.items()
+            }
+            self._encoded_cache = {len(tokenizer): encoded_by_source}
+
+        results = {}
+        total_nll, total_tokens = 0.0, 0
+        for source, encoded in sorted(encoded_by_source.items()):
+            texts = self.texts_by_source[source]
+
+            nll, tokens = 0.0, 0
+            with torch.no_grad():
+                for start in range(0, len(encoded), self.batch_size):
+                    batch = encoded[start:start + self.batch_size]
+                    width = max(len(ids) for ids in batch)
+                    input_ids = torch.full((len(batch), width), pad_id, dtype=torch.long)
+                    attention_mask = torch.zeros((len(batch), width), dtype=torch.long)
+                    for row, ids in enumerate(batch):
+                        input_ids[row, :len(ids)] = torch.tensor(ids)
+                        attention_mask[row, :len(ids)] = 1
+
+                    logits = model(input_ids=input_ids, attention_mask=attention_mask).logits
+                    shift_logits = logits[:, :-1].reshape(-1, logits.size(-1))
+                    shift_labels = input_ids[:, 1:].reshape(-1)
+                    shift_mask = attention_mask[:, 1:].reshape(-1).bool()
+                    nll += F.cross_entropy(
+                        shift_logits[shift_mask], shift_labels[shift_mask], reduction='sum'
+                    ).item()
+                    tokens += int(shift_mask.sum())
+
+            loss = nll / tokens if tokens else float('nan')
+            results[source] = {'loss': loss, 'perplexity': math.exp(loss) if tokens else float('nan'),
+                               'tokens': tokens, 'samples': len(texts)}
+            total_nll += nll
+            total_tokens += tokens
+
+        overall = total_nll / total_tokens if total_tokens else float('nan')
+        return {
+            'checkpoint': checkpoint.name,
+            'step': int(CHECKPOINT_PATTERN.match(checkpoint.name).group(1)),
+            'eval_loss': overall,
+            'eval_perplexity': math.exp(overall) if total_tokens else float('nan'),
+            'per_source': results,
+        }
+
+    def record(self, checkpoint: Path, results: Dict):
+        """Write results next to the checkpoint and update best-model selection"""
+        with open(checkpoint / EVAL_RESULTS_FILE, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        with open(Path(self.output_dir) / EVAL_HISTORY_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(results) + '\n')
+
+        best = read_best(self.output_dir)
+        if best is None or results['eval_loss'] < best['eval_loss']:
+            best = {'checkpoint': str(checkpoint), 'step': results['step'], 'eval_loss': results['eval_loss']}
+            temp_path = Path(self.output_dir) / (BEST_CHECKPOINT_FILE + '.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(best, f, indent=2)
+            os.replace(temp_path, Path(self.output_dir) / BEST_CHECKPOINT_FILE)
+            print(f"🏆 New best checkpoint: {checkpoint.name} (loss {results['eval_loss']:.4f})")
+
+    def prune(self):
+        """Keep the best checkpoint and the last few evaluated ones of this run"""
+        if not self.keep_last:
+            return
+        best = read_best(self.output_dir)
+        evaluated = [p for p in list_checkpoints(self.output_dir)
+                     if checkpoint_ready(p, self.since) and checkpoint_evaluated(p)]
+        for path in evaluated[:-self.keep_last]:
+            if best is None or Path(best['checkpoint']) != path:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def watch(self, poll_interval: float = 10.0):
+        """Evaluate new checkpoints until training signals completion"""
+        print(f"👀 Watching {self.output_dir} for checkpoints...")
+        marker = Path(self.output_dir) / TRAINING_COMPLETE_MARKER
+
+        while True:
+            # Read the marker first so checkpoints saved just before it are not missed
+            finished = marker.exists()
+            pending = [
+                p for p in list_checkpoints(self.output_dir)
+                if checkpoint_ready(p, self.since) and not checkpoint_evaluated(p)
+            ]
+            for checkpoint in pending:
+                start = time.perf_counter()
+                results = self.evaluate(checkpoint)
+                self.record(checkpoint, results)
+                per_source = ', '.join(
+                    f"{source} ppl {r['perplexity']:.2f}" for source, r in results['per_source'].items()
+                )
+                print(f"✅ {checkpoint.name}: loss {results['eval_loss']:.4f} ({per_source}) "
+                      f"in {time.perf_counter() - start:.1f}s")
+                self.prune()
+
+            if finished and not pending:
+                print("🎉 Training finished and all checkpoints evaluated")
+                return read_best(self.output_dir)
+            time.sleep(poll_interval)
+
+
+def launch_evaluator(output_dir: str, validation_source: str, max_length: int = 256,
+                     num_threads: int = 1, since: Optional[float] = None) -> subprocess.Popen:
+    """Start the evaluator as a low-priority background process
+
+    validation_source and max_length must be the trainer's own, or the
+    scores would not measure the data and length the model trained for.
+    Only checkpoints completed after since (default: now) are evaluated.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    # Results from a previous run must not drive this run's selection
+    for name in (TRAINING_COMPLETE_MARKER, BEST_CHECKPOINT_FILE, EVAL_HISTORY_FILE):
+        stale = Path(output_dir) / name
+        if stale.exists():
+            stale.unlink()
+
+    command = [
+        sys.executable, os.path.abspath(__file__),
+        '--output-dir', output_dir,
+        '--validation', validation_source,
+        '--max-length', str(max_length),
+        '--num-threads', str(num_threads),
+        '--since', repr(time.time() if since is None else since),
+    ]
+    preexec = (lambda: os.nice(10)) if hasattr(os, 'nice') else None
+    process = subprocess.Popen(command, preexec_fn=preexec)
+    print(f"🚀 Checkpoint evaluator started (pid {process.pid}, {num_threads} thread(s))")
+    return process
+
+
+def finish_evaluator(process: subprocess.Popen, output_dir: str) -> Optional[Dict]:
+    """Signal training completion, wait for outstanding evaluations, return the best checkpoint"""
+    (Path(output_dir) / TRAINING_COMPLETE_MARKER).touch()
+    print("⏳ Waiting for checkpoint evaluator to finish...")
+    if process.wait() != 0:
+        print(f"⚠️  Checkpoint evaluator exited with code {process.returncode}")
+    return read_best(output_dir)
+
+
+def stop_evaluator(process: subprocess.Popen, output_dir: str, timeout: float = 30.0):
+    """Stop the evaluator without waiting for pending evaluations (training failed)"""
+    (Path(output_dir) / TRAINING_COMPLETE_MARKER).touch()
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+    print(f"🛑 Checkpoint evaluator stopped (pid {process.pid})")
+
+
+def main():
+    """Watch a training output directory and evaluate checkpoints"""
+    parser = argparse.ArgumentParser(description="Evaluate training checkpoints asynchronously")
+    parser.add_argument('--output-dir', default='./islamic_model')
+    parser.add_argument('--validation', '--val-shards-dir', dest='validation', default='training_data/shards/val',
+                        help="Directory of validation JSONL shards or a single JSONL file")
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--max-length', type=int, default=256)
+    parser.add_argument('--num-threads', type=int, default=1)
+    parser.add_argument('--keep-last', type=int, default=2)
+    parser.add_argument('--poll-interval', type=float, default=10.0)
+    parser.add_argument('--since', type=float, default=0.0,
+                        help="Ignore checkpoints completed before this Unix time")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.validation):
+        print(f"❌ Validation data not found at {args.validation}")
+        print("Please run dataset_split.py or train_simple_model.py --tokenize-to first")
+        sys.exit(1)
+
+    evaluator = CheckpointEvaluator(
+        args.output_dir, args.validation, batch_size=args.batch_size,
+        max_length=args.max_length, num_threads=args.num_threads, keep_last=args.keep_last,
+        since=args.since
+    )
+    evaluator.watch(args.poll_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Asset compiler for the bundled JSON data
+Packs every JSON file under assets/data into one SQLite bundle with one
+row per surah, hadith or record so readers can load a single section
+without parsing the rest of the file
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+BUNDLE_FORMAT_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE bundle_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE assets (
+    name TEXT PRIMARY KEY,
+    split_key TEXT,
+    header TEXT NOT NULL,
+    section_count INTEGER NOT NULL
+);
+CREATE TABLE sections (
+    asset TEXT NOT NULL,
+    ordinal INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (asset, ordinal)
+);
+CREATE INDEX sections_by_label ON sections (asset, label);
+"""
+
+
+def _compact(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def _section_label(item: Any, ordinal: int) -> str:
+    """Surahs are addressed by number, hadiths and records by id"""
+    if isinstance(item, dict):
+        for key in ('number', 'surahNumber', 'id'):
+            if key in item:
+                return str(item[key])
+    return str(ordinal)
+
+
+def split_document(document: Any) -> Tuple[Optional[str], Any, List[Any]]:
+    """Split a document into (split key, header, sections)
+
+    Top-level lists are split per item. Objects are split on their largest
+    list of records; everything else stays in the header.
+    """
+    if isinstance(document, list):
+        return '', None, document
+
+    if isinstance(document, dict):
+        candidates = [
+            (len(value), key) for key, value in document.items()
+            if isinstance(value, list) and value and all(isinstance(v, dict) for v in value)
+        ]
+        if candidates:
+            _, split_key = max(candidates)
+            header = {key: (None if key == split_key else value) for key, value in document.items()}
+            return split_key, header, document[split_key]
+
+    return None, document, []
+
+
+def join_document(split_key: Optional[str], header: Any, sections: List[Any]) -> Any:
+    """Inverse of split_document"""
+    if split_key is None:
+        return header
+    if split_key == '':
+        return sections
+    document = dict(header)
+    document[split_key] = sections
+    return document
+
+
+class AssetCompiler:
+    """Compile JSON assets into a SQLite bundle"""
+
+    def __init__(self, data_dir: str = "assets/data"):
+        self.data_dir = Path(data_dir)
+
+    def discover(self) -> List[Path]:
+        return sorted(self.data_dir.rglob('*.json'))
+
+    def asset_name(self, path: Path) -> str:
+        return path.relative_to(self.data_dir).with_suffix('').as_posix()
+
+    def compile(self, output_path: str) -> str:
+        """Write every JSON asset into a fresh bundle"""
+        print(f"📦 Compiling assets from {self.data_dir}...")
+
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        temp_path = output_path + '.tmp'
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+        connection = sqlite3.connect(temp_path)
+        try:
+            connection.executescript(SCHEMA)
+            connection.execute(
+                "INSERT INTO bundle_meta VALUES ('format_version', ?)", (str(BUNDLE_FORMAT_VERSION),)
+            )
+
+            total_sections = 0
+            for path in self.discover():
+                with open(path, 'r', encoding='utf-8') as f:
+                    document = json.load(f)
+
+                name = self.asset_name(path)
+                split_key, header, sections = split_document(document)
+                connection.execute(
+                    "INSERT INTO assets VALUES (?, ?, ?, ?)",
+                    (name, split_key, _compact(header), len(sections))
+                )
+                connection.executemany(
+                    "INSERT INTO sections VALUES (?, ?, ?, ?)",
+                    ((name, i, _section_label(item, i), _compact(item)) for i, item in enumerate(sections))
+                )
+                total_sections += len(sections)
+                print(f"  ✅ {name}: {len(sections)} sections")
+
+            connection.commit()
+            connection.execute("VACUUM")
+        finally:
+            connection.close()
+
+        os.replace(temp_path, output_path)
+        size = os.path.getsize(output_path) / 1024
+        print(f"💾 Bundle saved to {output_path} ({total_sections} sections, {size:.1f} KB)")
+        return output_path
+
+    def verify(self, bundle_path: str) -> bool:
+        """Check that every asset round-trips to its source JSON"""
+        print("🔍 Verifying round-trip equality...")
+
+        mismatches = []
+        with AssetBundle(bundle_path) as bundle:
+            bundled = set(bundle.asset_names())
+            for path in self.discover():
+                name = self.asset_name(path)
+                with open(path, 'r', encoding='utf-8') as f:
+                    source = json.load(f)
+                if name not in bundled or _compact(bundle.load_asset(name)) != _compact(source):
+                    mismatches.append(name)
+
+        if mismatches:
+            print(f"❌ {len(mismatches)} assets differ from their source JSON:")
+            for name in mismatches:
+                print(f"  - {name}")
+            return False
+
+        print(f"✅ All {len(bundled)} assets match their source JSON")
+        return True
+
+
+class AssetBundle:
+    """Read sections from a compiled asset bundle"""
+
+    def __init__(self, bundle_path: str):
+        if not os.path.exists(bundle_path):
+            raise FileNotFoundError(bundle_path)
+        self.connection = sqlite3.connect(f"file:{bundle_path}?mode=ro", uri=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    def asset_names(self) -> List[str]:
+        return [row[0] for row in self.connection.execute("SELECT name FROM assets ORDER BY name")]
+
+    def section_count(self, asset: str) -> int:
+        row = self.connection.execute(
+            "SELECT section_count FROM assets WHERE name = ?", (asset,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def header(self, asset: str) -> Any:
+        """Asset fields other than its sections (e.g. metadata)"""
+        row = self.connection.execute("SELECT header FROM assets WHERE name = ?", (asset,)).fetchone()
+        if row is None:
+            raise KeyError(asset)
+        return json.loads(row[0])
+
+    def section(self, asset: str, label: str) -> Optional[Dict[str, Any]]:
+        """Load one section by its label, e.g. a surah number or hadith id"""
+        row = self.connection.execute(
+            "SELECT body FROM sections WHERE asset = ? AND label = ? ORDER BY ordinal LIMIT 1",
+            (asset, str(label))
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def iter_sections(self, asset: str) -> Iterator[Any]:
+        for (body,) in self.connection.execute(
+            "SELECT body FROM sections WHERE asset = ? ORDER BY ordinal", (asset,)
+        ):
+            yield json.loads(body)
+
+    def load_asset(self, asset: str) -> Any:
+        """Rebuild the full document exactly as the source JSON"""
+        row = self.connection.execute(
+            "SELECT split_key, header FROM assets WHERE name = ?", (asset,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(asset)
+        split_key, header = row
+        return join_document(split_key, json.loads(header), list(self.iter_sections(asset)))
+
+    def surah(self, number: int) -> Optional[Dict[str, Any]]:
+        return self.section('quran/complete_quran', str(number))
+
+    def ayah(self, surah_number: int, ayah_number: int) -> Optional[Dict[str, Any]]:
+        surah = self.surah(surah_number)
+        if surah is None:
+            return None
+        for ayah in surah['ayahs']:
+            if ayah['ayahNumber'] == ayah_number:
+                return ayah
+        return None
+
+    def hadith(self, collection: str, hadith_id: str) -> Optional[Dict[str, Any]]:
+        return self.section(f'hadith/{collection}', str(hadith_id))
+
+
+def benchmark(data_dir: str, bundle_path: str, repeats: int = 200):
+    """Compare cold-open and first-ayah latency with parsing the JSON"""
+    print("⏱️  Benchmarking JSON path against the bundle...")
+
+    quran_path = os.path.join(data_dir, 'quran', 'complete_quran.json')
+
+    def json_first_ayah():
+        with open(quran_path, 'r', encoding='utf-8') as f:
+            quran = json.load(f)
+        return quran['surahs'][0]['ayahs'][0]
+
+    def bundle_first_ayah():
+        with AssetBundle(bundle_path) as bundle:
+            return bundle.ayah(1, 1)
+
+    def bundle_open():
+        AssetBundle(bundle_path).close()
+
+    assert json_first_ayah() == bundle_first_ayah()
+
+    timings = {}
+    for label, func in (('JSON parse + first ayah', json_first_ayah),
+                        ('Bundle open', bundle_open),
+                        ('Bundle open + first ayah', bundle_first_ayah)):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            func()
+        timings[label] = (time.perf_counter() - start) * 1000 / repeats
+        print(f"  {label:<26} {timings[label]:.3f} ms")
+
+    speedup = timings['JSON parse + first ayah'] / timings['Bundle open + first ayah']
+    print(f"📈 First ayah is {speedup:.1f}x faster from the bundle")
+    return timings
+
+
+def main():
+    """Compile, verify or benchmark the asset bundle"""
+    parser = argparse.ArgumentParser(description="Compile JSON assets into a SQLite bundle")
+    parser.add_argument('command', choices=['compile', 'verify', 'benchmark'], nargs='?', default='compile')
+    parser.add_argument('--data-dir', default='assets/data')
+    parser.add_argument('--bundle', default='assets/data/bayan_data.db')
+    args = parser.parse_args()
+
+    compiler = AssetCompiler(args.data_dir)
+    if args.command == 'compile':
+        compiler.compile(args.bundle)
+        if not compiler.verify(args.bundle):
+            raise SystemExit(1)
+    elif args.command == 'verify':
+        if not compiler.verify(args.bundle):
+            raise SystemExit(1)
+    else:
+        if not os.path.exists(args.bundle):
+            compiler.compile(args.bundle)
+        benchmark(args.data_dir, args.bundle)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Streaming, hash-based train/validation split for Islamic training data
+Each record's fold is decided by hashing a stable group key (surah:ayah,
+collection:hadith) so question-wrapped copies stay with their original
+and the split is identical on every machine and corpus size
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+VAL_FOLD = 'val'
+TRAIN_FOLD = 'train'
+
+AYAH_CONTEXT = re.compile(r'<context>Surah (\d+):(\d+)')
+HADITH_REFERENCE = re.compile(r'<reference>(.*?)</reference>')
+CONTEXT = re.compile(r'<context>(.*?)</context>')
+HADITH_TEXT = re.compile(r'<hadith>(.*?)</hadith>')
+QUESTION = re.compile(r'^<question>.*?</question>\s*')
+
+
+def record_source(text: str) -> str:
+    """Which corpus a training text came from"""
+    if '<tafsir>' in text or '<key_points>' in text:
+        return 'tafsir'
+    if '<hadith>' in text:
+        return 'hadith'
+    if '<ayah>' in text:
+        return 'quran'
+    return 'other'
+
+
+def group_key(text: str) -> str:
+    """Stable key shared by a record and every text derived from it
+
+    Ayahs and their tafsir group by surah:ayah, hadiths by collection and
+    reference. Anything else groups by its text without the question prefix.
+    """
+    match = AYAH_CONTEXT.search(text)
+    if match:
+        return f"quran:{match.group(1)}:{match.group(2)}"
+
+    if '<hadith>' in text:
+        context = CONTEXT.search(text)
+        collection = context.group(1) if context else ''
+        reference = HADITH_REFERENCE.search(text)
+        if reference:
+            return f"hadith:{collection}:{reference.group(1)}"
+        body = HADITH_TEXT.search(text)
+        if body:
+            return f"hadith:{collection}:{body.group(1)}"
+
+    return f"text:{QUESTION.sub('', text)}"
+
+
+def assign_fold(key: str, val_fraction: float = 0.1, salt: str = "bayan-split-v1") -> str:
+    """Deterministically place a group in train or val"""
+    digest = hashlib.blake2b(f"{salt}:{key}".encode('utf-8'), digest_size=8).digest()
+    bucket = int.from_bytes(digest, 'big') / 2 ** 64
+    return VAL_FOLD if bucket < val_fraction else TRAIN_FOLD
+
+
+def split_texts(texts: Iterable[str], val_fraction: float = 0.1,
+                salt: str = "bayan-split-v1") -> Tuple[List[str], List[str]]:
+    """In-memory variant for callers that already hold the texts"""
+    train_texts, val_texts = [], []
+    for text in texts:
+        if assign_fold(group_key(text), val_fraction, salt) == VAL_FOLD:
+            val_texts.append(text)
+        else:
+            train_texts.append(text)
+    return train_texts, val_texts
+
+
+def iter_json_array(path: str, chunk_size: int = 1 << 16) -> Iterator:
+    """Yield elements of a top-level JSON array without loading the file"""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+        in_array = False
+
+        while True:
+            # Skip separators, reading more only once the buffer is used up
+            while True:
+                while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    break
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+
+            if pos >= len(buffer):
+                raise ValueError(f"Unterminated JSON array in {path}")
+            if not in_array:
+                if buffer[pos] != '[':
+                    raise ValueError(f"Expected a JSON array in {path}")
+                in_array = True
+                pos += 1
+                continue
+            if buffer[pos] == ']':
+                return
+
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                if not eof and (end == len(buffer) or buffer[end] in '.eE+-0123456789'):
+                    # A number may continue in the next chunk
+                    raise ValueError("value may be truncated")
+            except ValueError:
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+
+            yield value
+            pos = end
+
+
+def iter_training_texts(path: str) -> Iterator[str]:
+    """Stream texts from a JSON array file or a JSONL shard"""
+    if path.endswith('.jsonl'):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)['text']
+    else:
+        yield from iter_json_array(path)
+
+
+class ShardWriter:
+    """Append records to size-bounded JSONL shards per fold and source"""
+
+    def __init__(self, output_dir: str, shard_size: int = 50000):
+        self.output_dir = output_dir
+        self.shard_size = shard_size
+        self._files: Dict[Tuple[str, str], object] = {}
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self._shard_index: Dict[Tuple[str, str], int] = {}
+        self.totals: Dict[Tuple[str, str], int] = {}
+
+    def _open(self, fold: str, source: str):
+        key = (fold, source)
+        index = self._shard_index.get(key, 0)
+        directory = os.path.join(self.output_dir, fold)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{source}-{index:05d}.jsonl")
+        self._files[key] = open(path, 'w', encoding='utf-8')
+        self._counts[key] = 0
+        self._shard_index[key] = index + 1
+
+    def write(self, fold: str, source: str, record: dict):
+        key = (fold, source)
+        if key not in self._files or self._counts[key] >= self.shard_size:
+            if key in self._files:
+                self._files[key].close()
+            self._open(fold, source)
+        self._files[key].write(json.dumps(record, ensure_ascii=False))
+        self._files[key].write('\n')
+        self._counts[key] += 1
+        self.totals[key] = self.totals.get(key, 0) + 1
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def split_to_shards(texts: Iterable[str], output_dir: str, val_fraction: float = 0.1,
+                    shard_size: int = 50000, salt: str = "bayan-split-v1") -> Dict[Tuple[str, str], int]:
+    """Route each text to its fold's shard in a single streaming pass
+
+    Shards are written to a staging directory and each fold directory is
+    swapped in whole by renames, so shards from an earlier run never linger beside
+    the new ones (the streaming loader trains on every file it finds).
+    """
+    print(f"✂️  Splitting into {output_dir} (val fraction {val_fraction})...")
+
+    parent = os.path.dirname(os.path.abspath(output_dir))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix='.shards-', dir=parent)
+    try:
+        with ShardWriter(staging, shard_size) as writer:
+            for text in texts:
+                key = group_key(text)
+                fold = assign_fold(key, val_fraction, salt)
+                source = record_source(text)
+                writer.write(fold, source, {'text': text, 'group': key, 'source': source})
+            totals = dict(writer.totals)
+
+        os.makedirs(output_dir, exist_ok=True)
+        for fold in (TRAIN_FOLD, VAL_FOLD):
+            target = os.path.join(output_dir, fold)
+            staged = os.path.join(staging, fold)
+            # Rename the old fold aside rather than deleting it first, so a
+            # failed swap leaves it in place; the staging cleanup removes it
+            retired = os.path.join(staging, f"{fold}.old")
+            if os.path.exists(target):
+                os.replace(target, retired)
+            if os.path.exists(staged):
+                try:
+                    os.replace(staged, target)
+                except OSError:
+                    if os.path.exists(retired):
+                        os.replace(retired, target)
+                    raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    for fold in (TRAIN_FOLD, VAL_FOLD):
+        counts = {source: n for (f, source), n in sorted(totals.items()) if f == fold}
+        print(f"✅ {fold}: {sum(counts.values())} records {counts}")
+    return totals
+
+
+def main():
+    """Split prepared training data into train/val shards"""
+    parser = argparse.ArgumentParser(description="Hash-based grouped train/validation split")
+    parser.add_argument('--input', default='training_data/islamic_training_data.json')
+    parser.add_argument('--output-dir', default='training_data/shards')
+    parser.add_argument('--val-fraction', type=float, default=0.1)
+    parser.add_argument('--shard-size', type=int, default=50000)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"❌ Training data not found at {args.input}")
+        print("Please run prepare_training_data.py first")
+        return
+
+    split_to_shards(iter_training_texts(args.input), args.output_dir,
+                    args.val_fraction, args.shard_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Schema-validated loader for hadith collections
+Discovers every collection under assets/data/hadith, decodes them into
+typed records and reports malformed records individually
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+@dataclass(slots=True)
+class HadithRecord:
+    """One validated hadith"""
+    id: str
+    collection: str
+    text_arabic: str
+    text_english: str
+    narrator: str
+    grade: str
+    reference: str
+    book: str
+    chapter: str
+    tags: Tuple[str, ...]
+
+
+@dataclass(slots=True)
+class RecordError:
+    """A record that failed schema validation"""
+    collection: str
+    index: int
+    message: str
+
+    def __str__(self):
+        return f"{self.collection}[{self.index}]: {self.message}"
+
+
+@dataclass(slots=True)
+class HadithCollection:
+    """Decoded collection with the records that passed validation"""
+    name: str
+    path: str
+    records: List[HadithRecord] = field(default_factory=list)
+    errors: List[RecordError] = field(default_factory=list)
+
+
+# Optional string fields of a hadith, in HadithRecord order
+STRING_FIELDS = ('textArabic', 'textEnglish', 'narrator', 'grade', 'reference', 'book', 'chapter')
+
+# Below this much JSON, or with fewer usable cores, a process pool costs more
+# in start-up and pickling records back than it saves
+PARALLEL_MIN_BYTES = 32 * 1024 * 1024
+PARALLEL_MIN_CORES = 4
+
+
+def decode_record(raw: Any, collection: str, index: int) -> HadithRecord:
+    """Validate one raw hadith object, raising ValueError on schema violations"""
+    if not isinstance(raw, dict):
+        raise ValueError(f"expected object, got {type(raw).__name__}")
+
+    hadith_id = raw.get('id')
+    if isinstance(hadith_id, int) and not isinstance(hadith_id, bool):
+        hadith_id = str(hadith_id)
+    if not isinstance(hadith_id, str) or not hadith_id:
+        raise ValueError("missing or invalid 'id'")
+
+    # Only a missing or null field counts as empty; 0, False or [] is malformed
+    values = list(map(raw.get, STRING_FIELDS))
+    for i, value in enumerate(values):
+        if type(value) is not str:
+            if value is not None:
+                raise ValueError(f"'{STRING_FIELDS[i]}' must be a string")
+            values[i] = ''
+
+    if not values[0] and not values[1]:
+        raise ValueError("record has neither 'textArabic' nor 'textEnglish'")
+
+    tags = raw.get('tags')
+    if tags is None:
+        tags = ()
+    elif type(tags) is not list:
+        raise ValueError("'tags' must be a list of strings")
+    for tag in tags:
+        if type(tag) is not str:
+            raise ValueError("'tags' must be a list of strings")
+
+    return HadithRecord(hadith_id, collection, *values, tuple(tags))
+
+
+def _next_record_start(content: str, pos: int, decoder: json.JSONDecoder) -> Optional[int]:
+    """Offset of the first complete object after pos that sits directly in the hadith array
+
+    A truncated record has no closing brace, so the next record may start
+    anywhere after it. Each later '{' is tried in order and the first one
+    that decodes to an object followed by ',' or ']' is taken; the start of
+    the next valid record always comes before anything nested inside it.
+    """
+    start = content.find('{', pos + 1)
+    while start != -1:
+        try:
+            raw, end = decoder.raw_decode(content, start)
+        except json.JSONDecodeError:
+            pass
+        else:
+            while end < len(content) and content[end] in ' \t\r\n':
+                end += 1
+            if isinstance(raw, dict) and (end == len(content) or content[end] in ',]'):
+                return start
+        start = content.find('{', start + 1)
+    return None
+
+
+def _recover_records(content: str) -> Tuple[Optional[dict], List[Tuple[int, Any]], List[str]]:
+    """Decode records one at a time from a file that is not valid JSON
+
+    Returns the collection header fields found before the hadith array, the
+    raw records that parsed and a message per record that did not.
+    """
+    decoder = json.JSONDecoder()
+    match = re.search(r'"hadiths"\s*:\s*\[', content)
+    if match is None:
+        return None, [], []
+
+    header = {}
+    name_match = re.search(r'"collection"\s*:\s*("(?:[^"\\]|\\.)*")', content[:match.start()])
+    if name_match:
+        header['collection'] = json.loads(name_match.group(1))
+
+    records, failures = [], []
+    pos = match.end()
+    index = 0
+    while True:
+        while pos < len(content) and content[pos] in ' \t\r\n,':
+            pos += 1
+        if pos >= len(content) or content[pos] == ']':
+            break
+        try:
+            raw, pos = decoder.raw_decode(content, pos)
+            records.append((index, raw))
+        except json.JSONDecodeError as e:
+            failures.append((index, f"invalid JSON at line {e.lineno} column {e.colno}: {e.msg}"))
+            pos = _next_record_start(content, pos, decoder)
+            if pos is None:
+                break
+        index += 1
+    return header, records, failures
+
+
+@contextlib.contextmanager
+def _gc_paused():
+    """Decoding allocates many objects but no cycles, so skip the collector meanwhile"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def decode_collection(path: str) -> HadithCollection:
+    """Decode and validate one collection file"""
+    with _gc_paused():
+        return _decode_collection(path)
+
+
+def _decode_collection(path: str) -> HadithCollection:
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    failures: List[Tuple[int, str]] = []
+    try:
+        document = json.loads(content)
+        if not isinstance(document, dict) or not isinstance(document.get('hadiths'), list):
+            result = HadithCollection(Path(path).stem, path)
+            result.errors.append(RecordError(result.name, -1, "file has no 'hadiths' list"))
+            return result
+        header = document
+        raw_records = list(enumerate(document['hadiths']))
+    except json.JSONDecodeError as e:
+        header, raw_records, failures = _recover_records(content)
+        if header is None:
+            result = HadithCollection(Path(path).stem, path)
+            result.errors.append(RecordError(result.name, -1, f"invalid JSON: {e}"))
+            return result
+
+    name = header.get('collection') or Path(path).stem
+    result = HadithCollection(name, path)
+    result.errors.extend(RecordError(name, index, message) for index, message in failures)
+
+    for index, raw in raw_records:
+        try:
+            result.records.append(decode_record(raw, name, index))
+        except ValueError as e:
+            result.errors.append(RecordError(name, index, str(e)))
+
+    result.errors.sort(key=lambda error: error.index)
+    return result
+
+
+def discover_collections(hadith_dir: str) -> List[str]:
+    """Every collection file under the hadith directory"""
+    return [str(path) for path in sorted(Path(hadith_dir).glob('*.json'))]
+
+
+def usable_cores() -> int:
+    """CPUs this process may run on (affinity-aware where supported)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def load_collections(hadith_dir: str, max_workers: Optional[int] = None) -> List[HadithCollection]:
+    """Decode all collections, in discovery order
+
+    A process pool is only started with at least PARALLEL_MIN_CORES usable
+    cores and PARALLEL_MIN_BYTES of JSON; otherwise files are decoded in turn.
+    """
+    paths = discover_collections(hadith_dir)
+    workers = min(len(paths), max_workers or usable_cores())
+    total_bytes = sum(os.path.getsize(path) for path in paths)
+    if workers < PARALLEL_MIN_CORES or total_bytes < PARALLEL_MIN_BYTES:
+        return [decode_collection(path) for path in paths]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(decode_collection, paths))
+
+
+def report_errors(collections: List[HadithCollection], limit: int = 10):
+    """Print malformed records per collection"""
+    for collection in collections:
+        if not collection.errors:
+            continue
+        print(f"⚠️  {collection.name}: {len(collection.errors)} malformed records")
+        for error in collection.errors[:limit]:
+            print(f"    - {error}")
+        if len(collection.errors) > limit:
+            print(f"    ... and {len(collection.errors) - limit} more")
+
+
+def _dict_path(paths: List[str]) -> int:
+    """The previous loader: json.load per file and .get() on every field"""
+    count = 0
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                hadith_data = json.load(f)
+        except json.JSONDecodeError:
+            continue
+        for hadith in hadith_data['hadiths']:
+            arabic_text = hadith.get('textArabic', '')
+            english_text = hadith.get('textEnglish', '')
+            if not arabic_text and not english_text:
+                continue
+            hadith.get('narrator', '')
+            hadith.get('grade', '')
+            hadith.get('reference', '')
+            count += 1
+    return count
+
+
+def benchmark(hadith_dir: str, collections: int = 32, copies: int = 60):
+    """Compare records/sec against the dict-based loader on a synthetic corpus"""
+    print("⏱️  Benchmarking hadith decoding...")
+
+    sources = []
+    for path in discover_collections(hadith_dir):
+        with open(path, 'r', encoding='utf-8') as f:
+            sources.append(json.load(f))
+
+    work_dir = tempfile.mkdtemp(prefix='hadith_bench_')
+    try:
+        for i in range(collections):
+            source = dict(sources[i % len(sources)])
+            source['collection'] = f"{source['collection']} {i}"
+            source['hadiths'] = [
+                dict(hadith, id=f"{copy}-{hadith['id']}")
+                for copy in range(copies) for hadith in source['hadiths']
+            ]
+            with open(os.path.join(work_dir, f"collection_{i:03d}.json"), 'w', encoding='utf-8') as f:
+                json.dump(source, f, ensure_ascii=False, indent=2)
+
+        paths = discover_collections(work_dir)
+
+        start = time.perf_counter()
+        baseline_count = _dict_path(paths)
+        baseline_rate = baseline_count / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        sequential_count = sum(len(decode_collection(path).records) for path in paths)
+        sequential_rate = sequential_count / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        loaded = load_collections(work_dir)
+        typed_count = sum(len(c.records) for c in loaded)
+        typed_rate = typed_count / (time.perf_counter() - start)
+        total_bytes = sum(os.path.getsize(path) for path in paths)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    cores = usable_cores()
+    parallel = cores >= PARALLEL_MIN_CORES and total_bytes >= PARALLEL_MIN_BYTES
+    print(f"  {len(paths)} collections, {typed_count} records, {total_bytes / 1024 / 1024:.0f} MB")
+    print(f"  Dict-based sequential: {baseline_rate:>10,.0f} records/sec")
+    print(f"  Typed sequential:      {sequential_rate:>10,.0f} records/sec")
+    print(f"  load_collections:      {typed_rate:>10,.0f} records/sec "
+          f"({'process pool' if parallel else 'in-process'}, {cores} usable cores)")
+    return baseline_rate, typed_rate
+
+
+def main():
+    """Load every collection and report malformed records, or benchmark"""
+    parser = argparse.ArgumentParser(description="Schema-validated hadith collection loader")
+    parser.add_argument('command', choices=['check', 'benchmark'], nargs='?', default='check')
+    parser.add_argument('--hadith-dir', default='assets/data/hadith')
+    args = parser.parse_args()
+
+    if args.command == 'benchmark':
+        benchmark(args.hadith_dir)
+        return
+
+    collections = load_collections(args.hadith_dir)
+    for collection in collections:
+        print(f"✅ {collection.name}: {len(collection.records)} records")
+    report_errors(collections)
+
+
+if __name__ == "__main__":
+    main()
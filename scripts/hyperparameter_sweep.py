@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Parallel hyperparameter sweep for the Islamic AI model
+Runs short trials of SimpleIslamicTrainer in a process pool and stops
+weak trials early with asynchronous successive halving (ASHA)
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import random
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+from dataset_split import split_texts
+from train_simple_model import SimpleIslamicTrainer, TokenizedTexts, build_tokenizer
+from training_defaults import DEFAULT_HYPERPARAMETERS
+
+SEARCH_SPACE = {
+    'learning_rate': ('log_uniform', 1e-5, 5e-4),
+    'batch_size': ('choice', [2, 4, 8]),
+    'max_length': ('choice', [128, 256, 512]),
+    'warmup_steps': ('choice', [0, 25, 50, 100]),
+    'weight_decay': ('choice', [0.0, 0.01, 0.1]),
+}
+
+# Every trial is scored on the same validation tokens, truncated at the
+# longest max_length in the space, whatever length it trained on
+EVAL_MAX_LENGTH = max(SEARCH_SPACE['max_length'][1])
+
+
+def sample_config(rng: random.Random) -> Dict:
+    """Draw one configuration from SEARCH_SPACE"""
+    config = dict(DEFAULT_HYPERPARAMETERS)
+    for name, spec in SEARCH_SPACE.items():
+        if spec[0] == 'log_uniform':
+            config[name] = math.exp(rng.uniform(math.log(spec[1]), math.log(spec[2])))
+        else:
+            config[name] = rng.choice(spec[1])
+    return config
+
+
+def build_token_cache(texts: List[str], model_name: str, max_lengths, cache_dir: str,
+                      eval_samples: int) -> Tuple[Dict[int, str], str]:
+    """Tokenize train once per max_length and val once at EVAL_MAX_LENGTH
+
+    Returns the train file for each max_length and the single val file
+    that all trials are evaluated on.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    fingerprint = hashlib.sha256(model_name.encode('utf-8'))
+    for text in texts:
+        fingerprint.update(text.encode('utf-8'))
+        fingerprint.update(b'\0')
+    digest = fingerprint.hexdigest()[:16]
+
+    train_texts, val_texts = split_texts(texts)
+    val_texts = val_texts[:eval_samples]
+
+    tokenizer = None
+    train_paths = {}
+    for max_length in sorted(set(max_lengths)):
+        train_path = os.path.join(cache_dir, f"train-{digest}-{max_length}.pt")
+        if not os.path.exists(train_path):
+            tokenizer = tokenizer or build_tokenizer(model_name)
+            print(f"🔤 Tokenizing for max_length={max_length}...")
+            TokenizedTexts.build(train_texts, tokenizer, max_length, train_path)
+        train_paths[max_length] = train_path
+
+    val_path = os.path.join(cache_dir, f"val-{digest}-{EVAL_MAX_LENGTH}-{len(val_texts)}.pt")
+    if not os.path.exists(val_path):
+        tokenizer = tokenizer or build_tokenizer(model_name)
+        print(f"🔤 Tokenizing validation for max_length={EVAL_MAX_LENGTH}...")
+        TokenizedTexts.build(val_texts, tokenizer, EVAL_MAX_LENGTH, val_path)
+    return train_paths, val_path
+
+
+def run_trial(job: Dict) -> Dict:
+    """Train one trial up to its rung budget and evaluate it (runs in a worker)"""
+    import torch
+    
+    torch.set_num_threads(job['threads'])
+    start = time.perf_counter()
+
+    trainer = SimpleIslamicTrainer(job['model_name'], job['config'])
+    train_path, val_path = job['train_cache'], job['val_cache']
+    hf_trainer = trainer.create_trainer(
+        TokenizedTexts(train_path), TokenizedTexts(val_path), job['trial_dir'],
+        max_steps=job['budget'],
+        # The default linear decay reaches zero at each rung's max_steps, so a
+        # promoted trial would resume at lr ~0; a flat rate after warmup keeps
+        # every rung training at the config's learning_rate
+        lr_scheduler_type="constant_with_warmup",
+        save_steps=job['budget'],
+        save_total_limit=1,
+        evaluation_strategy="no",
+        load_best_model_at_end=False,
+        logging_steps=max(1, job['budget'] // 5),
+        disable_tqdm=True,
+    )
+
+    # Promoted trials continue from the checkpoint of their previous rung
+    resume = None
+    if job['previous_budget']:
+        resume = os.path.join(job['trial_dir'], f"checkpoint-{job['previous_budget']}")
+    hf_trainer.train(resume_from_checkpoint=resume)
+    metrics = hf_trainer.evaluate()
+
+    return {
+        'trial': job['trial'],
+        'rung': job['rung'],
+        'budget': job['budget'],
+        'eval_loss': metrics['eval_loss'],
+        'seconds': time.perf_counter() - start,
+    }
+
+
+class AshaScheduler:
+    """Asynchronous successive halving over a fixed set of sampled configs"""
+
+    def __init__(self, configs: List[Dict], min_steps: int, max_steps: int, eta: int = 3):
+        self.configs = configs
+        self.eta = eta
+        self.budgets = [min_steps]
+        while self.budgets[-1] * eta <= max_steps:
+            self.budgets.append(self.budgets[-1] * eta)
+        self.results: List[Dict[int, float]] = [{} for _ in self.budgets]
+        self.promoted: List[set] = [set() for _ in self.budgets]
+        self.running: set = set()
+        self.next_trial = 0
+
+    def next_job(self) -> Optional[Tuple[int, int]]:
+        """(trial, rung) to run next, preferring promotions from the highest rung"""
+        for rung in range(len(self.budgets) - 2, -1, -1):
+            finished = self.results[rung]
+            keep = len(finished) // self.eta
+            if keep == 0:
+                continue
+            top = sorted(finished, key=finished.get)[:keep]
+            for trial in top:
+                if trial not in self.promoted[rung] and trial not in self.running:
+                    self.promoted[rung].add(trial)
+                    self.running.add(trial)
+                    return trial, rung + 1
+
+        if self.next_trial < len(self.configs):
+            trial = self.next_trial
+            self.next_trial += 1
+            self.running.add(trial)
+            return trial, 0
+        return None
+
+    def report(self, trial: int, rung: int, loss: float):
+        self.running.discard(trial)
+        self.results[rung][trial] = loss
+
+    def leaderboard(self) -> List[Dict]:
+        """Trials ranked by highest rung reached, then by loss there"""
+        rows = {}
+        for rung, finished in enumerate(self.results):
+            for trial, loss in finished.items():
+                rows[trial] = {'trial': trial, 'rung': rung, 'steps': self.budgets[rung],
+                               'eval_loss': loss, 'config': self.configs[trial]}
+        return sorted(rows.values(), key=lambda row: (-row['rung'], row['eval_loss']))
+
+
+def run_sweep(data_path: str, sweep_dir: str, model_name: str = "distilgpt2", num_trials: int = 27,
+              min_steps: int = 20, max_steps: int = 540, eta: int = 3, threads_per_trial: int = 1,
+              eval_samples: int = 256, seed: int = 42) -> List[Dict]:
+    """Sample configs, run them under ASHA and write the leaderboard"""
+    print("🔬 Starting hyperparameter sweep...")
+
+    with open(data_path, 'r', encoding='utf-8') as f:
+        texts = json.load(f)
+
+    rng = random.Random(seed)
+    configs = [sample_config(rng) for _ in range(num_trials)]
+    train_cache, val_cache = build_token_cache(texts, model_name, [c['max_length'] for c in configs],
+                              os.path.join(sweep_dir, 'token_cache'), eval_samples)
+
+    scheduler = AshaScheduler(configs, min_steps, max_steps, eta)
+    workers = max(1, (os.cpu_count() or 1) // threads_per_trial)
+    print(f"⚙️  {num_trials} trials, rung budgets {scheduler.budgets}, {workers} parallel workers")
+
+    start = time.perf_counter()
+    cpu_seconds = 0.0
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        pending = {}
+        while True:
+            while len(pending) < workers:
+                job = scheduler.next_job()
+                if job is None:
+                    break
+                trial, rung = job
+                config = configs[trial]
+                trial_dir = os.path.join(sweep_dir, f"trial-{trial:03d}")
+                if rung == 0:
+                    # Never resume from a previous sweep's checkpoints
+                    shutil.rmtree(trial_dir, ignore_errors=True)
+                future = executor.submit(run_trial, {
+                    'trial': trial,
+                    'rung': rung,
+                    'budget': scheduler.budgets[rung],
+                    'previous_budget': scheduler.budgets[rung - 1] if rung else 0,
+                    'config': config,
+                    'model_name': model_name,
+                    'train_cache': train_cache[config['max_length']],
+                    'val_cache': val_cache,
+                    'trial_dir': trial_dir,
+                    'threads': threads_per_trial,
+                })
+                pending[future] = job
+
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                trial, rung = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"❌ Trial {trial} failed at rung {rung}: {e}")
+                    scheduler.report(trial, rung, float('inf'))
+                    continue
+                scheduler.report(trial, rung, result['eval_loss'])
+                cpu_seconds += result['seconds'] * threads_per_trial
+                print(f"  trial {trial:3d} rung {rung} ({result['budget']} steps): "
+                      f"loss {result['eval_loss']:.4f} in {result['seconds']:.0f}s")
+
+    leaderboard = scheduler.leaderboard()
+    full_cost = num_trials * max_steps
+    spent = sum(scheduler.budgets[rung] for rung, finished in enumerate(scheduler.results) for _ in finished)
+    print(f"\n🏁 Sweep finished in {time.perf_counter() - start:.0f}s ({cpu_seconds / 3600:.2f} CPU hours)")
+    print(f"📉 Trained {spent} rung-steps vs {full_cost} for full runs of every config")
+
+    print("\n🏆 Leaderboard:")
+    for row in leaderboard[:10]:
+        config = row['config']
+        print(f"  trial {row['trial']:3d}  rung {row['rung']}  loss {row['eval_loss']:.4f}  "
+              f"lr {config['learning_rate']:.2e}  bs {config['batch_size']}  "
+              f"len {config['max_length']}  warmup {config['warmup_steps']}  wd {config['weight_decay']}")
+
+    with open(os.path.join(sweep_dir, 'leaderboard.json'), 'w', encoding='utf-8') as f:
+        json.dump(leaderboard, f, indent=2)
+    if leaderboard:
+        with open(os.path.join(sweep_dir, 'best_config.json'), 'w', encoding='utf-8') as f:
+            json.dump(leaderboard[0]['config'], f, indent=2)
+        print(f"📄 Best config: {os.path.join(sweep_dir, 'best_config.json')}")
+    return leaderboard
+
+
+def main():
+    """Run a hyperparameter sweep"""
+    parser = argparse.ArgumentParser(description="ASHA hyperparameter sweep for SimpleIslamicTrainer")
+    parser.add_argument('--data', default='training_data/islamic_training_data.json')
+    parser.add_argument('--sweep-dir', default='./sweeps/latest')
+    parser.add_argument('--model-name', default='distilgpt2')
+    parser.add_argument('--trials', type=int, default=27)
+    parser.add_argument('--min-steps', type=int, default=20)
+    parser.add_argument('--max-steps', type=int, default=540)
+    parser.add_argument('--eta', type=int, default=3)
+    parser.add_argument('--threads-per-trial', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        print(f"❌ Training data not found at {args.data}")
+        print("Please run prepare_training_data.py first")
+        return
+
+    run_sweep(args.data, args.sweep_dir, args.model_name, args.trials, args.min_steps,
+              args.max_steps, args.eta, args.threads_per_trial, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
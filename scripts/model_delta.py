@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Binary delta updates between exported model versions
+Artifacts are cut into content-hashed chunks along TFLite buffer and JSON
+line boundaries, so a new release only ships the chunks the old one lacks
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import struct
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DELTA_MAGIC = b'BAYANDLT'
+DELTA_VERSION = 1
+# magic, version, manifest bytes
+HEADER = struct.Struct('<8sHI')
+# kind, offset, length; COPY reads the base file, DATA the decompressed payload
+OP = struct.Struct('<BQI')
+OP_COPY, OP_DATA = 0, 1
+
+CHUNK_SIZE = 64 * 1024
+LINE_CHUNK_MASK = 0xFF  # ~256 lines per JSON chunk on average
+ARTIFACTS = ('islamic_model.tflite', 'islamic_vocab.json', 'model_config.json')
+DEFAULT_RELEASES_DIR = 'model_releases'
+
+
+def sha256_bytes(data) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def tflite_buffer_ranges(data: bytes) -> Optional[List[Tuple[int, int]]]:
+    """(start, end) of every non-empty TFLite buffer, or None if this is not a TFLite flatbuffer
+
+    Reads just enough of the flatbuffer layout to find Model.buffers; the
+    tensor data inside them is where fine-tuning changes bytes.
+    """
+    if len(data) < 8 or data[4:8] != b'TFL3':
+        return None
+
+    def u32(pos):
+        return struct.unpack_from('<I', data, pos)[0]
+
+    def field(table, index):
+        """Absolute position of a table field, or None when it is absent"""
+        vtable = table - struct.unpack_from('<i', data, table)[0]
+        vtable_size = struct.unpack_from('<H', data, vtable)[0]
+        slot = 4 + 2 * index
+        if slot >= vtable_size:
+            return None
+        offset = struct.unpack_from('<H', data, vtable + slot)[0]
+        return table + offset if offset else None
+
+    try:
+        model = u32(0)
+        buffers_field = field(model, 4)  # Model.buffers
+        if buffers_field is None:
+            return []
+        vector = buffers_field + u32(buffers_field)
+        ranges = []
+        for index in range(u32(vector)):
+            entry = vector + 4 + 4 * index
+            buffer = entry + u32(entry)
+            data_field = field(buffer, 0)  # Buffer.data
+            if data_field is not None:
+                bytes_vector = data_field + u32(data_field)
+                start = bytes_vector + 4
+                ranges.append((start, start + u32(bytes_vector)))
+            offset_field, size_field = field(buffer, 1), field(buffer, 2)
+            if offset_field is not None and size_field is not None:
+                # Models over 2 GB keep buffers after the flatbuffer
+                start = struct.unpack_from('<Q', data, offset_field)[0]
+                ranges.append((start, start + struct.unpack_from('<Q', data, size_field)[0]))
+    except struct.error:
+        return None
+
+    ranges = sorted((start, end) for start, end in ranges if end > start)
+    if any(end > len(data) for _, end in ranges) or any(a[1] > b[0] for a, b in zip(ranges, ranges[1:])):
+        return None
+    return ranges
+
+
+def _fixed_chunks(start: int, end: int) -> Iterator[Tuple[int, int]]:
+    for position in range(start, end, CHUNK_SIZE):
+        yield position, min(position + CHUNK_SIZE, end)
+
+
+def _line_chunks(data: bytes) -> Iterator[Tuple[int, int]]:
+    """Cut after lines whose hash matches a mask, so an inserted vocab entry only disturbs its own chunk"""
+    start = position = 0
+    while position < len(data):
+        newline = data.find(b'\n', position)
+        line_start, position = position, len(data) if newline == -1 else newline + 1
+        if (zlib.crc32(data[line_start:position]) & LINE_CHUNK_MASK) == 0 or position - start >= CHUNK_SIZE:
+            yield start, position
+            start = position
+    if start < len(data):
+        yield start, len(data)
+
+
+def chunk_file(name: str, data: bytes) -> Tuple[str, List[Tuple[int, int]]]:
+    """Chunker used for a file and its chunk (start, end) ranges"""
+    ranges = tflite_buffer_ranges(data)
+    if ranges is not None:
+        # Buffer boundaries anchor the chunks, so a tensor's chunks match across
+        # releases even when other tensors grow or the graph is rewritten
+        chunks, position = [], 0
+        for start, end in ranges + [(len(data), len(data))]:
+            chunks.extend(_fixed_chunks(position, start))
+            chunks.extend(_fixed_chunks(start, end))
+            position = end
+        return 'tflite', chunks
+    if name.endswith('.json'):
+        return 'lines', list(_line_chunks(data))
+    return 'fixed', list(_fixed_chunks(0, len(data)))
+
+
+def diff_file(name: str, base: Optional[bytes], target: bytes) -> Tuple[Dict, bytes, bytes]:
+    """Manifest entry, packed ops and compressed payload rebuilding target from base"""
+    base_index: Dict[str, int] = {}
+    if base is not None:
+        for start, end in chunk_file(name, base)[1]:
+            base_index.setdefault(sha256_bytes(base[start:end]), start)
+
+    chunker, chunks = chunk_file(name, target)
+    payload = bytearray()
+    payload_index: Dict[str, int] = {}
+    ops: List[List[int]] = []
+    reused = 0
+    for start, end in chunks:
+        chunk = target[start:end]
+        digest = sha256_bytes(chunk)
+        if digest in base_index:
+            kind, offset = OP_COPY, base_index[digest]
+            reused += 1
+        else:
+            if digest not in payload_index:
+                payload_index[digest] = len(payload)
+                payload.extend(chunk)
+            kind, offset = OP_DATA, payload_index[digest]
+
+        previous = ops[-1] if ops else None
+        if previous and previous[0] == kind and previous[1] + previous[2] == offset:
+            previous[2] += end - start
+        else:
+            ops.append([kind, offset, end - start])
+
+    compressed = zlib.compress(bytes(payload), 6)
+    entry = {
+        'chunker': chunker,
+        'chunks': len(chunks),
+        'reused_chunks': reused,
+        'base_size': len(base) if base is not None else None,
+        'base_sha256': sha256_bytes(base) if base is not None else None,
+        'target_size': len(target),
+        'target_sha256': sha256_bytes(target),
+        'ops': len(ops),
+        'payload_size': len(compressed),
+        'payload_sha256': sha256_bytes(compressed),
+    }
+    return entry, b''.join(OP.pack(*op) for op in ops), compressed
+
+
+def create_delta(base_dir: Optional[str], target_dir: str, delta_path: str,
+                 files: Tuple[str, ...] = ARTIFACTS, base_release: str = None, target_release: str = None) -> Dict:
+    """Write a delta that turns the artifacts in base_dir into those in target_dir"""
+    manifest = {'base_release': base_release, 'target_release': target_release, 'files': {}}
+    sections = []
+    position = 0
+    for name in files:
+        with open(os.path.join(target_dir, name), 'rb') as f:
+            target = f.read()
+        base = None
+        base_path = os.path.join(base_dir, name) if base_dir else None
+        if base_path and os.path.exists(base_path):
+            with open(base_path, 'rb') as f:
+                base = f.read()
+
+        entry, ops, payload = diff_file(name, base, target)
+        entry['ops_offset'], entry['payload_offset'] = position, position + len(ops)
+        position += len(ops) + len(payload)
+        manifest['files'][name] = entry
+        sections.extend([ops, payload])
+
+    manifest_bytes = json.dumps(manifest, ensure_ascii=False).encode('utf-8')
+    os.makedirs(os.path.dirname(delta_path) or '.', exist_ok=True)
+    temp_path = delta_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(DELTA_MAGIC, DELTA_VERSION, len(manifest_bytes)))
+        f.write(manifest_bytes)
+        for section in sections:
+            f.write(section)
+    os.replace(temp_path, delta_path)
+
+    manifest['delta_size'] = os.path.getsize(delta_path)
+    manifest['full_size'] = sum(entry['target_size'] for entry in manifest['files'].values())
+    return manifest
+
+
+def read_delta(delta_path: str) -> Tuple[Dict, bytes]:
+    """Manifest and the ops/payload section of a delta file"""
+    with open(delta_path, 'rb') as f:
+        data = f.read()
+    magic, version, manifest_length = HEADER.unpack_from(data, 0)
+    if magic != DELTA_MAGIC or version != DELTA_VERSION:
+        raise ValueError(f"{delta_path} is not a version {DELTA_VERSION} model delta")
+    start = HEADER.size + manifest_length
+    return json.loads(data[HEADER.size:start].decode('utf-8')), data[start:]
+
+
+def apply_delta(base_dir: Optional[str], delta_path: str, output_dir: str) -> List[str]:
+    """Rebuild the target artifacts byte for byte, checking every checksum"""
+    manifest, body = read_delta(delta_path)
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    for name, entry in manifest['files'].items():
+        base = b''
+        if entry['base_sha256'] is not None:
+            base_path = os.path.join(base_dir, name) if base_dir else None
+            if not base_path or not os.path.exists(base_path):
+                raise FileNotFoundError(f"Delta needs the previous {name} in {base_dir}")
+            with open(base_path, 'rb') as f:
+                base = f.read()
+            if sha256_bytes(base) != entry['base_sha256']:
+                raise ValueError(f"{base_path} is not the version this delta was made against")
+
+        ops_end = entry['payload_offset']
+        compressed = body[ops_end:ops_end + entry['payload_size']]
+        if sha256_bytes(compressed) != entry['payload_sha256']:
+            raise ValueError(f"Delta payload for {name} is corrupt")
+        payload = zlib.decompress(compressed)
+
+        target = bytearray()
+        for kind, offset, length in OP.iter_unpack(body[entry['ops_offset']:ops_end]):
+            source = base if kind == OP_COPY else payload
+            if offset + length > len(source):
+                raise ValueError(f"Delta op for {name} reads past the end of its source")
+            target += source[offset:offset + length]
+
+        if len(target) != entry['target_size'] or sha256_bytes(target) != entry['target_sha256']:
+            raise ValueError(f"Rebuilt {name} does not match the expected checksum")
+
+        output_path = os.path.join(output_dir, name)
+        temp_path = output_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(target)
+        os.replace(temp_path, output_path)
+        written.append(output_path)
+    return written
+
+
+def release_id(artifacts_dir: str, files: Tuple[str, ...] = ARTIFACTS) -> str:
+    """Content-derived id of a set of exported artifacts"""
+    digest = hashlib.sha256()
+    for name in files:
+        with open(os.path.join(artifacts_dir, name), 'rb') as f:
+            digest.update(name.encode('utf-8') + b'\0' + hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()[:12]
+
+
+def load_history(releases_dir: str) -> List[Dict]:
+    history_path = os.path.join(releases_dir, 'history.json')
+    if not os.path.exists(history_path):
+        return []
+    with open(history_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def publish_release(artifacts_dir: str, releases_dir: str = DEFAULT_RELEASES_DIR,
+                    files: Tuple[str, ...] = ARTIFACTS) -> Optional[Dict]:
+    """Snapshot freshly exported artifacts and build the delta from the previous release"""
+    missing = [name for name in files if not os.path.exists(os.path.join(artifacts_dir, name))]
+    if missing:
+        print(f"❌ Cannot publish release, missing {', '.join(missing)} in {artifacts_dir}")
+        return None
+
+    history = load_history(releases_dir)
+    release = release_id(artifacts_dir, files)
+    previous = history[-1]['release'] if history else None
+    if release == previous:
+        print(f"✅ Artifacts unchanged since release {release}")
+        return history[-1]
+
+    release_dir = os.path.join(releases_dir, release)
+    os.makedirs(release_dir, exist_ok=True)
+    for name in files:
+        shutil.copy2(os.path.join(artifacts_dir, name), os.path.join(release_dir, name))
+
+    record = {
+        'release': release,
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'full_size': sum(os.path.getsize(os.path.join(release_dir, name)) for name in files),
+        'previous': previous,
+        'delta': None,
+        'delta_size': None,
+    }
+    if previous:
+        delta_path = os.path.join(releases_dir, 'deltas', f"{previous}_to_{release}.bdelta")
+        manifest = create_delta(os.path.join(releases_dir, previous), release_dir, delta_path, files,
+                                base_release=previous, target_release=release)
+
+        # Prove the delta round-trips before anyone downloads it
+        check_dir = os.path.join(releases_dir, '.verify')
+        try:
+            apply_delta(os.path.join(releases_dir, previous), delta_path, check_dir)
+        finally:
+            shutil.rmtree(check_dir, ignore_errors=True)
+
+        record['delta'] = os.path.relpath(delta_path, releases_dir)
+        record['delta_size'] = manifest['delta_size']
+        record['files'] = {
+            name: {'size': entry['target_size'], 'reused_chunks': entry['reused_chunks'],
+                   'chunks': entry['chunks'], 'payload_size': entry['payload_size']}
+            for name, entry in manifest['files'].items()
+        }
+        print(f"📦 Delta {previous} → {release}: {manifest['delta_size'] / 1024:,.0f} KB "
+              f"vs full {manifest['full_size'] / 1024:,.0f} KB "
+              f"({manifest['delta_size'] / manifest['full_size']:.1%})")
+    else:
+        print(f"📦 First release {release}; later exports will ship as deltas against it")
+
+    history.append(record)
+    with open(os.path.join(releases_dir, 'history.json'), 'w', encoding='utf-8') as f:
+        json.dump(history, f, ensure_ascii=False, indent=2)
+    return record
+
+
+def delta_report(releases_dir: str = DEFAULT_RELEASES_DIR):
+    """Delta size against full download size for each successive release"""
+    history = load_history(releases_dir)
+    if not history:
+        print(f"❌ No releases found in {releases_dir}")
+        return
+
+    print(f"{'release':<14}{'full KB':>12}{'delta KB':>12}{'ratio':>9}")
+    for record in history:
+        full_kb = record['full_size'] / 1024
+        if record['delta_size'] is None:
+            print(f"{record['release']:<14}{full_kb:>12,.0f}{'-':>12}{'-':>9}")
+        else:
+            delta_kb = record['delta_size'] / 1024
+            print(f"{record['release']:<14}{full_kb:>12,.0f}{delta_kb:>12,.0f}{delta_kb / full_kb:>9.1%}")
+
+    deltas = [record for record in history if record['delta_size'] is not None]
+    if deltas:
+        full = sum(record['full_size'] for record in deltas)
+        sent = sum(record['delta_size'] for record in deltas)
+        print(f"📊 {len(deltas)} updates: {sent / 1024 / 1024:.1f} MB as deltas vs "
+              f"{full / 1024 / 1024:.1f} MB as full downloads ({1 - sent / full:.0%} saved)")
+
+
+def main():
+    """Create, apply or report on model deltas"""
+    parser = argparse.ArgumentParser(description="Binary delta updates for exported models")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    publish = subparsers.add_parser('publish', help="Snapshot exported artifacts and build the delta")
+    publish.add_argument('--artifacts', default='assets/models')
+    publish.add_argument('--releases-dir', default=DEFAULT_RELEASES_DIR)
+
+    diff = subparsers.add_parser('diff', help="Delta between two artifact directories")
+    diff.add_argument('base_dir')
+    diff.add_argument('target_dir')
+    diff.add_argument('delta_path')
+
+    apply = subparsers.add_parser('apply', help="Rebuild artifacts from a base directory and a delta")
+    apply.add_argument('base_dir')
+    apply.add_argument('delta_path')
+    apply.add_argument('output_dir')
+
+    report = subparsers.add_parser('report', help="Delta vs full size across releases")
+    report.add_argument('--releases-dir', default=DEFAULT_RELEASES_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'publish':
+        if publish_release(args.artifacts, args.releases_dir) is None:
+            raise SystemExit(1)
+    elif args.command == 'diff':
+        manifest = create_delta(args.base_dir, args.target_dir, args.delta_path)
+        for name, entry in manifest['files'].items():
+            print(f"  {name:<24}{entry['reused_chunks']:>6}/{entry['chunks']} chunks reused, "
+                  f"{entry['payload_size'] / 1024:,.0f} KB new data")
+        print(f"💾 {args.delta_path}: {manifest['delta_size'] / 1024:,.0f} KB "
+              f"vs full {manifest['full_size'] / 1024:,.0f} KB")
+    elif args.command == 'apply':
+        for path in apply_delta(args.base_dir, args.delta_path, args.output_dir):
+            print(f"✅ Rebuilt {path}")
+    else:
+        delta_report(args.releases_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,34 +4,153 @@ Script to optimize trained Islamic AI model for mobile deployment
 Converts PyTorch model to TensorFlow Lite for Flutter integration
 """
 
-import torch
-import tensorflow as tf
-from transformers import TFAutoModelForCausalLM, AutoTokenizer
-import numpy as np
+import argparse
+import gc
 import json
 import os
+import re
+import subprocess
+import sys
+import tempfile
 from pathlib import Path
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far, in MB"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    if sys.platform == 'win32':
+        import ctypes
+        from ctypes import wintypes
+        
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in (
+                    'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                    'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage',
+                )
+            ]
+        
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize / (1024 * 1024)
+    return float('nan')
+
+# Last line convert_to_tflite prints, read back when os.wait4 is unavailable
+PEAK_RSS_LINE = re.compile(r'^Peak RSS: ([\d.]+) MB$', re.MULTILINE)
+
+def safetensors_index(model_path: str):
+    """Map each weight name to the .safetensors file holding it, or None if there are none"""
+    index_path = os.path.join(model_path, "model.safetensors.index.json")
+    if os.path.exists(index_path):
+        with open(index_path, 'r', encoding='utf-8') as f:
+            weight_map = json.load(f)["weight_map"]
+        return {name: os.path.join(model_path, file) for name, file in weight_map.items()}
+    
+    single_path = os.path.join(model_path, "model.safetensors")
+    if os.path.exists(single_path):
+        from safetensors import safe_open
+        with safe_open(single_path, framework="np") as f:
+            return {name: single_path for name in f.keys()}
+    return None
+
 class MobileModelOptimizer:
     """Optimize model for mobile deployment"""
     
-    def __init__(self, model_path: str):
+    def __init__(self, model_path: str, output_path: str = "assets/models"):
         self.model_path = model_path
-        self.output_path = "assets/models"
+        self.output_path = output_path
+        self._tokenizer = None
+    
+    @property
+    def tokenizer(self):
+        """Loaded once and shared by every export step"""
+        if self._tokenizer is None:
+            from transformers import AutoTokenizer
+            self._tokenizer = AutoTokenizer.from_pretrained(self.model_path)
+        return self._tokenizer
+    
+    def load_tf_model_streaming(self):
+        """Build the TF model and fill it tensor by tensor from memory-mapped safetensors
+        
+        Only the TF variables and one source tensor are resident at a time,
+        instead of a full PyTorch state dict next to the TF copy.
+        """
+        import tensorflow as tf
+        from safetensors import safe_open
+        from transformers import AutoConfig, TFAutoModelForCausalLM
+        from transformers.modeling_tf_pytorch_utils import (
+            apply_transpose,
+            convert_tf_weight_name_to_pt_weight_name,
+        )
+        
+        weight_files = safetensors_index(self.model_path)
+        if weight_files is None:
+            return None
         
-    def convert_to_tflite(self, model_name: str = "islamic_model.tflite"):
+        config = AutoConfig.from_pretrained(self.model_path)
+        tf_model = TFAutoModelForCausalLM.from_config(config)
+        tf_model(tf_model.dummy_inputs, training=False)  # Create the variables
+        
+        # Checkpoints saved without the base model prefix need it stripped from TF names
+        prefix = tf_model.base_model_prefix
+        start_prefix_to_remove = "" if any(name.startswith(prefix) for name in weight_files) else prefix + "."
+        
+        handles = {}
+        missing = []
+        try:
+            for variable in tf_model.weights:
+                pt_name, transpose = convert_tf_weight_name_to_pt_weight_name(
+                    variable.name,
+                    start_prefix_to_remove=start_prefix_to_remove,
+                    tf_weight_shape=variable.shape,
+                )
+                path = weight_files.get(pt_name)
+                if path is None:
+                    missing.append(pt_name)
+                    continue
+                if path not in handles:
+                    handles[path] = safe_open(path, framework="np")
+                
+                array = handles[path].get_tensor(pt_name)
+                array = apply_transpose(transpose, array, match_shape=variable.shape)
+                variable.assign(array.astype(variable.dtype.as_numpy_dtype, copy=False))
+                del array
+        finally:
+            handles.clear()
+        
+        if missing:
+            raise ValueError(f"Weights missing from {self.model_path}: {missing[:5]}")
+        return tf_model
+    
+    def convert_to_tflite(self, model_name: str = "islamic_model.tflite", streaming: bool = True):
         """Convert PyTorch model to TensorFlow Lite"""
+        import tensorflow as tf
+        from transformers import TFAutoModelForCausalLM
         
-        # Load the trained model
-        print("Loading trained model...")
-        tokenizer = AutoTokenizer.from_pretrained(self.model_path)
+        print(f"Peak RSS at start: {peak_rss_mb():.0f} MB")
         
         # Convert to TensorFlow
-        print("Converting to TensorFlow...")
-        tf_model = TFAutoModelForCausalLM.from_pretrained(
-            self.model_path, 
-            from_tf=False
-        )
+        tf_model = None
+        if streaming:
+            print("Streaming weights from safetensors into TensorFlow...")
+            tf_model = self.load_tf_model_streaming()
+            if tf_model is None:
+                print("No .safetensors checkpoint found, falling back to a full load")
+        if tf_model is None:
+            print("Converting to TensorFlow...")
+            tf_model = TFAutoModelForCausalLM.from_pretrained(
+                self.model_path, 
+                from_pt=True
+            )
+        print(f"Peak RSS after loading: {peak_rss_mb():.0f} MB")
         
         # Create a simple inference function
         @tf.function
@@ -48,7 +167,13 @@ class MobileModelOptimizer:
         
         # Save as SavedModel
         saved_model_path = os.path.join(self.output_path, "saved_model")
-        tf.saved_model.save(tf_model, saved_model_path)
+        tf.saved_model.save(tf_model, saved_model_path, signatures=concrete_func)
+        
+        # The converter reloads from disk, so drop the in-memory copy first (in
+        # both modes, so a memory report compares loading, not what stays alive)
+        del tf_model, inference_func, concrete_func
+        tf.keras.backend.clear_session()
+        gc.collect()
         
         # Convert to TensorFlow Lite
         print("Converting to TensorFlow Lite...")
@@ -77,6 +202,7 @@ class MobileModelOptimizer:
         # Get model size
         model_size = os.path.getsize(tflite_path) / (1024 * 1024)  # MB
         print(f"Model size: {model_size:.2f} MB")
+        print(f"Peak RSS: {peak_rss_mb():.0f} MB")
         
         return tflite_path
     
@@ -88,7 +214,9 @@ class MobileModelOptimizer:
         
         vocab_data = {
             "vocab": vocab_list,
-            "vocab_index": vocab,
+            # get_vocab() order varies between processes for fast tokenizers;
+            # id order keeps the file byte-identical, so release deltas reuse it
+            "vocab_index": {token: vocab[token] for token in vocab_list},
             "vocab_size": len(vocab_list),
             "special_tokens": {
                 "pad_token": tokenizer.pad_token,
@@ -99,6 +227,7 @@ class MobileModelOptimizer:
         }
         
         # Save vocabulary
+        os.makedirs(self.output_path, exist_ok=True)
         vocab_file_path = os.path.join(self.output_path, vocab_path)
         with open(vocab_file_path, 'w', encoding='utf-8') as f:
             json.dump(vocab_data, f, ensure_ascii=False, indent=2)
@@ -133,6 +262,7 @@ class MobileModelOptimizer:
             ]
         }
         
+        os.makedirs(self.output_path, exist_ok=True)
         config_path = os.path.join(self.output_path, "model_config.json")
         with open(config_path, 'w', encoding='utf-8') as f:
             json.dump(config, f, ensure_ascii=False, indent=2)
@@ -140,19 +270,16 @@ class MobileModelOptimizer:
         print(f"Model configuration saved to {config_path}")
         return config_path
     
-    def optimize_model(self):
+    def optimize_model(self, streaming: bool = True, releases_dir: str = "model_releases"):
         """Complete optimization pipeline"""
         
         print("Starting model optimization for mobile...")
         
         # Convert to TensorFlow Lite
-        tflite_path = self.convert_to_tflite()
-        
-        # Load tokenizer for vocabulary
-        tokenizer = AutoTokenizer.from_pretrained(self.model_path)
+        tflite_path = self.convert_to_tflite(streaming=streaming)
         
         # Create vocabulary
-        vocab_path = self.create_vocabulary(tokenizer)
+        vocab_path = self.create_vocabulary(self.tokenizer)
         
         # Create model configuration
         config_path = self.create_model_config(
@@ -166,12 +293,65 @@ class MobileModelOptimizer:
         print(f"  - {os.path.basename(tflite_path)} (TensorFlow Lite model)")
         print(f"  - {os.path.basename(vocab_path)} (Vocabulary)")
         print(f"  - {os.path.basename(config_path)} (Configuration)")
+        
+        # Ship the next version as a delta against the previous one
+        if releases_dir:
+            from model_delta import publish_release
+            publish_release(self.output_path, releases_dir)
+
+def conversion_memory_report(model_path: str):
+    """Peak RSS of a full-load conversion vs a streaming one, each in a fresh process
+
+    Both modes free the loaded model before the TFLite conversion, so the
+    difference is what streaming the weights saves. Without os.wait4
+    (Windows) the peak the child reports for itself is used instead.
+    """
+    print("Measuring conversion peak memory...")
+    results = {}
+    for mode, flags in (("full load", ["--legacy-conversion"]), ("streaming", [])):
+        with tempfile.TemporaryDirectory() as output_path:
+            command = [sys.executable, os.path.abspath(__file__), '--model-path', model_path,
+                       '--output-path', output_path, '--step', 'convert', *flags]
+            if hasattr(os, 'wait4'):
+                process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+                _, status, usage = os.wait4(process.pid, 0)
+                exit_code = os.waitstatus_to_exitcode(status)
+                peak = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+            else:
+                result = subprocess.run(command, stdout=subprocess.PIPE, text=True, encoding='utf-8')
+                exit_code = result.returncode
+                reported = PEAK_RSS_LINE.findall(result.stdout)
+                peak = float(reported[-1]) if reported else float('nan')
+            if exit_code != 0:
+                print(f"  {mode}: conversion failed")
+                continue
+            if peak != peak:  # NaN: the child could not measure itself
+                print(f"  {mode}: peak RSS unavailable on this platform")
+                continue
+            results[mode] = peak
+            print(f"  {mode:<10} peak RSS {peak:,.0f} MB")
+    
+    if len(results) == 2:
+        saved = results["full load"] - results["streaming"]
+        print(f"Streaming conversion saves {saved:,.0f} MB ({saved / results['full load']:.0%})")
+    return results
 
 def main():
     """Main optimization function"""
+    parser = argparse.ArgumentParser(description="Export the trained model for mobile")
+    parser.add_argument('--model-path', default='./islamic_model')
+    parser.add_argument('--output-path', default='assets/models')
+    parser.add_argument('--step', choices=['all', 'convert', 'vocab', 'config', 'release', 'memory-report'],
+                        default='all',
+                        help="Run one export step on its own (used by run_pipeline.py)")
+    parser.add_argument('--legacy-conversion', action='store_true',
+                        help="Load the whole PyTorch checkpoint instead of streaming safetensors")
+    parser.add_argument('--releases-dir', default='model_releases',
+                        help="Where released artifacts and their deltas are kept ('' to skip)")
+    args = parser.parse_args()
     
     # Path to trained model
-    model_path = "./islamic_model"
+    model_path = args.model_path
     
     if not os.path.exists(model_path):
         print(f"Error: Model path {model_path} does not exist")
@@ -179,10 +359,24 @@ def main():
         return
     
     # Create optimizer
-    optimizer = MobileModelOptimizer(model_path)
+    optimizer = MobileModelOptimizer(model_path, args.output_path)
     
-    # Optimize model
-    optimizer.optimize_model()
+    streaming = not args.legacy_conversion
+    if args.step == 'convert':
+        optimizer.convert_to_tflite(streaming=streaming)
+    elif args.step == 'vocab':
+        optimizer.create_vocabulary(optimizer.tokenizer)
+    elif args.step == 'config':
+        optimizer.create_model_config("islamic_model.tflite", "islamic_vocab.json")
+    elif args.step == 'release':
+        from model_delta import publish_release
+        if publish_release(args.output_path, args.releases_dir) is None:
+            sys.exit(1)
+    elif args.step == 'memory-report':
+        conversion_memory_report(model_path)
+    else:
+        # Optimize model
+        optimizer.optimize_model(streaming=streaming, releases_dir=args.releases_dir)
 
 if __name__ == "__main__":
     main()
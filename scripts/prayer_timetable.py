@@ -0,0 +1,562 @@
+#!/usr/bin/env python3
+"""
+Bulk prayer timetable and Hijri calendar precomputation
+Computes a year of prayer times for thousands of coordinates under every
+calculation method in batched NumPy passes, maps each day to the tabular
+Hijri calendar and writes a compact, per-city seekable binary file
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import struct
+import time
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+TIMETABLE_MAGIC = b'BAYANPRT'
+TIMETABLE_VERSION = 1
+# magic, version, year, cities, days, methods, times, metadata bytes
+HEADER = struct.Struct('<8sHHIHHHI')
+
+TIME_NAMES = ('fajr', 'sunrise', 'dhuhr', 'asr', 'maghrib', 'isha', 'midnight')
+MISSING_MINUTES = -32768
+SUNRISE_ANGLE = 0.833
+ISHA_MINUTES_THRESHOLD = 30  # An isha value above this is minutes after maghrib, not an angle
+
+# 1 Muharram 1 AH in the civil (Friday epoch) tabular calendar
+HIJRI_EPOCH_JDN = 1948440
+HIJRI_CYCLE_DAYS = 10631  # 30 years: 19 of 354 days and 11 of 355
+HIJRI_RECORD = np.dtype([('year', '<u2'), ('month', 'u1'), ('day', 'u1'), ('event', '<u2')])
+
+
+def load_methods(path: str = 'assets/data/prayer/calculation_methods.json') -> List[Dict]:
+    """Calculation methods with isha split into an angle or a fixed delay"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    methods = []
+    for method in data['calculationMethods']:
+        params = method['parameters']
+        isha = float(params['isha'])
+        methods.append({
+            'id': method['id'],
+            'fajr': float(params['fajr']),
+            'isha': None if isha > ISHA_MINUTES_THRESHOLD else isha,
+            'isha_minutes': isha if isha > ISHA_MINUTES_THRESHOLD else None,
+            'maghrib': float(params['maghrib']) if 'maghrib' in params else None,
+            'midnight': params.get('midnight', 'Standard'),
+        })
+    return methods
+
+
+def load_calendar(path: str = 'assets/data/calendar/islamic_months.json') -> Tuple[List[int], List[Tuple[int, int, List[str]]]]:
+    """Month lengths of a common year and the (month, day, names) event days"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    months = sorted(data['months'], key=lambda m: m['number'])
+    lengths = [month['days'] for month in months]
+    if len(lengths) != 12 or sum(lengths) != 354:
+        raise ValueError(f"Expected 12 months totalling 354 days in {path}, got {lengths}")
+
+    events: Dict[Tuple[int, int], List[str]] = {}
+    for month in months:
+        for event in month.get('significantEvents', []):
+            events.setdefault((month['number'], event['day']), []).append(event['name'])
+    return lengths, [(m, d, names) for (m, d), names in sorted(events.items())]
+
+
+def grid_coordinates(step: float = 5.0, max_latitude: float = 60.0) -> np.ndarray:
+    """(N, 2) latitude/longitude grid covering the inhabited latitudes"""
+    lats = np.arange(-max_latitude, max_latitude + step / 2, step)
+    lngs = np.arange(-180.0, 180.0, step)
+    lat_grid, lng_grid = np.meshgrid(lats, lngs, indexing='ij')
+    return np.column_stack([lat_grid.ravel(), lng_grid.ravel()])
+
+
+def year_days(year: int) -> np.ndarray:
+    """Julian day number (at noon) of every Gregorian day of a year"""
+    start = datetime.date(year, 1, 1).toordinal()
+    end = datetime.date(year + 1, 1, 1).toordinal()
+    return np.arange(start, end, dtype=np.int64) + 1721425
+
+
+# Vectorized solar model (same formulas as the widely used PrayTimes algorithm)
+
+def _sun_position(jd: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Declination (degrees) and equation of time (hours)"""
+    d = jd - 2451545.0
+    g = np.radians(357.529 + 0.98560028 * d)
+    q = 280.459 + 0.98564736 * d
+    lam = np.radians(q + 1.915 * np.sin(g) + 0.020 * np.sin(2 * g))
+    e = np.radians(23.439 - 0.00000036 * d)
+
+    ra = np.degrees(np.arctan2(np.cos(e) * np.sin(lam), np.cos(lam))) / 15.0
+    eqt = q / 15.0 - np.mod(ra, 24.0)
+    decl = np.degrees(np.arcsin(np.sin(e) * np.sin(lam)))
+    return decl, eqt
+
+
+class _DayGrid:
+    """Solar quantities for a (cities, days) grid, evaluated at day portions"""
+
+    def __init__(self, lat: np.ndarray, lng: np.ndarray, jdn: np.ndarray):
+        self.lat = lat[:, None]
+        self.lng = lng[:, None]
+        # Julian date of local midnight shifted to the longitude, as PrayTimes does
+        self.jd = (jdn[None, :] - 0.5) - self.lng / 360.0
+        self._cache: Dict[float, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def sun(self, portion: float):
+        if portion not in self._cache:
+            self._cache[portion] = _sun_position(self.jd + portion)
+        return self._cache[portion]
+
+    def mid_day(self, portion: float) -> np.ndarray:
+        _, eqt = self.sun(portion)
+        return np.mod(12.0 - eqt, 24.0)
+
+    def angle_time(self, angle: float, portion: float, before_noon: bool) -> np.ndarray:
+        """Hours when the sun is `angle` degrees below the horizon (NaN if never)"""
+        decl, _ = self.sun(portion)
+        lat = np.radians(self.lat)
+        decl_r = np.radians(decl)
+        cos_t = (-math.sin(math.radians(angle)) - np.sin(decl_r) * np.sin(lat)) / (np.cos(decl_r) * np.cos(lat))
+        with np.errstate(invalid='ignore'):
+            t = np.degrees(np.arccos(cos_t)) / 15.0
+        noon = self.mid_day(portion)
+        return noon - t if before_noon else noon + t
+
+    def asr_time(self, factor: int, portion: float) -> np.ndarray:
+        decl, _ = self.sun(portion)
+        angle = -np.degrees(np.arctan(1.0 / (factor + np.tan(np.radians(np.abs(self.lat - decl))))))
+        decl_r = np.radians(decl)
+        lat = np.radians(self.lat)
+        cos_t = (-np.sin(np.radians(angle)) - np.sin(decl_r) * np.sin(lat)) / (np.cos(decl_r) * np.cos(lat))
+        with np.errstate(invalid='ignore'):
+            t = np.degrees(np.arccos(cos_t)) / 15.0
+        return self.mid_day(portion) + t
+
+
+def _time_diff(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return np.mod(b - a, 24.0)
+
+
+def compute_times(coordinates: np.ndarray, jdn: np.ndarray, methods: List[Dict],
+                  asr_factor: int = 1) -> np.ndarray:
+    """Prayer times for every method, city and day: (methods, cities, days, times) hours UTC
+
+    Method-independent times (sunrise, dhuhr, asr, sunset) are computed once
+    and shared; each distinct twilight angle is evaluated once.
+    """
+    grid = _DayGrid(coordinates[:, 0], coordinates[:, 1], jdn)
+    utc_shift = -grid.lng / 15.0
+
+    sunrise = grid.angle_time(SUNRISE_ANGLE, 6 / 24, True) + utc_shift
+    dhuhr = grid.mid_day(12 / 24) + utc_shift
+    asr = grid.asr_time(asr_factor, 13 / 24) + utc_shift
+    sunset = grid.angle_time(SUNRISE_ANGLE, 18 / 24, False) + utc_shift
+    night = _time_diff(sunset, sunrise)
+
+    angle_times: Dict[Tuple[float, bool, float], np.ndarray] = {}
+
+    def twilight(angle, before_noon, portion):
+        key = (angle, before_noon, portion)
+        if key not in angle_times:
+            angle_times[key] = grid.angle_time(angle, portion, before_noon) + utc_shift
+        return angle_times[key]
+
+    result = np.empty((len(methods), len(coordinates), len(jdn), len(TIME_NAMES)))
+    for index, method in enumerate(methods):
+        # Night-middle rule: twilight never reaches past half of the night
+        portion = night / 2
+
+        fajr = twilight(method['fajr'], True, 5 / 24)
+        fajr = np.where(np.isnan(fajr) | (_time_diff(fajr, sunrise) > portion), sunrise - portion, fajr)
+
+        maghrib = sunset
+        if method['maghrib'] is not None:
+            maghrib = twilight(method['maghrib'], False, 18 / 24)
+            maghrib = np.where(np.isnan(maghrib) | (_time_diff(sunset, maghrib) > portion), sunset + portion, maghrib)
+
+        if method['isha'] is not None:
+            isha = twilight(method['isha'], False, 18 / 24)
+            isha = np.where(np.isnan(isha) | (_time_diff(sunset, isha) > portion), sunset + portion, isha)
+        else:
+            isha = maghrib + method['isha_minutes'] / 60.0
+
+        if method['midnight'] == 'Jafari':
+            midnight = sunset + _time_diff(sunset, fajr) / 2
+        else:
+            midnight = sunset + night / 2
+
+        result[index] = np.stack([fajr, sunrise, dhuhr, asr, maghrib, isha, midnight], axis=-1)
+    return result
+
+
+def to_minutes(hours: np.ndarray) -> np.ndarray:
+    """Round hours to int16 minutes after UTC midnight, MISSING_MINUTES where undefined"""
+    minutes = np.round(hours * 60.0)
+    minutes = np.where(np.isfinite(minutes), minutes, MISSING_MINUTES)
+    return minutes.astype(np.int16)
+
+
+def hijri_dates(jdn: np.ndarray, month_lengths: Sequence[int]) -> np.ndarray:
+    """Tabular Hijri (year, month, day) for Julian day numbers, vectorized"""
+    # Leap years of the 30-year cycle get a 30th day of Dhu al-Hijjah
+    years = np.arange(1, 31)
+    year_lengths = 354 + ((14 + 11 * years) % 30 < 11)
+    year_starts = np.concatenate([[0], np.cumsum(year_lengths)[:-1]])
+    month_starts = np.concatenate([[0], np.cumsum(month_lengths)[:-1]])
+
+    days = jdn - HIJRI_EPOCH_JDN
+    cycles, rest = np.divmod(days, HIJRI_CYCLE_DAYS)
+    year_in_cycle = np.searchsorted(year_starts, rest, side='right') - 1
+    day_of_year = rest - year_starts[year_in_cycle]
+    month = np.searchsorted(month_starts, day_of_year, side='right')
+    day = day_of_year - month_starts[month - 1] + 1
+    return np.stack([cycles * 30 + year_in_cycle + 1, month, day], axis=-1)
+
+
+def hijri_table(jdn: np.ndarray, month_lengths: Sequence[int],
+                events: List[Tuple[int, int, List[str]]]) -> np.ndarray:
+    """Per-day Hijri date and event group (0 = none, i + 1 = events[i])"""
+    dates = hijri_dates(jdn, month_lengths)
+    table = np.zeros(len(jdn), dtype=HIJRI_RECORD)
+    table['year'], table['month'], table['day'] = dates[:, 0], dates[:, 1], dates[:, 2]
+
+    event_index = np.zeros((13, 31), dtype=np.uint16)
+    for index, (month, day, _) in enumerate(events):
+        event_index[month, day] = index + 1
+    table['event'] = event_index[table['month'], table['day']]
+    return table
+
+
+def encode_rows(minutes: np.ndarray) -> Tuple[np.ndarray, bytes]:
+    """Deflate each (method, city) row after delta-coding it along the days
+
+    Times move by a minute or two per day, so the deltas are tiny and
+    compress well; each row stays independently decodable.
+    """
+    methods, cities, days, times = minutes.shape
+    # (rows, times, days) so every time series is contiguous
+    rows = minutes.reshape(methods * cities, days, times).transpose(0, 2, 1)
+    deltas = np.diff(rows, axis=-1, prepend=np.zeros((rows.shape[0], times, 1), dtype=np.int16))
+    deltas = deltas.astype('<i2', copy=False)
+
+    offsets = np.zeros(len(rows) + 1, dtype='<u8')
+    blobs = []
+    for index, row in enumerate(deltas):
+        blob = zlib.compress(row.tobytes(), 6)
+        blobs.append(blob)
+        offsets[index + 1] = offsets[index] + len(blob)
+    return offsets, b''.join(blobs)
+
+
+def decode_row(blob: bytes, days: int) -> np.ndarray:
+    """(days, times) int16 minutes from one deflated row"""
+    deltas = np.frombuffer(zlib.decompress(blob), dtype='<i2').reshape(len(TIME_NAMES), days)
+    return np.cumsum(deltas, axis=-1, dtype=np.int16).T
+
+
+def _pad(length: int) -> bytes:
+    return b'\0' * (-length % 8)
+
+
+def build_timetable(year: int, coordinates: np.ndarray, methods: List[Dict], month_lengths: Sequence[int],
+                    events: List[Tuple[int, int, List[str]]], output_path: str, asr_factor: int = 1,
+                    chunk_size: int = 1024) -> Dict:
+    """Compute and write a year's timetable for all coordinates and methods"""
+    print(f"🕌 Computing {year} prayer times for {len(coordinates)} coordinates x {len(methods)} methods...")
+    jdn = year_days(year)
+    start = time.perf_counter()
+
+    # Chunk the cities so intermediate (cities, days) arrays stay bounded
+    minutes = np.empty((len(methods), len(coordinates), len(jdn), len(TIME_NAMES)), dtype=np.int16)
+    for first in range(0, len(coordinates), chunk_size):
+        chunk = coordinates[first:first + chunk_size]
+        minutes[:, first:first + len(chunk)] = to_minutes(compute_times(chunk, jdn, methods, asr_factor))
+    compute_seconds = time.perf_counter() - start
+
+    hijri = hijri_table(jdn, month_lengths, events)
+    offsets, blob = encode_rows(minutes)
+
+    metadata = json.dumps({
+        'methods': [method['id'] for method in methods],
+        'times': list(TIME_NAMES),
+        'units': 'minutes after 00:00 UTC of the Gregorian date',
+        'missing': MISSING_MINUTES,
+        'asr': 'Hanafi' if asr_factor == 2 else 'Standard',
+        'high_latitudes': 'NightMiddle',
+        'first_day': datetime.date(year, 1, 1).isoformat(),
+        'events': [[month, day, names] for month, day, names in events],
+    }, ensure_ascii=False).encode('utf-8')
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    temp_path = output_path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        header = HEADER.pack(TIMETABLE_MAGIC, TIMETABLE_VERSION, year, len(coordinates), len(jdn),
+                             len(methods), len(TIME_NAMES), len(metadata))
+        f.write(header)
+        f.write(metadata)
+        f.write(_pad(len(header) + len(metadata)))
+        f.write(coordinates.astype('<f4').tobytes())
+        f.write(_pad(coordinates.size * 4))
+        f.write(hijri.tobytes())
+        f.write(_pad(hijri.nbytes))
+        f.write(offsets.tobytes())
+        f.write(blob)
+    os.replace(temp_path, output_path)
+
+    raw_size = minutes.nbytes
+    size = os.path.getsize(output_path)
+    print(f"✅ Computed in {compute_seconds:.2f}s "
+          f"({len(coordinates) * len(methods) / compute_seconds:,.0f} city-years/sec)")
+    print(f"💾 Saved {output_path}: {size / 1024 / 1024:.1f} MB "
+          f"(raw int16 {raw_size / 1024 / 1024:.1f} MB, {size / raw_size:.1%})")
+    return {'compute_seconds': compute_seconds, 'size': size, 'raw_size': raw_size}
+
+
+class PrayerTimetable:
+    """Memory-mapped reader that decodes one city's year on demand"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._data = np.memmap(path, dtype=np.uint8, mode='r')
+        magic, version, self.year, self.num_cities, self.num_days, num_methods, num_times, meta_len = \
+            HEADER.unpack_from(self._data, 0)
+        if magic != TIMETABLE_MAGIC or version != TIMETABLE_VERSION:
+            raise ValueError(f"{path} is not a version {TIMETABLE_VERSION} prayer timetable")
+
+        offset = HEADER.size
+        self.metadata = json.loads(bytes(self._data[offset:offset + meta_len]).decode('utf-8'))
+        offset += meta_len + len(_pad(HEADER.size + meta_len))
+        self.method_ids = self.metadata['methods']
+
+        self.coordinates = np.frombuffer(self._data, dtype='<f4', count=self.num_cities * 2,
+                                         offset=offset).reshape(-1, 2)
+        offset += self.num_cities * 8 + len(_pad(self.num_cities * 8))
+        self.hijri = np.frombuffer(self._data, dtype=HIJRI_RECORD, count=self.num_days, offset=offset)
+        offset += self.hijri.nbytes + len(_pad(self.hijri.nbytes))
+        self._offsets = np.frombuffer(self._data, dtype='<u8', count=num_methods * self.num_cities + 1,
+                                      offset=offset)
+        self._blob_start = offset + self._offsets.nbytes
+
+    def nearest_city(self, lat: float, lng: float) -> int:
+        d_lat = self.coordinates[:, 0] - lat
+        d_lng = (self.coordinates[:, 1] - lng + 180.0) % 360.0 - 180.0
+        return int(np.argmin(d_lat ** 2 + (d_lng * math.cos(math.radians(lat))) ** 2))
+
+    def city_times(self, method_id: str, city: int) -> np.ndarray:
+        """(days, times) int16 minutes after UTC midnight"""
+        row = self.method_ids.index(method_id) * self.num_cities + city
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        blob = bytes(self._data[self._blob_start + start:self._blob_start + end])
+        return decode_row(blob, self.num_days)
+
+    def day(self, method_id: str, city: int, date: datetime.date) -> Dict:
+        index = date.toordinal() - datetime.date(self.year, 1, 1).toordinal()
+        minutes = self.city_times(method_id, city)[index]
+        hijri = self.hijri[index]
+        event = int(hijri['event'])
+        return {
+            'times': {name: None if m == MISSING_MINUTES else int(m) for name, m in zip(TIME_NAMES, minutes)},
+            'hijri': (int(hijri['year']), int(hijri['month']), int(hijri['day'])),
+            'events': self.metadata['events'][event - 1][2] if event else [],
+        }
+
+
+# Scalar reference implementations, used to check the vectorized code
+
+def reference_julian(year: int, month: int, day: int) -> float:
+    if month <= 2:
+        year -= 1
+        month += 12
+    a = year // 100
+    b = 2 - a + a // 4
+    return math.floor(365.25 * (year + 4716)) + math.floor(30.6001 * (month + 1)) + day + b - 1524.5
+
+
+def reference_times(lat: float, lng: float, date: datetime.date, method: Dict,
+                    asr_factor: int = 1) -> List[Optional[float]]:
+    """One city, one day, one method with plain math, step by step"""
+    jdate = reference_julian(date.year, date.month, date.day) - lng / (15 * 24)
+
+    def sun(jd):
+        d = jd - 2451545.0
+        g = (357.529 + 0.98560028 * d) % 360
+        q = (280.459 + 0.98564736 * d) % 360
+        lam = (q + 1.915 * math.sin(math.radians(g)) + 0.020 * math.sin(math.radians(2 * g))) % 360
+        e = 23.439 - 0.00000036 * d
+        ra = math.degrees(math.atan2(math.cos(math.radians(e)) * math.sin(math.radians(lam)),
+                                     math.cos(math.radians(lam)))) / 15
+        eqt = q / 15 - (ra % 24)
+        decl = math.degrees(math.asin(math.sin(math.radians(e)) * math.sin(math.radians(lam))))
+        return decl, eqt
+
+    def mid_day(t):
+        return (12 - sun(jdate + t)[1]) % 24
+
+    def angle_time(angle, t, ccw):
+        decl = sun(jdate + t)[0]
+        cos_t = ((-math.sin(math.radians(angle)) - math.sin(math.radians(decl)) * math.sin(math.radians(lat)))
+                 / (math.cos(math.radians(decl)) * math.cos(math.radians(lat))))
+        if abs(cos_t) > 1:
+            return float('nan')
+        hours = math.degrees(math.acos(cos_t)) / 15
+        return mid_day(t) + (-hours if ccw else hours)
+
+    def asr_time(t):
+        decl = sun(jdate + t)[0]
+        angle = -math.degrees(math.atan(1 / (asr_factor + math.tan(math.radians(abs(lat - decl))))))
+        return angle_time(angle, t, False)
+
+    def diff(a, b):
+        return (b - a) % 24
+
+    shift = -lng / 15
+    fajr = angle_time(method['fajr'], 5 / 24, True) + shift
+    sunrise = angle_time(SUNRISE_ANGLE, 6 / 24, True) + shift
+    dhuhr = mid_day(12 / 24) + shift
+    asr = asr_time(13 / 24) + shift
+    sunset = angle_time(SUNRISE_ANGLE, 18 / 24, False) + shift
+    maghrib = sunset
+    if method['maghrib'] is not None:
+        maghrib = angle_time(method['maghrib'], 18 / 24, False) + shift
+    isha = angle_time(method['isha'], 18 / 24, False) + shift if method['isha'] is not None else None
+
+    portion = diff(sunset, sunrise) / 2
+    if math.isnan(fajr) or diff(fajr, sunrise) > portion:
+        fajr = sunrise - portion
+    if method['maghrib'] is not None and (math.isnan(maghrib) or diff(sunset, maghrib) > portion):
+        maghrib = sunset + portion
+    if isha is None:
+        isha = maghrib + method['isha_minutes'] / 60
+    elif math.isnan(isha) or diff(sunset, isha) > portion:
+        isha = sunset + portion
+
+    if method['midnight'] == 'Jafari':
+        midnight = sunset + diff(sunset, fajr) / 2
+    else:
+        midnight = sunset + diff(sunset, sunrise) / 2
+    return [fajr, sunrise, dhuhr, asr, maghrib, isha, midnight]
+
+
+def reference_hijri(jdn: int) -> Tuple[int, int, int]:
+    """Tabular Hijri date by the classic integer algorithm"""
+    l = jdn - HIJRI_EPOCH_JDN + 10632
+    n = (l - 1) // 10631
+    l = l - 10631 * n + 354
+    j = ((10985 - l) // 5316) * ((50 * l) // 17719) + (l // 5670) * ((43 * l) // 15238)
+    l = l - ((30 - j) // 15) * ((17719 * j) // 50) - (j // 16) * ((15238 * j) // 43) + 29
+    month = (24 * l) // 709
+    day = l - (709 * month) // 24
+    return 30 * n + j - 30, month, day
+
+
+def benchmark(year: int, coordinates: np.ndarray, methods: List[Dict], month_lengths: Sequence[int],
+              reference_cities: int = 20, asr_factor: int = 1):
+    """City-years/sec of the vectorized and scalar paths, and their agreement"""
+    jdn = year_days(year)
+    dates = [datetime.date.fromordinal(int(j) - 1721425) for j in jdn]
+    print(f"⏱️  Benchmarking {year}: {len(coordinates)} coordinates x {len(methods)} methods")
+
+    start = time.perf_counter()
+    minutes = np.concatenate([
+        to_minutes(compute_times(coordinates[first:first + 1024], jdn, methods, asr_factor))
+        for first in range(0, len(coordinates), 1024)
+    ], axis=1)
+    vector_seconds = time.perf_counter() - start
+    vector_rate = len(coordinates) * len(methods) / vector_seconds
+
+    rng = np.random.default_rng(0)
+    sample = rng.choice(len(coordinates), size=min(reference_cities, len(coordinates)), replace=False)
+    start = time.perf_counter()
+    reference = np.empty((len(methods), len(sample), len(jdn), len(TIME_NAMES)), dtype=np.int16)
+    for m, method in enumerate(methods):
+        for c, city in enumerate(sample):
+            lat, lng = coordinates[city]
+            for d, date in enumerate(dates):
+                reference[m, c, d] = to_minutes(np.array(reference_times(lat, lng, date, method, asr_factor)))
+    scalar_seconds = time.perf_counter() - start
+    scalar_rate = len(sample) * len(methods) / scalar_seconds
+
+    difference = np.abs(minutes[:, sample].astype(np.int32) - reference.astype(np.int32))
+    hijri = hijri_dates(jdn, month_lengths)
+    hijri_matches = sum(tuple(row) == reference_hijri(int(j)) for row, j in zip(hijri.tolist(), jdn))
+
+    print(f"📊 Vectorized: {vector_rate:,.0f} city-years/sec ({vector_seconds:.2f}s)")
+    print(f"📊 Scalar:     {scalar_rate:,.1f} city-years/sec on {len(sample)} sampled coordinates")
+    print(f"🚀 Speedup: {vector_rate / scalar_rate:,.0f}x")
+    print(f"🎯 Max difference from scalar reference: {difference.max()} min "
+          f"({np.mean(difference == 0):.4%} of times identical)")
+    print(f"🗓️  Hijri dates matching the integer algorithm: {hijri_matches}/{len(jdn)}")
+    return {'vector_rate': vector_rate, 'scalar_rate': scalar_rate,
+            'max_difference': int(difference.max()), 'hijri_matches': hijri_matches}
+
+
+def _load_coordinates(args) -> np.ndarray:
+    if args.coordinates:
+        with open(args.coordinates, 'r', encoding='utf-8') as f:
+            places = json.load(f)
+        return np.array([[place['lat'], place['lng']] for place in places], dtype=np.float64)
+    return grid_coordinates(args.grid_step)
+
+
+def main():
+    """Build, query or benchmark prayer timetables"""
+    parser = argparse.ArgumentParser(description="Vectorized prayer timetable and Hijri calendar builder")
+    parser.add_argument('command', choices=['build', 'lookup', 'benchmark'], nargs='?', default='build')
+    parser.add_argument('--year', type=int, default=datetime.date.today().year)
+    parser.add_argument('--methods', default='assets/data/prayer/calculation_methods.json')
+    parser.add_argument('--calendar', default='assets/data/calendar/islamic_months.json')
+    parser.add_argument('--coordinates', help="JSON list of {lat, lng} places instead of a grid")
+    parser.add_argument('--grid-step', type=float, default=5.0, help="Grid spacing in degrees")
+    parser.add_argument('--asr', choices=['standard', 'hanafi'], default='standard')
+    parser.add_argument('--output', help="Default: assets/data/prayer/timetable_<year>.bin")
+    parser.add_argument('--lat', type=float, default=21.4225)
+    parser.add_argument('--lng', type=float, default=39.8262)
+    parser.add_argument('--method', default='Makkah')
+    parser.add_argument('--date', help="YYYY-MM-DD for lookup (default: today)")
+    args = parser.parse_args()
+
+    for path in (args.methods, args.calendar):
+        if not os.path.exists(path):
+            print(f"❌ Data file not found at {path}")
+            return
+
+    output = args.output or f"assets/data/prayer/timetable_{args.year}.bin"
+    asr_factor = 2 if args.asr == 'hanafi' else 1
+    methods = load_methods(args.methods)
+    month_lengths, events = load_calendar(args.calendar)
+
+    if args.command == 'build':
+        build_timetable(args.year, _load_coordinates(args), methods, month_lengths, events, output, asr_factor)
+    elif args.command == 'benchmark':
+        benchmark(args.year, _load_coordinates(args), methods, month_lengths, asr_factor=asr_factor)
+    else:
+        if not os.path.exists(output):
+            print(f"❌ Timetable not found at {output}")
+            print("Please run prayer_timetable.py build first")
+            return
+        table = PrayerTimetable(output)
+        date = datetime.date.fromisoformat(args.date) if args.date else datetime.date.today()
+        city = table.nearest_city(args.lat, args.lng)
+        day = table.day(args.method, city, date)
+        lat, lng = table.coordinates[city]
+        print(f"📍 Nearest grid point {lat:.2f}, {lng:.2f} ({args.method}, {date.isoformat()})")
+        year, month, mday = day['hijri']
+        events = f" ({', '.join(day['events'])})" if day['events'] else ''
+        print(f"🗓️  Hijri {mday}/{month}/{year} AH{events}")
+        for name, minutes in day['times'].items():
+            text = f"{minutes // 60 % 24:02d}:{minutes % 60:02d} UTC" if minutes is not None else "n/a"
+            print(f"  {name:<9}{text}")
+
+
+if __name__ == "__main__":
+    main()
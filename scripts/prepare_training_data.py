@@ -4,34 +4,32 @@ Data preparation script for Islamic AI model training
 Processes Quran, Hadith, and Islamic texts for training
 """
 
+import argparse
+import itertools
 import json
 import os
 import re
-import unicodedata
+from collections import Counter
 from pathlib import Path
-from typing import List, Dict, Tuple
-import pandas as pd
+from typing import Iterable, Iterator, List, Dict, Tuple
 from tqdm import tqdm
 
+from arabic_normalizer import training_normalizer
+from dataset_split import record_source, split_to_shards
+from hadith_loader import HadithCollection, decode_collection, load_collections, report_errors
+from tafsir_windows import DEFAULT_OVERLAP_TOKENS, DEFAULT_WINDOW_TOKENS, TafsirWindower, discover_tafsir_files
+
 class IslamicDataProcessor:
     """Process Islamic texts for training"""
     
-    def __init__(self):
-        self.arabic_pattern = re.compile(r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]+')
+    def __init__(self, windower: TafsirWindower = None):
+        self.normalizer = training_normalizer
+        self.windower = windower or TafsirWindower()
         self.training_texts = []
         
     def clean_arabic_text(self, text: str) -> str:
         """Clean and normalize Arabic text"""
-        if not text:
-            return ""
-        
-        # Normalize Unicode
-        text = unicodedata.normalize('NFKD', text)
-        
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        return text
+        return self.normalizer.normalize(text)
     
     def load_quran_data(self, quran_path: str) -> List[str]:
         """Load Quran data from your JSON format"""
@@ -87,29 +85,28 @@ class IslamicDataProcessor:
     def load_hadith_data(self, hadith_path: str) -> List[str]:
         """Load Hadith data from your JSON format"""
         print(f"📚 Loading Hadith data from {hadith_path}...")
+        return self.format_hadith_collection(decode_collection(hadith_path))
+    
+    def load_all_hadith_data(self, hadith_dir: str) -> List[str]:
+        """Load every Hadith collection under hadith_dir in parallel"""
+        print(f"📚 Loading Hadith collections from {hadith_dir}...")
         
-        try:
-            with open(hadith_path, 'r', encoding='utf-8') as f:
-                hadith_data = json.load(f)
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON parsing error in {hadith_path}: {e}")
-            print("Skipping this file...")
-            return []
+        texts = []
+        for collection in load_collections(hadith_dir):
+            texts.extend(self.format_hadith_collection(collection))
+        return texts
+    
+    def format_hadith_collection(self, collection: HadithCollection) -> List[str]:
+        """Create training texts from validated Hadith records"""
+        report_errors([collection])
         
         texts = []
-        collection_name = hadith_data['collection']
+        collection_name = collection.name
         
-        for hadith in tqdm(hadith_data['hadiths'], desc=f"Processing {collection_name}"):
-            # Get Arabic and English text
-            arabic_text = hadith.get('textArabic', '')
-            english_text = hadith.get('textEnglish', '')
-            
-            if not arabic_text and not english_text:
-                continue
-            
+        for hadith in tqdm(collection.records, desc=f"Processing {collection_name}"):
             # Clean texts
-            clean_arabic = self.clean_arabic_text(arabic_text)
-            clean_english = self.clean_arabic_text(english_text)
+            clean_arabic = self.clean_arabic_text(hadith.text_arabic)
+            clean_english = self.clean_arabic_text(hadith.text_english)
             
             # Create training text
             text = ""
@@ -119,16 +116,12 @@ class IslamicDataProcessor:
                 text += f" <translation>{clean_english}</translation>"
             
             # Add metadata
-            narrator = hadith.get('narrator', '')
-            grade = hadith.get('grade', '')
-            reference = hadith.get('reference', '')
-            
-            if narrator:
-                text += f" <narrator>{narrator}</narrator>"
-            if grade:
-                text += f" <grade>{grade}</grade>"
-            if reference:
-                text += f" <reference>{reference}</reference>"
+            if hadith.narrator:
+                text += f" <narrator>{hadith.narrator}</narrator>"
+            if hadith.grade:
+                text += f" <grade>{hadith.grade}</grade>"
+            if hadith.reference:
+                text += f" <reference>{hadith.reference}</reference>"
             
             # Add context
             text += f" <context>{collection_name}</context>"
@@ -138,14 +131,14 @@ class IslamicDataProcessor:
         print(f"✅ Loaded {len(texts)} hadiths from {collection_name}")
         return texts
     
-    def load_tafsir_data(self, tafsir_path: str) -> List[str]:
-        """Load Tafsir data from your JSON format"""
+    def load_tafsir_data(self, tafsir_path: str) -> Iterator[str]:
+        """Yield Tafsir training texts, one per commentary window"""
         print(f"📖 Loading Tafsir data from {tafsir_path}...")
         
         with open(tafsir_path, 'r', encoding='utf-8') as f:
             tafsir = json.load(f)
         
-        texts = []
+        count = 0
         surah_name = tafsir.get('surahName', 'Unknown')
         surah_number = tafsir.get('surahNumber', 0)
         
@@ -158,6 +151,9 @@ class IslamicDataProcessor:
             if not clean_arabic:
                 continue
             
+            # Context tags repeated on every window of this ayah
+            context = f" <context>Surah {surah_number}:{ayah_number} - {surah_name}</context>"
+            
             # Process each Tafsir source
             for source in entry.get('tafsirSources', []):
                 author = source.get('author', 'Unknown')
@@ -167,33 +163,52 @@ class IslamicDataProcessor:
                 if not commentary:
                     continue
                 
-                # Create training text
-                text = f"<ayah>{clean_arabic}</ayah>"
-                text += f" <tafsir>{commentary}</tafsir>"
-                text += f" <author>{author}</author>"
+                # Long ayahs leave little room for commentary; the context tag still names them
+                suffix = f"</tafsir> <author>{author}</author>"
+                prefix = f"<ayah>{clean_arabic}</ayah> <tafsir>"
+                if self.windower.budget(prefix, suffix + context) < self.windower.min_window_tokens:
+                    prefix = "<tafsir>"
                 
-                # Add key points if available
+                # Key points ride along with the first window when they fit beside it
+                first_suffix = suffix
+                key_points_record = None
                 if key_points:
-                    key_points_text = ' | '.join(key_points)
-                    text += f" <key_points>{key_points_text}</key_points>"
+                    key_points_tag = f" <key_points>{' | '.join(key_points)}</key_points>"
+                    if self.windower.budget(prefix, suffix + key_points_tag + context) >= self.windower.min_window_tokens:
+                        first_suffix += key_points_tag
+                    else:
+                        key_points_record = f"{key_points_tag} <author>{author}</author>{context}"
+                        ayah_tag = f"<ayah>{clean_arabic}</ayah>"
+                        if self.windower.budget(ayah_tag, key_points_record) >= 0:
+                            key_points_record = ayah_tag + key_points_record
+                        key_points_record = key_points_record.lstrip()
                 
-                # Add context
-                text += f" <context>Surah {surah_number}:{ayah_number} - {surah_name}</context>"
-                
-                texts.append(text)
-        
-        print(f"✅ Loaded {len(texts)} Tafsir entries from {surah_name}")
-        return texts
+                for text in self.windower.window_texts(commentary, prefix, suffix + context,
+                                                       first_suffix + context):
+                    count += 1
+                    yield text
+                if key_points_record:
+                    count += 1
+                    yield key_points_record
+        
+        print(f"✅ Loaded {count} Tafsir windows from {surah_name}")
     
-    def create_training_pairs(self, texts: List[str]) -> List[str]:
-        """Create training pairs for different tasks"""
-        print("🔄 Creating training pairs...")
-        
-        training_texts = []
-        
-        for text in tqdm(texts, desc="Creating training pairs"):
+    def load_all_tafsir_data(self, tafsir_dir: str) -> Iterator[str]:
+        """Stream Tafsir texts from every tafsir_*.json in a directory"""
+        tafsir_paths = discover_tafsir_files(tafsir_dir)
+        print(f"📚 Found {len(tafsir_paths)} Tafsir files in {tafsir_dir}")
+        for path in tafsir_paths:
+            yield from self.load_tafsir_data(str(path))
+    
+    def iter_training_pairs(self, texts: Iterable[str]) -> Iterator[str]:
+        """Yield each text followed by its question-answer variants"""
+        for text in texts:
             # Add the original text
-            training_texts.append(text)
+            yield text
+            
+            # Tafsir windows are sized to the token budget; a question prefix would overflow it
+            if record_source(text) == 'tafsir':
+                continue
             
             # Create question-answer pairs
             if '<ayah>' in text:
@@ -202,7 +217,7 @@ class IslamicDataProcessor:
                     ayah_text = ayah_match.group(1)
                     if len(ayah_text) > 20:  # Only for longer ayahs
                         question = f"<question>What does this ayah mean: {ayah_text[:50]}...</question>"
-                        training_texts.append(f"{question} {text}")
+                        yield f"{question} {text}"
             
             if '<hadith>' in text:
                 hadith_match = re.search(r'<hadith>(.*?)</hadith>', text)
@@ -210,92 +225,122 @@ class IslamicDataProcessor:
                     hadith_text = hadith_match.group(1)
                     if len(hadith_text) > 30:  # Only for longer hadiths
                         question = f"<question>Explain this hadith: {hadith_text[:50]}...</question>"
-                        training_texts.append(f"{question} {text}")
+                        yield f"{question} {text}"
             
             # Create word analysis pairs
             if '<word_analysis>' in text:
                 word_match = re.search(r'<word_analysis>(.*?)</word_analysis>', text)
                 if word_match:
-                    word_analysis = word_match.group(1)
                     question = f"<question>Analyze the words in this text</question>"
-                    training_texts.append(f"{question} {text}")
+                    yield f"{question} {text}"
+    
+    def create_training_pairs(self, texts: List[str]) -> List[str]:
+        """Create training pairs for different tasks"""
+        print("🔄 Creating training pairs...")
+        
+        training_texts = list(self.iter_training_pairs(tqdm(texts, desc="Creating training pairs")))
         
         print(f"✅ Created {len(training_texts)} training texts")
         return training_texts
     
-    def save_training_data(self, texts: List[str], output_path: str):
-        """Save training data to files"""
+    def save_training_data(self, texts: Iterable[str], output_path: str, shards_dir: str = None) -> Counter:
+        """Stream texts to the JSON file, an inspection sample and the shards in one pass"""
         print(f"💾 Saving training data to {output_path}")
         
         # Create output directory
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
-        # Save as JSON
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(texts, f, ensure_ascii=False, indent=2)
-        
-        # Save as text file for easy inspection
+        stats = Counter()
         text_path = output_path.replace('.json', '.txt')
-        with open(text_path, 'w', encoding='utf-8') as f:
-            for i, text in enumerate(texts[:100]):  # Save first 100 for inspection
-                f.write(f"=== Training Text {i+1} ===\n")
-                f.write(text)
-                f.write("\n\n")
-        
-        print(f"✅ Saved {len(texts)} training texts")
+        with open(output_path, 'w', encoding='utf-8') as f, open(text_path, 'w', encoding='utf-8') as sample:
+            def written():
+                for i, text in enumerate(texts):
+                    # Same layout as json.dump(texts, indent=2)
+                    f.write(',\n  ' if i else '[\n  ')
+                    f.write(json.dumps(text, ensure_ascii=False))
+                    
+                    # Save first 100 for inspection
+                    if i < 100:
+                        sample.write(f"=== Training Text {i+1} ===\n")
+                        sample.write(text)
+                        sample.write("\n\n")
+                    
+                    stats['total'] += 1
+                    stats['characters'] += len(text)
+                    for tag in ('<ayah>', '<hadith>', '<tafsir>', '<question>'):
+                        stats[tag] += tag in text
+                    yield text
+            
+            # Write grouped train/validation shards as the texts go by
+            if shards_dir:
+                split_to_shards(written(), shards_dir)
+            else:
+                for _ in written():
+                    pass
+            f.write('\n]' if stats['total'] else '[]')
+        
+        print(f"✅ Saved {stats['total']} training texts")
         print(f"📄 JSON file: {output_path}")
         print(f"📄 Text file: {text_path}")
+        return stats
     
-    def prepare_all_data(self, data_paths: Dict[str, str], output_path: str = "training_data/islamic_training_data.json"):
-        """Prepare all training data"""
+    def prepare_all_data(self, data_paths: Dict[str, str], output_path: str = "training_data/islamic_training_data.json",
+                         shards_dir: str = "training_data/shards") -> Counter:
+        """Prepare all training data
+        
+        Quran and Hadith texts are loaded up front; Tafsir windows are
+        generated lazily and stream straight through to the output files.
+        """
         print("🚀 Starting data preparation...")
         
-        all_texts = []
+        sources = []
         
         # Load Quran data
         if 'quran' in data_paths:
-            quran_texts = self.load_quran_data(data_paths['quran'])
-            all_texts.extend(quran_texts)
+            sources.append(self.load_quran_data(data_paths['quran']))
         
-        # Load Hadith data
-        if 'hadith_bukhari' in data_paths:
-            bukhari_texts = self.load_hadith_data(data_paths['hadith_bukhari'])
-            all_texts.extend(bukhari_texts)
+        # Load every Hadith collection
+        if 'hadith_dir' in data_paths:
+            sources.append(self.load_all_hadith_data(data_paths['hadith_dir']))
         
-        if 'hadith_muslim' in data_paths:
-            muslim_texts = self.load_hadith_data(data_paths['hadith_muslim'])
-            all_texts.extend(muslim_texts)
+        # Tafsir for every surah that has it, one window at a time
+        if 'tafsir_dir' in data_paths:
+            sources.append(self.load_all_tafsir_data(data_paths['tafsir_dir']))
         
-        # Load Tafsir data
-        if 'tafsir_fatihah' in data_paths:
-            tafsir_texts = self.load_tafsir_data(data_paths['tafsir_fatihah'])
-            all_texts.extend(tafsir_texts)
-        
-        # Create training pairs
-        training_texts = self.create_training_pairs(all_texts)
-        
-        # Save training data
-        self.save_training_data(training_texts, output_path)
+        # Create training pairs and save them as they are produced
+        training_texts = self.iter_training_pairs(itertools.chain.from_iterable(sources))
+        stats = self.save_training_data(training_texts, output_path, shards_dir)
         
         # Print statistics
         print("\n📊 Data Statistics:")
-        print(f"Total texts: {len(training_texts)}")
-        print(f"Average length: {sum(len(text) for text in training_texts) / len(training_texts):.1f} characters")
-        print(f"Texts with <ayah>: {sum(1 for text in training_texts if '<ayah>' in text)}")
-        print(f"Texts with <hadith>: {sum(1 for text in training_texts if '<hadith>' in text)}")
-        print(f"Texts with <question>: {sum(1 for text in training_texts if '<question>' in text)}")
-        
-        return training_texts
+        print(f"Total texts: {stats['total']}")
+        print(f"Average length: {stats['characters'] / max(stats['total'], 1):.1f} characters")
+        print(f"Texts with <ayah>: {stats['<ayah>']}")
+        print(f"Texts with <hadith>: {stats['<hadith>']}")
+        print(f"Texts with <tafsir>: {stats['<tafsir>']}")
+        print(f"Texts with <question>: {stats['<question>']}")
+        
+        return stats
 
 def main():
     """Main data preparation function"""
+    parser = argparse.ArgumentParser(description="Prepare Quran, Hadith and Tafsir training data")
+    parser.add_argument('--output', default='training_data/islamic_training_data.json')
+    parser.add_argument('--shards-dir', default='training_data/shards')
+    parser.add_argument('--tokenizer', default='distilgpt2',
+                        help="Tokenizer for tafsir windows ('none' keeps whole commentaries)")
+    parser.add_argument('--window-tokens', type=int,
+                        help=f"Tafsir window size (default: the trainer's max_length, {DEFAULT_WINDOW_TOKENS})")
+    parser.add_argument('--hyperparameters',
+                        help="Trainer hyperparameters JSON whose max_length sizes the tafsir windows")
+    parser.add_argument('--window-overlap', type=int, default=DEFAULT_OVERLAP_TOKENS)
+    args = parser.parse_args()
     
     # Data paths
     data_paths = {
         'quran': 'assets/data/quran/complete_quran.json',
-        'hadith_bukhari': 'assets/data/hadith/sahih_bukhari.json',
-        'hadith_muslim': 'assets/data/hadith/sahih_muslim.json',
-        'tafsir_fatihah': 'assets/data/quran/tafsir_al_fatihah.json',
+        'hadith_dir': 'assets/data/hadith',
+        'tafsir_dir': 'assets/data/quran',
     }
     
     # Check if data files exist
@@ -310,14 +355,22 @@ def main():
             print(f"  - {missing}")
         return
     
+    # Windows match the length the trainer will truncate to
+    window_tokens = args.window_tokens or DEFAULT_WINDOW_TOKENS
+    if args.hyperparameters and not args.window_tokens:
+        with open(args.hyperparameters, 'r', encoding='utf-8') as f:
+            window_tokens = json.load(f).get('max_length', DEFAULT_WINDOW_TOKENS)
+    
     # Create processor
-    processor = IslamicDataProcessor()
+    windower = TafsirWindower.from_pretrained(args.tokenizer, max_tokens=window_tokens,
+                                              overlap=args.window_overlap)
+    processor = IslamicDataProcessor(windower)
     
     # Prepare data
-    training_texts = processor.prepare_all_data(data_paths)
+    processor.prepare_all_data(data_paths, args.output, args.shards_dir)
     
     print("\n🎉 Data preparation completed successfully!")
-    print(f"📁 Training data saved to: training_data/islamic_training_data.json")
+    print(f"📁 Training data saved to: {args.output}")
 
 if __name__ == "__main__":
     main()
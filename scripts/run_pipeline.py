@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Cached pipeline runner for data preparation, training and mobile export
+Stages declare their inputs and outputs; a stage reruns only when the
+fingerprint of its inputs or command changes, and stages whose inputs are
+ready run concurrently
+"""
+
+import argparse
+import fnmatch
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_DIR = ".pipeline"
+STATE_FILE = os.path.join(STATE_DIR, "state.json")
+HASH_CACHE_FILE = os.path.join(STATE_DIR, "file_hashes.json")
+REPORT_FILE = os.path.join(STATE_DIR, "report.json")
+LOG_DIR = os.path.join(STATE_DIR, "logs")
+
+
+def script(name: str, *args: str) -> List[str]:
+    return [sys.executable, os.path.join(SCRIPTS_DIR, name), *args]
+
+
+def code(*names: str) -> List[str]:
+    """Scripts a stage runs, so code changes also invalidate it"""
+    return [os.path.relpath(os.path.join(SCRIPTS_DIR, name)) for name in names]
+
+
+@dataclass
+class Stage:
+    """One pipeline step: a command plus the paths it reads and writes"""
+    name: str
+    command: List[str]
+    inputs: List[str]
+    outputs: List[str] = field(default_factory=list)
+
+    def depends_on(self, other: 'Stage') -> bool:
+        """True when one of our inputs is (or is inside) one of other's outputs"""
+        for pattern in self.inputs:
+            for output in other.outputs:
+                if glob.has_magic(pattern):
+                    if fnmatch.fnmatch(output, pattern):
+                        return True
+                elif (pattern == output or pattern.startswith(output.rstrip('/') + '/')
+                      or output.startswith(pattern.rstrip('/') + '/')):
+                    return True
+        return False
+
+
+# Everything train_simple_model.py imports, so edits to any of it retrain
+TRAINER_CODE = ('train_simple_model.py', 'training_defaults.py', 'checkpoint_evaluator.py', 'dataset_split.py',
+                'streaming_dataset.py', 'shard_mixer.py', 'speculative_decoding.py')
+MOBILE_CODE = ('optimize_for_mobile.py', 'model_delta.py')
+
+PIPELINE = [
+    Stage('prepare', script('prepare_training_data.py'),
+          inputs=['assets/data/quran/complete_quran.json', 'assets/data/hadith',
+                  'assets/data/quran/tafsir_*.json',
+                  *code('prepare_training_data.py', 'arabic_normalizer.py', 'hadith_loader.py', 'dataset_split.py',
+                        'tafsir_windows.py', 'training_defaults.py')],
+          outputs=['training_data/islamic_training_data.json', 'training_data/shards']),
+    Stage('search_index', script('build_search_index.py', 'build'),
+          inputs=['assets/data/quran/complete_quran.json', 'assets/data/hadith',
+                  *code('build_search_index.py', 'arabic_normalizer.py')],
+          outputs=['assets/data/search/search_index.bin']),
+    Stage('morphology_index', script('build_morphology_index.py', 'build'),
+          inputs=['assets/data/quran/complete_quran.json',
+                  *code('build_morphology_index.py', 'build_search_index.py', 'arabic_normalizer.py')],
+          outputs=['assets/data/quran/morphology_index.bin']),
+    Stage('asset_bundle', script('compile_assets.py', 'compile'),
+          inputs=['assets/data/**/*.json', *code('compile_assets.py')],
+          outputs=['assets/data/bayan_data.db']),
+    Stage('tokenize', script('train_simple_model.py', '--tokenize-to', 'training_data/tokens'),
+          inputs=['training_data/islamic_training_data.json', *code(*TRAINER_CODE)],
+          outputs=['training_data/tokens']),
+    Stage('train', script('train_simple_model.py', '--tokenized-dir', 'training_data/tokens',
+                          '--output-dir', 'islamic_model'),
+          inputs=['training_data/tokens', *code(*TRAINER_CODE)],
+          outputs=['islamic_model']),
+    Stage('convert', script('optimize_for_mobile.py', '--model-path', 'islamic_model', '--step', 'convert'),
+          inputs=['islamic_model', *code(*MOBILE_CODE)],
+          outputs=['assets/models/islamic_model.tflite']),
+    Stage('vocab', script('optimize_for_mobile.py', '--model-path', 'islamic_model', '--step', 'vocab'),
+          inputs=['islamic_model', 'assets/models/islamic_model.tflite', *code(*MOBILE_CODE)],
+          outputs=['assets/models/islamic_vocab.json']),
+    Stage('config', script('optimize_for_mobile.py', '--model-path', 'islamic_model', '--step', 'config'),
+          inputs=['assets/models/islamic_model.tflite', *code(*MOBILE_CODE)],
+          outputs=['assets/models/model_config.json']),
+    Stage('release', script('optimize_for_mobile.py', '--model-path', 'islamic_model', '--step', 'release'),
+          inputs=['assets/models/islamic_model.tflite', 'assets/models/islamic_vocab.json',
+                  'assets/models/model_config.json', *code(*MOBILE_CODE)],
+          outputs=['model_releases/history.json']),
+    Stage('benchmark', script('speculative_decoding.py', '--model-path', 'islamic_model'),
+          inputs=['islamic_model', 'assets/models/islamic_model.tflite', *code('speculative_decoding.py')]),
+]
+
+
+class FileHasher:
+    """Content hashes memoized by (size, mtime) so unchanged files are not re-read"""
+
+    def __init__(self, cache_path: str = HASH_CACHE_FILE):
+        self.cache_path = cache_path
+        self.cache: Dict[str, List] = {}
+        if os.path.exists(cache_path):
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                self.cache = json.load(f)
+
+    def file_hash(self, path: str) -> str:
+        stat = os.stat(path)
+        cached = self.cache.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        self.cache[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def paths(self, pattern: str) -> List[str]:
+        """Files named by a path, directory or glob pattern"""
+        if glob.has_magic(pattern):
+            matches = glob.glob(pattern, recursive=True)
+        elif os.path.isdir(pattern):
+            matches = [os.path.join(root, name) for root, _, names in os.walk(pattern) for name in names]
+        else:
+            matches = [pattern] if os.path.exists(pattern) else []
+        return sorted(path for path in matches if os.path.isfile(path))
+
+    def fingerprint(self, patterns: List[str], extra: str = '') -> Optional[str]:
+        """Hash of every file's path and content; None if a plain path is missing"""
+        digest = hashlib.sha256(extra.encode('utf-8'))
+        for pattern in patterns:
+            files = self.paths(pattern)
+            if not files and not glob.has_magic(pattern):
+                return None
+            digest.update(pattern.encode('utf-8') + b'\0')
+            for path in files:
+                digest.update(f"{path}\0{self.file_hash(path)}\0".encode('utf-8'))
+        return digest.hexdigest()
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        with open(self.cache_path, 'w', encoding='utf-8') as f:
+            json.dump(self.cache, f)
+
+
+class PipelineRunner:
+    """Run the stage DAG, skipping stages whose fingerprints are unchanged"""
+
+    def __init__(self, stages: List[Stage], max_workers: int = 4, force: Set[str] = frozenset()):
+        self.stages = {stage.name: stage for stage in stages}
+        self.max_workers = max_workers
+        self.force = set(force)
+        self.hasher = FileHasher()
+        self.state: Dict[str, Dict] = {}
+        if os.path.exists(STATE_FILE):
+            with open(STATE_FILE, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        self.dependencies = {
+            stage.name: {other.name for other in stages if other is not stage and stage.depends_on(other)}
+            for stage in stages
+        }
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        visiting, done = set(), set()
+
+        def visit(name, path):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline cycle: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for dependency in self.dependencies[name]:
+                visit(dependency, path + [name])
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name, [])
+
+    def select(self, targets: List[str]) -> List[str]:
+        """Targets plus everything upstream of them"""
+        selected, pending = set(), list(targets or self.stages)
+        while pending:
+            name = pending.pop()
+            if name not in self.stages:
+                raise ValueError(f"Unknown stage '{name}', choose from {sorted(self.stages)}")
+            if name not in selected:
+                selected.add(name)
+                pending.extend(self.dependencies[name])
+        return [name for name in self.stages if name in selected]
+
+    def input_fingerprint(self, stage: Stage) -> Optional[str]:
+        # The command without the interpreter and checkout location
+        command = [os.path.basename(stage.command[1]), *stage.command[2:]]
+        return self.hasher.fingerprint(stage.inputs, extra=json.dumps(command))
+
+    def is_fresh(self, stage: Stage, fingerprint: Optional[str]) -> bool:
+        """Unchanged inputs and outputs still exactly as this stage left them"""
+        recorded = self.state.get(stage.name)
+        if stage.name in self.force or recorded is None or fingerprint is None:
+            return False
+        if recorded['inputs'] != fingerprint:
+            return False
+        return self.hasher.fingerprint(stage.outputs) == recorded['outputs']
+
+    def run_stage(self, stage: Stage) -> Dict:
+        """Run one stage's command, logging its output to .pipeline/logs"""
+        os.makedirs(LOG_DIR, exist_ok=True)
+        log_path = os.path.join(LOG_DIR, f"{stage.name}.log")
+        start = time.perf_counter()
+        with open(log_path, 'w', encoding='utf-8') as log:
+            process = subprocess.run(stage.command, stdout=log, stderr=subprocess.STDOUT)
+        seconds = time.perf_counter() - start
+
+        # Scripts report some failures by printing and exiting 0, so check outputs too
+        missing = [path for path in stage.outputs if not os.path.exists(path)]
+        if process.returncode != 0 or missing:
+            reason = f"exit code {process.returncode}" if process.returncode else f"missing {missing}"
+            return {'status': 'failed', 'seconds': seconds, 'reason': reason, 'log': log_path}
+        return {'status': 'ran', 'seconds': seconds, 'log': log_path}
+
+    def run(self, targets: List[str] = None, dry_run: bool = False) -> Dict[str, Dict]:
+        order = self.select(targets)
+        report: Dict[str, Dict] = {}
+        remaining = list(order)
+        running = {}
+        pipeline_start = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while remaining or running:
+                # Launch every stage whose dependencies have settled
+                for name in list(remaining):
+                    dependencies = self.dependencies[name] & set(order)
+                    if not dependencies <= set(report):
+                        continue
+                    remaining.remove(name)
+                    stage = self.stages[name]
+
+                    blocked = [d for d in dependencies if report[d]['status'] in ('failed', 'blocked')]
+                    if blocked:
+                        report[name] = {'status': 'blocked', 'seconds': 0.0, 'reason': f"after {blocked}"}
+                        print(f"⛔ {name}: blocked by {', '.join(blocked)}")
+                        continue
+                    if dry_run and any(report[d]['status'] == 'would run' for d in dependencies):
+                        report[name] = {'status': 'would run', 'seconds': 0.0}
+                        print(f"🔜 {name}: would run after {', '.join(sorted(dependencies))}")
+                        continue
+
+                    check_start = time.perf_counter()
+                    fingerprint = self.input_fingerprint(stage)
+                    if self.is_fresh(stage, fingerprint):
+                        report[name] = {'status': 'cached', 'seconds': time.perf_counter() - check_start}
+                        print(f"✅ {name}: up to date")
+                        continue
+                    if dry_run:
+                        report[name] = {'status': 'would run', 'seconds': 0.0}
+                        print(f"🔜 {name}: would run")
+                        continue
+
+                    print(f"🚀 {name}: running {' '.join(stage.command[1:])}")
+                    running[executor.submit(self.run_stage, stage)] = (name, fingerprint)
+
+                if not running:
+                    if remaining and not any(
+                            (self.dependencies[n] & set(order)) <= set(report) for n in remaining):
+                        raise RuntimeError(f"Pipeline stalled with {remaining} pending")
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, _ = running.pop(future)
+                    stage = self.stages[name]
+                    result = future.result()
+                    report[name] = result
+                    if result['status'] == 'ran':
+                        # Fingerprint inputs again, in case they changed while the stage ran
+                        self.state[name] = {
+                            'inputs': self.input_fingerprint(stage),
+                            'outputs': self.hasher.fingerprint(stage.outputs),
+                            'seconds': result['seconds'],
+                            'finished': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                        }
+                        print(f"✅ {name}: finished in {result['seconds']:.1f}s")
+                    else:
+                        self.state.pop(name, None)
+                        print(f"❌ {name}: {result['reason']} (see {result['log']})")
+                    self._save()
+
+        self._save()
+        self.print_report(order, report, time.perf_counter() - pipeline_start)
+        if not dry_run:
+            with open(REPORT_FILE, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        return report
+
+    def _save(self):
+        os.makedirs(STATE_DIR, exist_ok=True)
+        with open(STATE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+        self.hasher.save()
+
+    def print_report(self, order: List[str], report: Dict[str, Dict], wall_seconds: float):
+        print("\n📊 Pipeline report:")
+        print(f"  {'stage':<18}{'status':<12}{'seconds':>10}  previous")
+        for name in order:
+            entry = report.get(name, {'status': 'skipped', 'seconds': 0.0})
+            previous = self.state.get(name, {}).get('seconds')
+            previous_text = f"{previous:.1f}" if entry['status'] == 'cached' and previous else ''
+            print(f"  {name:<18}{entry['status']:<12}{entry['seconds']:>10.1f}  {previous_text}")
+        stage_seconds = sum(entry['seconds'] for entry in report.values())
+        print(f"⏱️  Wall time {wall_seconds:.1f}s for {stage_seconds:.1f}s of stage time")
+
+
+def main():
+    """Run the pipeline, or the listed stages and what they depend on"""
+    parser = argparse.ArgumentParser(description="Cached prepare → tokenize → train → export pipeline")
+    parser.add_argument('targets', nargs='*', help="Stages to bring up to date (default: all)")
+    parser.add_argument('--force', action='append', default=[], help="Rerun this stage even if cached")
+    parser.add_argument('--jobs', type=int, default=4, help="Stages allowed to run at once")
+    parser.add_argument('--dry-run', action='store_true', help="Show what would run")
+    parser.add_argument('--list', action='store_true', help="Print stages and their dependencies")
+    args = parser.parse_args()
+
+    runner = PipelineRunner(PIPELINE, max_workers=args.jobs, force=set(args.force))
+    if args.list:
+        for name, stage in runner.stages.items():
+            after = ', '.join(sorted(runner.dependencies[name])) or '-'
+            print(f"{name:<18} after: {after}")
+            print(f"{'':<18} outputs: {', '.join(stage.outputs) or '-'}")
+        return
+
+    report = runner.run(args.targets, dry_run=args.dry_run)
+    if any(entry['status'] in ('failed', 'blocked') for entry in report.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Weighted mixing of per-source training shards
+Draws Quran, Hadith and Tafsir records from <source>-NNNNN.jsonl shards by
+mixing weight through a bounded shuffle buffer; plain Python, so the mix
+can be inspected and tested without torch
+"""
+
+import json
+import math
+import random
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+DEFAULT_MIXING_WEIGHTS = {
+    'quran': 0.5,
+    'hadith': 0.3,
+    'tafsir': 0.2,
+}
+
+
+def discover_shards(shards_dir: str) -> Dict[str, List[str]]:
+    """Group <source>-NNNNN.jsonl shards by source"""
+    shards: Dict[str, List[str]] = {}
+    for path in sorted(Path(shards_dir).glob('*.jsonl')):
+        source = path.stem.rsplit('-', 1)[0]
+        shards.setdefault(source, []).append(str(path))
+    return shards
+
+
+def count_records(paths: List[str]) -> int:
+    """Count records by streaming lines"""
+    total = 0
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            total += sum(1 for line in f if line.strip())
+    return total
+
+
+class ShardMixer:
+    """Weighted, shuffled stream of record texts from JSONL shards
+
+    An epoch is samples_per_epoch records (default: the total record
+    count) whose sources are drawn by weight; a source that runs out is
+    restarted, so the weights set the data mix, not just its order. With
+    mixed=False every record is read exactly once instead, for validation.
+
+    Readers (DataLoader workers, distributed ranks) each take a slot:
+    whole files when there are enough of them, otherwise every Nth record.
+    """
+
+    def __init__(self, shards_dir: str, mixing_weights: Optional[Dict[str, float]] = None,
+                 shuffle_buffer: int = 1000, seed: int = 42,
+                 samples_per_epoch: Optional[int] = None, mixed: bool = True):
+        self.shards = discover_shards(shards_dir)
+        if not self.shards:
+            raise FileNotFoundError(f"No .jsonl shards found in {shards_dir}")
+
+        weights = mixing_weights or DEFAULT_MIXING_WEIGHTS
+        self.mixing_weights = {
+            source: weights[source] for source in self.shards if weights.get(source, 0.0) > 0
+        }
+        if not self.mixing_weights:
+            raise ValueError(f"No mixing weight for any source in {sorted(self.shards)}")
+        for source in sorted(set(self.shards) - set(self.mixing_weights)):
+            print(f"⚠️  Skipping {source} shards in {shards_dir}: no mixing weight for it "
+                  f"(weights: {self.mixing_weights})")
+
+        self.shuffle_buffer = shuffle_buffer
+        self.seed = seed
+        self.samples_per_epoch = samples_per_epoch
+        self.mixed = mixed
+        self.epoch = 0
+        self._total_records = None
+
+    def set_epoch(self, epoch: int):
+        """Reshuffle differently each epoch"""
+        self.epoch = epoch
+
+    def num_records(self) -> int:
+        """Records one epoch will yield across all readers"""
+        if self.mixed and self.samples_per_epoch is not None:
+            return self.samples_per_epoch
+        if self._total_records is None:
+            self._total_records = sum(count_records(self.shards[source]) for source in self.mixing_weights)
+        return self._total_records
+
+    def _iter_source(self, source: str, slot: int, num_slots: int) -> Iterator[str]:
+        paths = self.shards[source]
+        if len(paths) >= num_slots:
+            # Whole files per reader
+            for path in paths[slot::num_slots]:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if line.strip():
+                            yield json.loads(line)['text']
+        else:
+            # Too few files: every reader takes every num_slots-th record
+            index = 0
+            for path in paths:
+                with open(path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        if index % num_slots == slot:
+                            yield json.loads(line)['text']
+                        index += 1
+
+    def _iter_mixed(self, rng: random.Random, slot: int, num_slots: int) -> Iterator[str]:
+        """Pick each record's source by weight until the epoch is done"""
+        if not self.mixed:
+            for source in self.mixing_weights:
+                yield from self._iter_source(source, slot, num_slots)
+            return
+
+        streams = {source: self._iter_source(source, slot, num_slots) for source in self.mixing_weights}
+        weights = dict(self.mixing_weights)
+        remaining = math.ceil(self.num_records() / num_slots)
+
+        while weights and remaining > 0:
+            sources = list(weights)
+            source = rng.choices(sources, weights=[weights[s] for s in sources])[0]
+            text = next(streams[source], None)
+            if text is None:
+                # Restart short sources so the epoch keeps the mix
+                streams[source] = self._iter_source(source, slot, num_slots)
+                text = next(streams[source], None)
+                if text is None:
+                    # Nothing in this source for this reader
+                    del weights[source]
+                    continue
+            remaining -= 1
+            yield text
+
+    def _shuffled(self, texts: Iterator[str], rng: random.Random) -> Iterator[str]:
+        """Bounded shuffle: yield a random element of a fixed-size buffer"""
+        if self.shuffle_buffer <= 1:
+            yield from texts
+            return
+
+        buffer: List[str] = []
+        for text in texts:
+            if len(buffer) < self.shuffle_buffer:
+                buffer.append(text)
+                continue
+            index = rng.randrange(len(buffer))
+            yield buffer[index]
+            buffer[index] = text
+        rng.shuffle(buffer)
+        yield from buffer
+
+    def iter_texts(self, slot: int = 0, num_slots: int = 1) -> Iterator[str]:
+        """This reader's share of one epoch, mixed and shuffled"""
+        rng = random.Random(f"{self.seed}:{self.epoch}:{slot}")
+        return self._shuffled(self._iter_mixed(rng, slot, num_slots), rng)
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Speculative decoding for the Islamic AI model
+A small draft model proposes several tokens and the fine-tuned model checks
+them in one forward pass; rejection sampling keeps the output distribution
+identical to sampling from the fine-tuned model alone
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+# torch is imported inside the functions so --help does not load it
+
+# Templated prompts in the shape of our training data
+BENCHMARK_PROMPTS = [
+    "<question>What does this ayah mean: بِسْمِ اللَّهِ الرَّحْمَٰنِ الرَّحِيمِ</question>",
+    "<question>Explain this hadith: كَانَ أَوَّلُ مَا بُدِئَ بِهِ</question>",
+    "<ayah>الْحَمْدُ لِلَّهِ رَبِّ الْعَالَمِينَ</ayah>",
+    "<ayah>إِيَّاكَ نَعْبُدُ وَإِيَّاكَ نَسْتَعِينُ</ayah><translation>",
+    "<hadith>إِنَّمَا الْأَعْمَالُ بِالنِّيَّاتِ</hadith><narrator>",
+    "<question>What is the context of Surah 1:5?</question>",
+]
+
+
+def truncated_draft(model, num_layers: int):
+    """Draft model made of the first num_layers blocks of the target
+
+    The draft shares the target's parameter and buffer objects (embeddings,
+    kept blocks, final norm, LM head) rather than copies, so it costs no
+    extra weight memory, needs no training or separate tokenizer, and
+    follows any later change to the target's weights.
+    """
+    config = model.config.__class__.from_dict(model.config.to_dict())
+    if num_layers >= config.num_hidden_layers:
+        raise ValueError(f"Draft needs fewer than {config.num_hidden_layers} layers, got {num_layers}")
+    config.num_hidden_layers = num_layers
+
+    draft = model.__class__(config)
+    # The dropped blocks are simply never looked up
+    shared = {name: tensor for named in (model.named_parameters(remove_duplicate=False),
+                                         model.named_buffers(remove_duplicate=False))
+              for name, tensor in named}
+    for module_name, module in draft.named_modules():
+        prefix = f"{module_name}." if module_name else ""
+        for slots in (module._parameters, module._buffers):
+            for name, tensor in slots.items():
+                if tensor is None:
+                    continue
+                if prefix + name not in shared:
+                    raise ValueError(f"Target has no {prefix + name} to share with the draft")
+                slots[name] = shared[prefix + name]
+    draft.eval()
+    return draft
+
+
+def warp_logits(logits: torch.Tensor, temperature: float = 1.0, top_k: int = 0,
+                top_p: float = 1.0) -> torch.Tensor:
+    """Probabilities after the same temperature/top-k/top-p warping as generate()"""
+    import torch
+
+    logits = logits.float() / temperature
+    if top_k and top_k < logits.size(-1):
+        kth = torch.topk(logits, top_k, dim=-1).values[..., -1:]
+        logits = logits.masked_fill(logits < kth, float('-inf'))
+    if top_p < 1.0:
+        sorted_logits, sorted_index = torch.sort(logits, descending=True, dim=-1)
+        cumulative = sorted_logits.softmax(dim=-1).cumsum(dim=-1)
+        # Drop tokens once the mass before them already exceeds top_p
+        remove = cumulative - sorted_logits.softmax(dim=-1) > top_p
+        logits = logits.masked_fill(remove.scatter(-1, sorted_index, remove), float('-inf'))
+    return logits.softmax(dim=-1)
+
+
+def _crop_cache(past, length: int):
+    """Drop cached positions beyond length (rejected draft tokens)"""
+    if past is None:
+        return None
+    if hasattr(past, 'crop'):
+        past.crop(length)
+        return past
+    return tuple(tuple(t[:, :, :length] for t in layer) for layer in past)
+
+
+def _cache_length(past) -> int:
+    if past is None:
+        return 0
+    if hasattr(past, 'get_seq_length'):
+        return past.get_seq_length()
+    return past[0][0].size(2)
+
+
+def _no_grad(function):
+    """torch.no_grad() applied at call time rather than at import time"""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        import torch
+
+        with torch.no_grad():
+            return function(*args, **kwargs)
+    return wrapper
+
+
+@_no_grad
+def speculative_generate(target, draft, input_ids: torch.Tensor, max_new_tokens: int = 100,
+                         num_draft_tokens: int = 4, temperature: float = 1.0, top_k: int = 0,
+                         top_p: float = 1.0, eos_token_id: Optional[int] = None,
+                         generator: Optional[torch.Generator] = None) -> Tuple[torch.Tensor, Dict]:
+    """Sample up to max_new_tokens for a single prompt (batch size 1)
+
+    Each round the draft samples num_draft_tokens tokens from q, the target
+    scores all of them in one pass to get p, and token i is kept with
+    probability min(1, p/q). The first rejected position is resampled from
+    max(0, p - q); if every draft token is kept, one more token is sampled
+    from p. Returns the full sequence and acceptance statistics.
+    """
+    import torch
+
+    if input_ids.size(0) != 1:
+        raise ValueError("speculative_generate handles one prompt at a time")
+
+    def sample(probs):
+        return torch.multinomial(probs, 1, generator=generator)
+
+    sequence = input_ids
+    prompt_length = input_ids.size(1)
+    target_past, draft_past = None, None
+    stats = {'rounds': 0, 'drafted': 0, 'accepted': 0}
+
+    while sequence.size(1) - prompt_length < max_new_tokens:
+        remaining = max_new_tokens - (sequence.size(1) - prompt_length)
+        gamma = min(num_draft_tokens, remaining)
+
+        # Draft gamma tokens autoregressively, feeding whatever its cache lacks
+        draft_tokens, draft_probs = [], []
+        pending = sequence[:, _cache_length(draft_past):]
+        for _ in range(gamma):
+            out = draft(input_ids=pending, past_key_values=draft_past, use_cache=True)
+            draft_past = out.past_key_values
+            q = warp_logits(out.logits[:, -1], temperature, top_k, top_p)
+            token = sample(q)
+            draft_tokens.append(token)
+            draft_probs.append(q)
+            pending = token
+        drafted = torch.cat(draft_tokens, dim=1)
+
+        # One target pass scores every draft position plus a bonus position
+        target_input = torch.cat([sequence[:, _cache_length(target_past):], drafted], dim=1)
+        out = target(input_ids=target_input, past_key_values=target_past, use_cache=True)
+        target_past = out.past_key_values
+        target_probs = warp_logits(out.logits[:, -(gamma + 1):], temperature, top_k, top_p)
+
+        accepted = 0
+        next_token = None
+        for i in range(gamma):
+            token = drafted[0, i]
+            p = target_probs[0, i]
+            q = draft_probs[i][0]
+            ratio = p[token] / q[token]
+            if torch.rand((), generator=generator) < ratio:
+                accepted += 1
+                continue
+            residual = torch.clamp(p - q, min=0)
+            if residual.sum() <= 0:
+                # Only reachable through rounding when p and q coincide
+                residual = p
+            next_token = sample((residual / residual.sum()).unsqueeze(0))
+            break
+        if next_token is None:
+            next_token = sample(target_probs[:, gamma])
+
+        sequence = torch.cat([sequence, drafted[:, :accepted], next_token], dim=1)
+        stats['rounds'] += 1
+        stats['drafted'] += gamma
+        stats['accepted'] += accepted
+
+        # Both caches must end before the newest token, which is fed next round
+        target_past = _crop_cache(target_past, sequence.size(1) - 1)
+        draft_past = _crop_cache(draft_past, min(_cache_length(draft_past), sequence.size(1) - 1))
+
+        if eos_token_id is not None:
+            new_tokens = sequence[0, sequence.size(1) - accepted - 1:]
+            hits = (new_tokens == eos_token_id).nonzero()
+            if len(hits):
+                sequence = sequence[:, :sequence.size(1) - accepted - 1 + int(hits[0]) + 1]
+                break
+
+    sequence = sequence[:, :prompt_length + max_new_tokens]
+    stats['acceptance_rate'] = stats['accepted'] / stats['drafted'] if stats['drafted'] else 0.0
+    return sequence, stats
+
+
+def benchmark(target, draft, tokenizer, prompts: List[str] = BENCHMARK_PROMPTS, max_new_tokens: int = 64,
+              num_draft_tokens: int = 4, temperature: float = 0.7, top_k: int = 50, repeats: int = 3,
+              seed: int = 0) -> Dict:
+    """Compare tokens/sec of plain sampling and speculative decoding on CPU"""
+    import torch
+
+    print(f"⏱️  Benchmarking {len(prompts)} prompts x {repeats} runs, {max_new_tokens} new tokens...")
+    target.eval()
+    draft.eval()
+
+    plain_tokens, plain_time = 0, 0.0
+    spec_tokens, spec_time = 0, 0.0
+    drafted, accepted, rounds = 0, 0, 0
+    for prompt in prompts:
+        input_ids = tokenizer(prompt, return_tensors="pt").input_ids
+        for run in range(repeats):
+            torch.manual_seed(seed + run)
+            start = time.perf_counter()
+            with torch.no_grad():
+                output = target.generate(
+                    input_ids,
+                    max_new_tokens=max_new_tokens,
+                    min_new_tokens=max_new_tokens,
+                    do_sample=True,
+                    temperature=temperature,
+                    top_k=top_k,
+                    pad_token_id=tokenizer.eos_token_id,
+                )
+            plain_time += time.perf_counter() - start
+            plain_tokens += output.size(1) - input_ids.size(1)
+
+            generator = torch.Generator().manual_seed(seed + run)
+            start = time.perf_counter()
+            output, stats = speculative_generate(
+                target, draft, input_ids, max_new_tokens, num_draft_tokens,
+                temperature=temperature, top_k=top_k, generator=generator,
+            )
+            spec_time += time.perf_counter() - start
+            spec_tokens += output.size(1) - input_ids.size(1)
+            drafted += stats['drafted']
+            accepted += stats['accepted']
+            rounds += stats['rounds']
+
+    results = {
+        'plain_tokens_per_sec': plain_tokens / plain_time,
+        'speculative_tokens_per_sec': spec_tokens / spec_time,
+        'acceptance_rate': accepted / drafted if drafted else 0.0,
+        'tokens_per_target_pass': spec_tokens / rounds if rounds else 0.0,
+    }
+    results['speedup'] = results['speculative_tokens_per_sec'] / results['plain_tokens_per_sec']
+
+    print(f"📊 Plain sampling:       {results['plain_tokens_per_sec']:.1f} tokens/sec")
+    print(f"📊 Speculative decoding: {results['speculative_tokens_per_sec']:.1f} tokens/sec "
+          f"({results['speedup']:.2f}x)")
+    print(f"📊 Draft acceptance rate: {results['acceptance_rate']:.1%} "
+          f"({results['tokens_per_target_pass']:.2f} tokens per target pass)")
+    return results
+
+
+def main():
+    """Benchmark speculative decoding against plain sampling"""
+    parser = argparse.ArgumentParser(description="Speculative decoding benchmark")
+    parser.add_argument('--model-path', default='./islamic_model')
+    parser.add_argument('--draft-model', help="Distilled student sharing the tokenizer")
+    parser.add_argument('--draft-layers', type=int, default=2,
+                        help="Layers kept in a weight-sharing truncated draft when no --draft-model is given")
+    parser.add_argument('--num-draft-tokens', type=int, default=4)
+    parser.add_argument('--max-new-tokens', type=int, default=64)
+    parser.add_argument('--threads', type=int, default=0)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model_path):
+        print(f"❌ Model not found at {args.model_path}")
+        print("Please run train_simple_model.py first")
+        return
+
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model_path)
+    target = AutoModelForCausalLM.from_pretrained(args.model_path)
+    target.eval()
+    if args.draft_model:
+        draft = AutoModelForCausalLM.from_pretrained(args.draft_model)
+        if draft.get_output_embeddings().weight.size(0) != target.get_output_embeddings().weight.size(0):
+            print("❌ Draft model vocabulary does not match the target model")
+            return
+    else:
+        draft = truncated_draft(target, args.draft_layers)
+    print(f"🤖 Draft: {args.draft_model or f'first {args.draft_layers} layers of target'}")
+
+    benchmark(target, draft, tokenizer, max_new_tokens=args.max_new_tokens,
+              num_draft_tokens=args.num_draft_tokens)
+
+
+if __name__ == "__main__":
+    main()
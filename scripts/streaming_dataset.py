@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Streaming dataset over per-source training shards
+Interleaves Quran, Hadith and Tafsir shards by configurable mixing weights
+through a bounded shuffle buffer, so memory stays flat as collections grow
+"""
+
+from typing import Dict, Optional
+
+import torch
+import torch.distributed as dist
+from torch.utils.data import IterableDataset, get_worker_info
+
+from shard_mixer import ShardMixer
+
+
+class IslamicStreamingDataset(ShardMixer, IterableDataset):
+    """Weighted, shuffled stream of tokenized records from JSONL shards
+
+    Mixing and shuffling come from ShardMixer. Shards are split across
+    DataLoader workers and, with shard_by_rank, across distributed ranks.
+    Leave shard_by_rank off under the Hugging Face Trainer, which already
+    shards iterable datasets per rank.
+    """
+
+    def __init__(self, shards_dir: str, tokenizer, max_length: int = 256,
+                 mixing_weights: Optional[Dict[str, float]] = None,
+                 shuffle_buffer: int = 1000, seed: int = 42,
+                 samples_per_epoch: Optional[int] = None,
+                 shard_by_rank: bool = False, mixed: bool = True):
+        super().__init__(shards_dir, mixing_weights, shuffle_buffer=shuffle_buffer, seed=seed,
+                         samples_per_epoch=samples_per_epoch, mixed=mixed)
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self.shard_by_rank = shard_by_rank
+
+    def _reader_slot(self):
+        """(index, count) of this reader among all workers on all ranks"""
+        worker = get_worker_info()
+        worker_id, num_workers = (worker.id, worker.num_workers) if worker else (0, 1)
+
+        rank, world_size = 0, 1
+        if self.shard_by_rank and dist.is_available() and dist.is_initialized():
+            rank, world_size = dist.get_rank(), dist.get_world_size()
+        return rank * num_workers + worker_id, world_size * num_workers
+
+    def __iter__(self):
+        slot, num_slots = self._reader_slot()
+
+        for text in self.iter_texts(slot, num_slots):
+            encoding = self.tokenizer(
+                text,
+                truncation=True,
+                max_length=self.max_length,
+            )
+            yield {
+                'input_ids': torch.tensor(encoding['input_ids']),
+                'attention_mask': torch.tensor(encoding['attention_mask']),
+            }
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Token-space sliding windows for tafsir commentary
+Each commentary is tokenized once and cut into overlapping windows from its
+offset mapping, so every training text fits the model length with its tags
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from training_defaults import DEFAULT_HYPERPARAMETERS
+
+DEFAULT_WINDOW_TOKENS = DEFAULT_HYPERPARAMETERS['max_length']  # What training truncates to
+DEFAULT_OVERLAP_TOKENS = 32
+
+
+def discover_tafsir_files(tafsir_dir: str) -> List[Path]:
+    """Every tafsir_<surah>.json in a directory"""
+    return sorted(Path(tafsir_dir).glob('tafsir_*.json'))
+
+
+class TafsirWindower:
+    """Split long commentary into overlapping windows that fit max_tokens
+
+    Token counts come from the base tokenizer. Training adds the tag
+    tokens as single tokens, so real windows are never longer than
+    planned. Without a tokenizer, commentary is passed through whole.
+    """
+
+    def __init__(self, tokenizer=None, max_tokens: int = DEFAULT_WINDOW_TOKENS,
+                 overlap: int = DEFAULT_OVERLAP_TOKENS, slack: int = 2):
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+        self.slack = slack  # Margin for merges across the tag boundary
+        self.min_window_tokens = max_tokens // 4
+
+    @classmethod
+    def from_pretrained(cls, tokenizer_name: Optional[str], **kwargs) -> 'TafsirWindower':
+        """Windower for a Hugging Face tokenizer, or a pass-through one if unavailable"""
+        if not tokenizer_name or tokenizer_name == 'none':
+            return cls(None, **kwargs)
+        try:
+            from transformers import AutoTokenizer
+        except ImportError:
+            print("⚠️  transformers is not installed; tafsir commentary will not be windowed")
+            return cls(None, **kwargs)
+        return cls(AutoTokenizer.from_pretrained(tokenizer_name, use_fast=True), **kwargs)
+
+    def count(self, text: str) -> int:
+        return len(self.tokenizer(text, add_special_tokens=False)['input_ids'])
+
+    def budget(self, prefix: str, suffix: str) -> int:
+        """Tokens left for the body once prefix and suffix are in the window"""
+        if self.tokenizer is None:
+            return self.max_tokens
+        return self.max_tokens - self.count(prefix) - self.count(suffix) - self.slack
+
+    def split(self, body: str, first_budget: int, budget: int) -> Iterator[str]:
+        """Body text of each window; the first window may have a smaller budget"""
+        if self.tokenizer is None:
+            yield body
+            return
+
+        offsets = self.tokenizer(body, add_special_tokens=False, return_offsets_mapping=True)['offset_mapping']
+        if len(offsets) <= first_budget:
+            yield body
+            return
+
+        overlap = min(self.overlap, budget // 2)
+        start, window = 0, first_budget
+        while True:
+            end = min(start + window, len(offsets))
+            yield body[offsets[start][0]:offsets[end - 1][1]].strip()
+            if end == len(offsets):
+                return
+            start = max(end - overlap, start + 1)
+            window = budget
+
+    def window_texts(self, body: str, prefix: str, suffix: str,
+                     first_suffix: Optional[str] = None) -> Iterator[str]:
+        """prefix + window + suffix for every window; first_suffix replaces suffix on the first"""
+        first_suffix = suffix if first_suffix is None else first_suffix
+        first_budget = self.budget(prefix, first_suffix)
+        budget = self.budget(prefix, suffix) if first_suffix != suffix else first_budget
+        if min(first_budget, budget) < 1:
+            # Forcing a 1-token body would still overflow max_tokens
+            raise ValueError(f"Tags leave no room for commentary in a {self.max_tokens}-token window: "
+                             f"{prefix!r} ... {first_suffix!r}")
+        for index, window in enumerate(self.split(body, first_budget, budget)):
+            yield f"{prefix}{window}{first_suffix if index == 0 else suffix}"
+
+
+def main():
+    """Show how each tafsir commentary would be windowed"""
+    parser = argparse.ArgumentParser(description="Token-space tafsir windowing")
+    parser.add_argument('--tafsir-dir', default='assets/data/quran')
+    parser.add_argument('--tokenizer', default='distilgpt2')
+    parser.add_argument('--window-tokens', type=int, default=DEFAULT_WINDOW_TOKENS)
+    parser.add_argument('--overlap', type=int, default=DEFAULT_OVERLAP_TOKENS)
+    args = parser.parse_args()
+
+    paths = discover_tafsir_files(args.tafsir_dir)
+    if not paths:
+        print(f"❌ No tafsir_*.json files found in {args.tafsir_dir}")
+        return
+
+    windower = TafsirWindower.from_pretrained(args.tokenizer, max_tokens=args.window_tokens,
+                                              overlap=args.overlap)
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            tafsir = json.load(f)
+        commentaries = [source.get('commentary', '') for entry in tafsir.get('tafsir', [])
+                        for source in entry.get('tafsirSources', [])]
+        commentaries = [c for c in commentaries if c]
+        if windower.tokenizer is None:
+            print(f"📖 {os.path.basename(path)}: {len(commentaries)} commentaries")
+            continue
+        lengths = [windower.count(c) for c in commentaries]
+        windows = sum(len(list(windower.split(c, windower.max_tokens, windower.max_tokens))) for c in commentaries)
+        print(f"📖 {os.path.basename(path)}: {len(commentaries)} commentaries, "
+              f"longest {max(lengths, default=0)} tokens, {windows} windows")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,27 +4,19 @@ Training script for custom Islamic AI model
 This script trains a model on Quran, Hadith, and Islamic texts
 """
 
+import argparse
 import json
 import os
 import re
-import unicodedata
 from pathlib import Path
 from typing import List, Dict, Tuple
-import torch
-import torch.nn as nn
-from torch.utils.data import Dataset, DataLoader
-from transformers import (
-    AutoTokenizer, 
-    AutoModelForCausalLM, 
-    TrainingArguments, 
-    Trainer,
-    DataCollatorForLanguageModeling
-)
-import numpy as np
-from sklearn.model_selection import train_test_split
 
-class IslamicDataset(Dataset):
-    """Dataset for Islamic texts"""
+# torch and transformers are imported where they are used, so --help stays fast
+from arabic_normalizer import training_normalizer
+from dataset_split import split_texts
+
+class IslamicDataset:
+    """Dataset for Islamic texts (map-style: __len__ and __getitem__)"""
     
     def __init__(self, texts: List[str], tokenizer, max_length: int = 512):
         self.texts = texts
@@ -56,20 +48,11 @@ class IslamicDataProcessor:
     """Process Islamic texts for training"""
     
     def __init__(self):
-        self.arabic_pattern = re.compile(r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\uFB50-\uFDFF\uFE70-\uFEFF]+')
+        self.normalizer = training_normalizer
     
     def clean_arabic_text(self, text: str) -> str:
         """Clean and normalize Arabic text"""
-        # Normalize Unicode
-        text = unicodedata.normalize('NFKD', text)
-        
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        # Remove non-Arabic characters (optional)
-        # text = ' '.join(self.arabic_pattern.findall(text))
-        
-        return text
+        return self.normalizer.normalize(text)
     
     def load_quran_data(self, quran_path: str) -> List[str]:
         """Load Quran data"""
@@ -148,6 +131,8 @@ class IslamicModelTrainer:
     """Trainer for Islamic AI model"""
     
     def __init__(self, model_name: str = "aubmindlab/bert-base-arabertv2"):
+        from transformers import AutoTokenizer, AutoModelForCausalLM
+        
         self.model_name = model_name
         self.tokenizer = AutoTokenizer.from_pretrained(model_name)
         self.model = AutoModelForCausalLM.from_pretrained(model_name)
@@ -195,17 +180,15 @@ class IslamicModelTrainer:
         training_texts = processor.create_training_pairs(all_texts)
         print(f"Created {len(training_texts)} training texts")
         
-        # Split into train and validation
-        train_texts, val_texts = train_test_split(
-            training_texts, 
-            test_size=0.1, 
-            random_state=42
-        )
+        # Split by hashed group key so derived texts stay with their source
+        train_texts, val_texts = split_texts(training_texts, val_fraction=0.1)
         
         return train_texts, val_texts
     
     def train(self, train_texts: List[str], val_texts: List[str], output_dir: str = "./islamic_model"):
         """Train the model"""
+        from transformers import TrainingArguments, Trainer, DataCollatorForLanguageModeling
+        
         # Create datasets
         train_dataset = IslamicDataset(train_texts, self.tokenizer)
         val_dataset = IslamicDataset(val_texts, self.tokenizer)
@@ -258,6 +241,9 @@ class IslamicModelTrainer:
 
 def main():
     """Main training function"""
+    parser = argparse.ArgumentParser(description="Train the full Islamic AI model")
+    parser.parse_args()
+    
     # Data paths (adjust these to your actual data paths)
     data_paths = {
         'quran': 'assets/data/quran/complete_quran.json',
@@ -4,23 +4,33 @@ Simplified training script for Islamic AI model
 Uses a smaller, more manageable model for initial training
 """
 
+import argparse
 import json
+import math
 import os
-import torch
-from torch.utils.data import Dataset, DataLoader
-from transformers import (
-    AutoTokenizer, 
-    AutoModelForCausalLM, 
-    TrainingArguments, 
-    Trainer,
-    DataCollatorForLanguageModeling
-)
-from sklearn.model_selection import train_test_split
-import numpy as np
-from tqdm import tqdm
+import time
+from pathlib import Path
 
-class IslamicDataset(Dataset):
-    """Dataset for Islamic texts"""
+# torch, transformers and the modules built on them are imported where they
+# are used, so --help and the training constants load without them
+from checkpoint_evaluator import checkpoint_ready, finish_evaluator, launch_evaluator, stop_evaluator
+from dataset_split import record_source, split_texts
+from training_defaults import DEFAULT_HYPERPARAMETERS, SPECIAL_TOKENS
+
+def build_tokenizer(model_name="distilgpt2"):
+    """Tokenizer with the Islamic special tokens and a pad token"""
+    from transformers import AutoTokenizer
+    
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    tokenizer.add_tokens(SPECIAL_TOKENS)
+    
+    # Set pad token
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    return tokenizer
+
+class IslamicDataset:
+    """Dataset for Islamic texts (map-style: __len__ and __getitem__)"""
     
     def __init__(self, texts, tokenizer, max_length=256):
         self.texts = texts
@@ -48,36 +58,78 @@ class IslamicDataset(Dataset):
             'labels': encoding['input_ids'].flatten()
         }
 
+class TokenizedTexts:
+    """Pre-tokenized texts stored as one flat tensor plus offsets"""
+    
+    def __init__(self, path):
+        import torch
+        
+        data = torch.load(path, mmap=True)
+        self.tokens = data['tokens']
+        self.offsets = data['offsets']
+    
+    def __len__(self):
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, idx):
+        input_ids = self.tokens[self.offsets[idx]:self.offsets[idx + 1]].long()
+        return {'input_ids': input_ids, 'attention_mask': input_ids.new_ones(input_ids.shape)}
+    
+    @staticmethod
+    def build(texts, tokenizer, max_length, path):
+        import torch
+        
+        encoded = [tokenizer(text, truncation=True, max_length=max_length)['input_ids'] for text in texts]
+        offsets = [0]
+        for ids in encoded:
+            offsets.append(offsets[-1] + len(ids))
+        tokens = torch.tensor([token for ids in encoded for token in ids], dtype=torch.int32)
+        torch.save({'tokens': tokens, 'offsets': torch.tensor(offsets, dtype=torch.int64)}, path)
+
+def write_validation_records(texts, path):
+    """Validation texts as JSONL records for the async checkpoint evaluator"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for text in texts:
+            f.write(json.dumps({'text': text, 'source': record_source(text)}, ensure_ascii=False) + '\n')
+    return path
+
+def tokenize_training_data(data_path, output_dir, model_name="distilgpt2", max_length=256, test_size=0.1):
+    """Split and tokenize the training texts once, for --tokenized-dir"""
+    print(f"🔤 Tokenizing {data_path} into {output_dir}...")
+    
+    with open(data_path, 'r', encoding='utf-8') as f:
+        texts = json.load(f)
+    train_texts, val_texts = split_texts(texts, val_fraction=test_size)
+    
+    tokenizer = build_tokenizer(model_name)
+    os.makedirs(output_dir, exist_ok=True)
+    TokenizedTexts.build(train_texts, tokenizer, max_length, os.path.join(output_dir, 'train.pt'))
+    TokenizedTexts.build(val_texts, tokenizer, max_length, os.path.join(output_dir, 'val.pt'))
+    write_validation_records(val_texts, os.path.join(output_dir, 'val.jsonl'))
+    with open(os.path.join(output_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump({'model_name': model_name, 'max_length': max_length, 'vocab_size': len(tokenizer),
+                   'train': len(train_texts), 'val': len(val_texts)}, f, indent=2)
+    
+    print(f"✅ Tokenized {len(train_texts)} training and {len(val_texts)} validation texts")
+
 class SimpleIslamicTrainer:
     """Simplified trainer for Islamic AI model"""
     
-    def __init__(self, model_name="distilgpt2"):
+    def __init__(self, model_name="distilgpt2", hyperparameters=None):
+        from transformers import AutoModelForCausalLM
+        
         print(f"🤖 Initializing model: {model_name}")
         
         # Use a smaller, faster model for initial training
         self.model_name = model_name
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.hyperparameters = {**DEFAULT_HYPERPARAMETERS, **(hyperparameters or {})}
+        self.tokenizer = build_tokenizer(model_name)
         self.model = AutoModelForCausalLM.from_pretrained(model_name)
-        
-        # Add special tokens for Islamic content
-        special_tokens = [
-            '<ayah>', '</ayah>',
-            '<hadith>', '</hadith>',
-            '<translation>', '</translation>',
-            '<question>', '</question>',
-            '<word_analysis>', '</word_analysis>',
-            '<context>', '</context>',
-            '<narrator>', '</narrator>',
-            '<grade>', '</grade>',
-            '<reference>', '</reference>'
-        ]
-        
-        self.tokenizer.add_tokens(special_tokens)
         self.model.resize_token_embeddings(len(self.tokenizer))
         
-        # Set pad token
-        if self.tokenizer.pad_token is None:
-            self.tokenizer.pad_token = self.tokenizer.eos_token
+        # What the prepare_* method used for validation, for the async evaluator
+        self.validation_source = None
+        self.validation_texts = None
         
         print(f"✅ Model initialized with {len(self.tokenizer)} tokens")
     
@@ -95,25 +147,89 @@ class SimpleIslamicTrainer:
         """Prepare train and validation datasets"""
         print("🔄 Preparing datasets...")
         
-        # Split data
-        train_texts, val_texts = train_test_split(
-            texts, 
-            test_size=test_size, 
-            random_state=42
-        )
+        # Split by hashed group key so derived texts stay with their source
+        train_texts, val_texts = split_texts(texts, val_fraction=test_size)
         
         # Create datasets
-        train_dataset = IslamicDataset(train_texts, self.tokenizer)
-        val_dataset = IslamicDataset(val_texts, self.tokenizer)
+        max_length = self.hyperparameters['max_length']
+        train_dataset = IslamicDataset(train_texts, self.tokenizer, max_length)
+        val_dataset = IslamicDataset(val_texts, self.tokenizer, max_length)
+        self.validation_source, self.validation_texts = None, val_texts
         
         print(f"✅ Training samples: {len(train_dataset)}")
         print(f"✅ Validation samples: {len(val_dataset)}")
         
         return train_dataset, val_dataset
     
-    def train(self, train_dataset, val_dataset, output_dir="./islamic_model"):
-        """Train the model"""
-        print("🚀 Starting training...")
+    def prepare_streaming_datasets(self, shards_dir="training_data/shards", mixing_weights=None,
+                                   samples_per_epoch=None):
+        """Stream train/validation shards instead of holding texts in memory
+        
+        Each training epoch draws samples_per_epoch records (default: all of
+        them) from the sources in mixing_weights proportions.
+        """
+        from streaming_dataset import IslamicStreamingDataset
+        
+        print(f"🔄 Preparing streaming datasets from {shards_dir}...")
+        
+        train_dataset = IslamicStreamingDataset(
+            os.path.join(shards_dir, 'train'),
+            self.tokenizer,
+            max_length=self.hyperparameters['max_length'],
+            mixing_weights=mixing_weights,
+            samples_per_epoch=samples_per_epoch,
+        )
+        # Validation reads every record of every source once, unshuffled
+        val_dataset = IslamicStreamingDataset(
+            os.path.join(shards_dir, 'val'),
+            self.tokenizer,
+            max_length=self.hyperparameters['max_length'],
+            mixing_weights={source: 1.0 for source in ('quran', 'hadith', 'tafsir', 'other')},
+            shuffle_buffer=0,
+            mixed=False,
+        )
+        self.validation_source, self.validation_texts = os.path.join(shards_dir, 'val'), None
+        
+        print(f"✅ Training sources: {train_dataset.mixing_weights}")
+        print(f"✅ Training samples per epoch: {train_dataset.num_records()}")
+        print(f"✅ Validation samples: {val_dataset.num_records()}")
+        
+        return train_dataset, val_dataset
+    
+    def prepare_tokenized_datasets(self, tokenized_dir="training_data/tokens"):
+        """Load datasets written by tokenize_training_data"""
+        print(f"🔄 Loading tokenized datasets from {tokenized_dir}...")
+        
+        with open(os.path.join(tokenized_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['vocab_size'] != len(self.tokenizer) or meta['max_length'] != self.hyperparameters['max_length']:
+            raise ValueError(f"{tokenized_dir} was tokenized for {meta['model_name']} "
+                             f"(max_length {meta['max_length']}); re-run with --tokenize-to")
+        
+        train_dataset = TokenizedTexts(os.path.join(tokenized_dir, 'train.pt'))
+        val_dataset = TokenizedTexts(os.path.join(tokenized_dir, 'val.pt'))
+        self.validation_source, self.validation_texts = os.path.join(tokenized_dir, 'val.jsonl'), None
+        
+        print(f"✅ Training samples: {len(train_dataset)}")
+        print(f"✅ Validation samples: {len(val_dataset)}")
+        
+        return train_dataset, val_dataset
+    
+    def create_trainer(self, train_dataset, val_dataset, output_dir="./islamic_model", **overrides):
+        """Build a Trainer from the hyperparameters; overrides go to TrainingArguments"""
+        from torch.utils.data import IterableDataset
+        from transformers import DataCollatorForLanguageModeling, Trainer, TrainingArguments
+        
+        hyperparameters = self.hyperparameters
+        batch_size = hyperparameters['batch_size']
+        
+        # Iterable datasets have no length, so Trainer needs an explicit step count;
+        # each step consumes a batch on every rank (WORLD_SIZE is set by torchrun)
+        max_steps = -1
+        if isinstance(train_dataset, IterableDataset):
+            world_size = int(os.environ.get('WORLD_SIZE', '1'))
+            steps_per_epoch = math.ceil(train_dataset.num_records() / (batch_size * world_size))
+            max_steps = steps_per_epoch * hyperparameters['num_train_epochs']
         
         # Data collator
         data_collator = DataCollatorForLanguageModeling(
@@ -121,14 +237,16 @@ class SimpleIslamicTrainer:
             mlm=False,  # We're doing causal LM, not masked LM
         )
         
-        # Training arguments - optimized for smaller dataset
-        training_args = TrainingArguments(
+        # Training arguments
+        arguments = dict(
             output_dir=output_dir,
-            num_train_epochs=3,
-            per_device_train_batch_size=2,  # Small batch size for memory
-            per_device_eval_batch_size=2,
-            warmup_steps=50,
-            weight_decay=0.01,
+            num_train_epochs=hyperparameters['num_train_epochs'],
+            max_steps=max_steps,
+            learning_rate=hyperparameters['learning_rate'],
+            per_device_train_batch_size=batch_size,
+            per_device_eval_batch_size=batch_size,
+            warmup_steps=hyperparameters['warmup_steps'],
+            weight_decay=hyperparameters['weight_decay'],
             logging_dir=f'{output_dir}/logs',
             logging_steps=10,
             save_steps=100,
@@ -141,9 +259,11 @@ class SimpleIslamicTrainer:
             report_to=None,  # Disable wandb
             remove_unused_columns=False,
         )
+        arguments.update(overrides)
+        training_args = TrainingArguments(**arguments)
         
         # Create trainer
-        trainer = Trainer(
+        return Trainer(
             model=self.model,
             args=training_args,
             train_dataset=train_dataset,
@@ -151,10 +271,64 @@ class SimpleIslamicTrainer:
             data_collator=data_collator,
             tokenizer=self.tokenizer,
         )
+    
+    def train(self, train_dataset, val_dataset, output_dir="./islamic_model", async_eval=False):
+        """Train the model
+        
+        With async_eval, checkpoints are evaluated by a separate process
+        (checkpoint_evaluator.py) and the best one is picked from its results.
+        The evaluator scores the same validation split and max_length as the
+        prepare_* method that built the datasets.
+        """
+        from transformers import AutoModelForCausalLM
         
-        # Train
-        print("🔥 Training started...")
-        trainer.train()
+        print("🚀 Starting training...")
+        print(f"⚙️  Hyperparameters: {self.hyperparameters}")
+        
+        overrides = {}
+        if async_eval:
+            # The async evaluator prunes checkpoints itself once they are scored
+            overrides = dict(evaluation_strategy="no", save_total_limit=None, load_best_model_at_end=False)
+        trainer = self.create_trainer(
+            train_dataset, None if async_eval else val_dataset, output_dir, **overrides
+        )
+        
+        evaluator = None
+        if async_eval:
+            validation_source = self.validation_source
+            if validation_source is None:
+                if self.validation_texts is None:
+                    raise ValueError("async_eval needs datasets from one of the prepare_* methods")
+                os.makedirs(output_dir, exist_ok=True)
+                validation_source = write_validation_records(
+                    self.validation_texts, os.path.join(output_dir, 'validation.jsonl')
+                )
+            started = time.time()
+            evaluator = launch_evaluator(
+                output_dir, validation_source, max_length=self.hyperparameters['max_length'], since=started
+            )
+        
+        try:
+            # Train
+            print("🔥 Training started...")
+            trainer.train()
+            
+            # Final checkpoint so the evaluator also scores the last step
+            if evaluator is not None:
+                final_checkpoint = os.path.join(output_dir, f"checkpoint-{trainer.state.global_step}")
+                if not checkpoint_ready(Path(final_checkpoint), started):
+                    trainer.save_model(final_checkpoint)
+                    trainer.state.save_to_json(os.path.join(final_checkpoint, "trainer_state.json"))
+                best = finish_evaluator(evaluator, output_dir)
+                evaluator = None
+                if best is not None:
+                    print(f"🏆 Loading best checkpoint {best['checkpoint']} (loss {best['eval_loss']:.4f})")
+                    self.model = AutoModelForCausalLM.from_pretrained(best['checkpoint'])
+                    trainer.model = self.model
+        finally:
+            # Training failed or was interrupted: don't leave the evaluator polling output_dir
+            if evaluator is not None:
+                stop_evaluator(evaluator, output_dir)
         
         # Save model
         print("💾 Saving model...")
@@ -164,10 +338,20 @@ class SimpleIslamicTrainer:
         print(f"✅ Model saved to {output_dir}")
         return trainer
     
-    def test_model(self, test_texts, num_samples=5):
-        """Test the trained model"""
+    def test_model(self, test_texts, num_samples=5, draft_layers=0, num_draft_tokens=4):
+        """Test the trained model
+        
+        With draft_layers, generation uses speculative decoding with a draft
+        made of the model's first draft_layers blocks; samples follow the
+        same distribution as plain generate().
+        """
+        import torch
+        from speculative_decoding import speculative_generate, truncated_draft
+        
         print("🧪 Testing model...")
         
+        draft = truncated_draft(self.model, draft_layers) if draft_layers else None
+        
         for i, text in enumerate(test_texts[:num_samples]):
             print(f"\n--- Test {i+1} ---")
             print(f"Input: {text[:100]}...")
@@ -175,43 +359,108 @@ class SimpleIslamicTrainer:
             # Generate response
             inputs = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=128)
             
-            with torch.no_grad():
-                outputs = self.model.generate(
+            if draft is not None:
+                outputs, stats = speculative_generate(
+                    self.model,
+                    draft,
                     inputs.input_ids,
-                    max_length=200,
-                    num_return_sequences=1,
+                    max_new_tokens=200 - inputs.input_ids.size(1),
+                    num_draft_tokens=num_draft_tokens,
                     temperature=0.7,
-                    do_sample=True,
-                    pad_token_id=self.tokenizer.eos_token_id
+                    top_k=50,  # generate() default
+                    eos_token_id=self.tokenizer.eos_token_id
                 )
+                print(f"Draft acceptance: {stats['acceptance_rate']:.1%}")
+            else:
+                with torch.no_grad():
+                    outputs = self.model.generate(
+                        inputs.input_ids,
+                        max_length=200,
+                        num_return_sequences=1,
+                        temperature=0.7,
+                        do_sample=True,
+                        pad_token_id=self.tokenizer.eos_token_id
+                    )
             
             generated_text = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
             print(f"Generated: {generated_text}")
 
+def parse_mixing_weights(value):
+    """'quran=0.5,hadith=0.3,tafsir=0.2' -> {'quran': 0.5, ...}"""
+    weights = {}
+    for item in value.split(','):
+        source, _, weight = item.partition('=')
+        try:
+            weights[source.strip()] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"expected source=weight, got {item!r}")
+    return weights
+
 def main():
     """Main training function"""
+    parser = argparse.ArgumentParser(description="Train the Islamic AI model")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Stream per-source shards instead of loading all texts")
+    parser.add_argument('--data', default='training_data/islamic_training_data.json')
+    parser.add_argument('--shards-dir', default='training_data/shards')
+    parser.add_argument('--mixing-weights', type=parse_mixing_weights,
+                        help="Streaming source mix, e.g. quran=0.5,hadith=0.3,tafsir=0.2")
+    parser.add_argument('--samples-per-epoch', type=int,
+                        help="Records per streaming epoch (default: total record count)")
+    parser.add_argument('--tokenized-dir',
+                        help="Train from texts pre-tokenized with --tokenize-to")
+    parser.add_argument('--tokenize-to',
+                        help="Only split and tokenize the training data into this directory")
+    parser.add_argument('--output-dir', default='./islamic_model')
+    parser.add_argument('--async-eval', action='store_true',
+                        help="Evaluate checkpoints in a separate process instead of pausing training")
+    parser.add_argument('--hyperparameters',
+                        help="JSON file of hyperparameters, e.g. a sweep's best_config.json")
+    parser.add_argument('--draft-layers', type=int, default=0,
+                        help="Test with speculative decoding using a draft of this many layers")
+    args = parser.parse_args()
+    
     print("🕌 Starting Islamic AI Model Training")
     print("=" * 50)
     
     # Check if training data exists
-    data_path = "training_data/islamic_training_data.json"
+    data_path = args.shards_dir if args.streaming else (args.tokenized_dir or args.data)
     if not os.path.exists(data_path):
         print(f"❌ Training data not found at {data_path}")
         print("Please run prepare_training_data.py first")
         return
     
+    hyperparameters = None
+    if args.hyperparameters:
+        with open(args.hyperparameters, 'r', encoding='utf-8') as f:
+            hyperparameters = json.load(f)
+    
+    if args.tokenize_to:
+        max_length = (hyperparameters or {}).get('max_length', DEFAULT_HYPERPARAMETERS['max_length'])
+        tokenize_training_data(data_path, args.tokenize_to, max_length=max_length)
+        return
+    
     try:
         # Initialize trainer
-        trainer = SimpleIslamicTrainer()
-        
-        # Load training data
-        texts = trainer.load_training_data(data_path)
+        trainer = SimpleIslamicTrainer(hyperparameters=hyperparameters)
         
-        # Prepare datasets
-        train_dataset, val_dataset = trainer.prepare_datasets(texts)
+        if args.streaming:
+            # Stream shards with weighted source mixing
+            train_dataset, val_dataset = trainer.prepare_streaming_datasets(
+                args.shards_dir, args.mixing_weights, args.samples_per_epoch
+            )
+        elif args.tokenized_dir:
+            # Reuse the tokenize stage's output
+            train_dataset, val_dataset = trainer.prepare_tokenized_datasets(args.tokenized_dir)
+        else:
+            # Load training data
+            texts = trainer.load_training_data(data_path)
+            
+            # Prepare datasets
+            train_dataset, val_dataset = trainer.prepare_datasets(texts)
         
         # Train model
-        trainer.train(train_dataset, val_dataset)
+        trainer.train(train_dataset, val_dataset, args.output_dir, async_eval=args.async_eval)
         
         # Test model
         test_texts = [
@@ -219,16 +468,17 @@ def main():
             "<question>Explain this hadith: كَانَ أَوَّلُ مَا بُدِئَ بِهِ</question>",
             "<ayah>الْحَمْدُ لِلَّهِ رَبِّ الْعَالَمِينَ</ayah>",
         ]
-        trainer.test_model(test_texts)
+        trainer.test_model(test_texts, draft_layers=args.draft_layers)
         
         print("\n🎉 Training completed successfully!")
-        print("📁 Model saved to: ./islamic_model")
-        print("📊 Check logs in: ./islamic_model/logs")
+        print(f"📁 Model saved to: {args.output_dir}")
+        print(f"📊 Check logs in: {args.output_dir}/logs")
         
     except Exception as e:
         print(f"❌ Training failed: {e}")
         import traceback
         traceback.print_exc()
+        raise SystemExit(1)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
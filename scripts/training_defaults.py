@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Training constants shared by data preparation and the trainers
+Kept free of heavy imports so data preparation can size its texts to the
+model without loading the training code
+"""
+
+# Special tokens for Islamic content
+SPECIAL_TOKENS = [
+    '<ayah>', '</ayah>',
+    '<hadith>', '</hadith>',
+    '<translation>', '</translation>',
+    '<question>', '</question>',
+    '<word_analysis>', '</word_analysis>',
+    '<context>', '</context>',
+    '<narrator>', '</narrator>',
+    '<grade>', '</grade>',
+    '<reference>', '</reference>',
+    '<tafsir>', '</tafsir>',
+    '<author>', '</author>',
+    '<key_points>', '</key_points>',
+]
+
+# Training hyperparameters - optimized for smaller dataset
+DEFAULT_HYPERPARAMETERS = {
+    'learning_rate': 5e-5,
+    'num_train_epochs': 3,
+    'batch_size': 2,  # Small batch size for memory
+    'max_length': 256,
+    'warmup_steps': 50,
+    'weight_decay': 0.01,
+}
@@ -0,0 +1,41 @@
+from arabic_normalizer import ArabicNormalizer, search_normalizer, training_normalizer
+
+VOWELLED = 'بِسْمِ ٱللَّهِ ٱلرَّحْمَٰنِ ٱلرَّحِيمِ'
+
+
+def test_training_keeps_harakat_and_letter_forms():
+    assert training_normalizer(VOWELLED) == VOWELLED
+    assert training_normalizer('أحمد إلى مكة') == 'أحمد إلى مكة'
+
+
+def test_search_strips_marks_and_unifies_letters():
+    assert search_normalizer(VOWELLED) == 'بسم الله الرحمن الرحيم'
+    assert search_normalizer('أحمد إلى مكةـ') == 'احمد الي مكه'
+    assert search_normalizer('The MERCIFUL') == 'the merciful'
+
+
+def test_presentation_forms_fold_to_base_letters():
+    # Lam-alef ligature and isolated/final forms
+    assert training_normalizer('ﻻ') == 'لا'
+    assert training_normalizer('ﺍﻟﻠﻪ') == 'الله'
+    assert ArabicNormalizer(fold_presentation_forms=False)('ﻻ') == 'ﻻ'
+
+
+def test_whitespace_is_collapsed():
+    for text in ('  a  b ', 'a\tb', 'a\n\nb', ' a b', 'a b '):
+        assert training_normalizer(text) == ' '.join(text.split())
+    assert training_normalizer('a b') == 'a b'
+    assert search_normalizer('َ ُ') == ''
+    assert ArabicNormalizer(collapse_whitespace=False)('a  b') == 'a  b'
+
+
+def test_search_of_training_output_matches_search():
+    for text in (VOWELLED, 'أَحْمَدُ  إِلَى\tمَكَّةَ', 'ﻻ إله', 'Ibn   Kathir'):
+        assert search_normalizer(training_normalizer(text)) == search_normalizer(text)
+
+
+def test_memo_and_direct_paths_agree():
+    short = ArabicNormalizer.for_search(memo_max_length=64)
+    direct = ArabicNormalizer.for_search(memo_max_length=0)
+    texts = [VOWELLED, VOWELLED * 10, '']
+    assert short.normalize_list(texts) == direct.normalize_list(iter(texts))
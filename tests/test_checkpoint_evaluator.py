@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+import time
+
+from checkpoint_evaluator import (TRAINING_COMPLETE_MARKER, CheckpointEvaluator, checkpoint_evaluated,
+                                  checkpoint_ready, list_checkpoints, stop_evaluator)
+
+
+def write_checkpoint(output_dir, step, mtime=None):
+    path = output_dir / f"checkpoint-{step}"
+    path.mkdir()
+    (path / 'model.safetensors').write_bytes(b'')
+    (path / 'trainer_state.json').write_text('{}')
+    if mtime is not None:
+        os.utime(path / 'trainer_state.json', (mtime, mtime))
+    return path
+
+
+def test_checkpoints_from_earlier_runs_are_ignored(tmp_path):
+    launched = time.time()
+    stale = write_checkpoint(tmp_path, 500, mtime=launched - 3600)
+    fresh = write_checkpoint(tmp_path, 100)
+
+    assert list_checkpoints(tmp_path) == [fresh, stale]
+    assert checkpoint_ready(fresh, launched)
+    assert not checkpoint_ready(stale, launched)
+
+
+def test_results_older_than_checkpoint_do_not_count(tmp_path):
+    checkpoint = write_checkpoint(tmp_path, 100)
+    (checkpoint / 'eval_results.json').write_text('{}')
+    old = (checkpoint / 'trainer_state.json').stat().st_mtime - 60
+    os.utime(checkpoint / 'eval_results.json', (old, old))
+
+    assert not checkpoint_evaluated(checkpoint)
+
+
+def test_prune_leaves_earlier_runs_alone(tmp_path):
+    launched = time.time()
+    stale = write_checkpoint(tmp_path, 500, mtime=launched - 3600)
+    (stale / 'eval_results.json').write_text('{}')
+    os.utime(stale / 'eval_results.json', (launched - 3600, launched - 3600))
+    fresh = [write_checkpoint(tmp_path, step) for step in (100, 200, 300)]
+    for path in fresh:
+        (path / 'eval_results.json').write_text('{}')
+    validation = tmp_path / 'val.jsonl'
+    validation.write_text('{"text": "x", "source": "quran"}\n')
+
+    evaluator = CheckpointEvaluator(str(tmp_path), str(validation), keep_last=2, since=launched)
+    evaluator.prune()
+
+    assert list_checkpoints(tmp_path) == fresh[1:] + [stale]
+
+
+def test_stop_evaluator_terminates_and_marks_done(tmp_path):
+    process = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+
+    stop_evaluator(process, str(tmp_path), timeout=5)
+
+    assert process.returncode is not None
+    assert (tmp_path / TRAINING_COMPLETE_MARKER).exists()
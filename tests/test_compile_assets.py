@@ -0,0 +1,59 @@
+import json
+
+from compile_assets import AssetBundle, AssetCompiler
+
+
+def write_json(path, document):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(document, ensure_ascii=False), encoding='utf-8')
+
+
+def compile_bundle(tmp_path):
+    data_dir = tmp_path / 'data'
+    write_json(data_dir / 'quran' / 'complete_quran.json', {
+        'version': 1,
+        'surahs': [
+            {'number': 1, 'name': 'الفاتحة', 'ayahs': [{'ayahNumber': 1, 'arabicText': 'بِسْمِ اللَّهِ'}]},
+            {'number': 112, 'name': 'الإخلاص', 'ayahs': [{'ayahNumber': 1, 'arabicText': 'قُلْ هُوَ اللَّهُ أَحَدٌ'},
+                                                       {'ayahNumber': 2, 'arabicText': 'اللَّهُ الصَّمَدُ'}]},
+        ],
+        'source': 'test',
+    })
+    write_json(data_dir / 'hadith' / 'sahih_bukhari.json', {
+        'collection': 'Sahih Bukhari', 'hadiths': [{'id': '0-1', 'textEnglish': 'Actions are by intentions'}],
+    })
+    write_json(data_dir / 'lists' / 'names.json', [{'id': 'a'}, 'plain', 3])
+    write_json(data_dir / 'settings.json', {'theme': 'dark', 'tags': ['x', 'y']})
+
+    compiler = AssetCompiler(str(data_dir))
+    bundle_path = compiler.compile(str(tmp_path / 'bundle.db'))
+    return compiler, bundle_path
+
+
+def test_every_asset_round_trips(tmp_path):
+    compiler, bundle_path = compile_bundle(tmp_path)
+
+    assert compiler.verify(bundle_path)
+    with AssetBundle(bundle_path) as bundle:
+        assert bundle.asset_names() == ['hadith/sahih_bukhari', 'lists/names', 'quran/complete_quran', 'settings']
+        # Key order survives, not just equality
+        assert list(bundle.load_asset('quran/complete_quran')) == ['version', 'surahs', 'source']
+
+
+def test_sections_load_without_the_rest(tmp_path):
+    _, bundle_path = compile_bundle(tmp_path)
+
+    with AssetBundle(bundle_path) as bundle:
+        assert bundle.section_count('quran/complete_quran') == 2
+        assert bundle.surah(112)['name'] == 'الإخلاص'
+        assert bundle.ayah(112, 2)['arabicText'] == 'اللَّهُ الصَّمَدُ'
+        assert bundle.ayah(112, 9) is None
+        assert bundle.hadith('sahih_bukhari', '0-1')['textEnglish'] == 'Actions are by intentions'
+        assert bundle.header('quran/complete_quran') == {'version': 1, 'surahs': None, 'source': 'test'}
+
+
+def test_verify_reports_changed_source(tmp_path):
+    compiler, bundle_path = compile_bundle(tmp_path)
+    write_json(tmp_path / 'data' / 'settings.json', {'theme': 'light', 'tags': ['x', 'y']})
+
+    assert not compiler.verify(bundle_path)
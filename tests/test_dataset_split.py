@@ -0,0 +1,49 @@
+import os
+
+from dataset_split import TRAIN_FOLD, VAL_FOLD, assign_fold, group_key, split_texts, split_to_shards
+
+
+def ayah(surah, number, question="What does this ayah say?"):
+    return f"<question>{question}</question> <ayah>text</ayah> <context>Surah {surah}:{number}</context>"
+
+
+def test_assign_fold_is_stable():
+    # Pinned so a changed hash or salt, which would reshuffle every split, fails loudly
+    pinned = [VAL_FOLD, TRAIN_FOLD, TRAIN_FOLD, TRAIN_FOLD, VAL_FOLD, TRAIN_FOLD, TRAIN_FOLD]
+    assert [assign_fold(f"quran:1:{n}") for n in range(1, 8)] == pinned
+    assert assign_fold('quran:1:1', val_fraction=1.0) == VAL_FOLD
+    assert assign_fold('quran:1:1', val_fraction=0.0) == TRAIN_FOLD
+
+    keys = [f"quran:2:{n}" for n in range(2000)]
+    folds = [assign_fold(key) for key in keys]
+    assert folds == [assign_fold(key) for key in keys]
+    assert 0.07 < folds.count(VAL_FOLD) / len(folds) < 0.13
+    assert [assign_fold(key, salt='other') for key in keys] != folds
+
+
+def test_split_texts_keeps_groups_together():
+    texts = [ayah(3, n, question) for n in range(200) for question in ("Q1", "Q2", "Q3")]
+
+    train_texts, val_texts = split_texts(texts, val_fraction=0.3)
+
+    train_keys = {group_key(text) for text in train_texts}
+    val_keys = {group_key(text) for text in val_texts}
+    assert train_keys and val_keys and not train_keys & val_keys
+    assert len(train_texts) + len(val_texts) == len(texts)
+
+
+def test_split_to_shards_replaces_stale_shards(tmp_path):
+    output_dir = tmp_path / 'splits'
+    stale = output_dir / TRAIN_FOLD / 'quran-00099.jsonl'
+    stale.parent.mkdir(parents=True)
+    stale.write_text('{"text": "old"}\n', encoding='utf-8')
+
+    totals = split_to_shards([ayah(1, n) for n in range(50)], str(output_dir),
+                             val_fraction=0.5, shard_size=10)
+
+    assert not stale.exists()
+    for fold in (TRAIN_FOLD, VAL_FOLD):
+        files = sorted(os.listdir(output_dir / fold))
+        assert files and all(name.startswith('quran-') for name in files)
+    assert sum(totals.values()) == 50
+    assert sorted(os.listdir(tmp_path)) == ['splits']
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from hadith_loader import decode_collection, decode_record, load_collections
+
+
+def write_collection(path, hadiths, name="Test"):
+    path.write_text(json.dumps({'collection': name, 'hadiths': hadiths}, ensure_ascii=False, indent=2),
+                    encoding='utf-8')
+
+
+def test_record_after_truncated_record_is_recovered(tmp_path):
+    path = tmp_path / 'broken.json'
+    path.write_text(
+        '{"collection": "Broken", "hadiths": [\n'
+        '  {"id": "1", "textEnglish": "first"},\n'
+        '  {"id": "2", "textEnglish": "cut off\n'
+        '  {"id": "3", "textEnglish": "after the cut", "tags": ["a"]},\n'
+        '  {"id": "4", "textEnglish": "last"}\n'
+        ']}',
+        encoding='utf-8',
+    )
+
+    collection = decode_collection(str(path))
+
+    assert collection.name == "Broken"
+    assert [record.id for record in collection.records] == ['1', '3', '4']
+    assert [error.index for error in collection.errors] == [1]
+
+
+def test_falsy_non_string_fields_are_rejected():
+    base = {'id': '1', 'textEnglish': 'text'}
+    assert decode_record(dict(base, narrator=None), 'c', 0).narrator == ''
+    for bad in ({'narrator': 0}, {'grade': False}, {'book': []}, {'tags': {}}, {'tags': [1]}):
+        with pytest.raises(ValueError):
+            decode_record(dict(base, **bad), 'c', 0)
+    with pytest.raises(ValueError):
+        decode_record({'id': '1'}, 'c', 0)
+
+
+def test_invalid_top_level_is_reported(tmp_path):
+    path = tmp_path / 'list.json'
+    path.write_text('[{"id": "1", "textEnglish": "x"}]', encoding='utf-8')
+
+    collection = decode_collection(str(path))
+
+    assert collection.records == []
+    assert [error.index for error in collection.errors] == [-1]
+
+
+def test_load_collections_keeps_discovery_order(tmp_path):
+    for name in ('c', 'a', 'b'):
+        write_collection(tmp_path / f"{name}.json", [{'id': name, 'textEnglish': name}], name=name.upper())
+
+    collections = load_collections(str(tmp_path))
+
+    assert [collection.name for collection in collections] == ['A', 'B', 'C']
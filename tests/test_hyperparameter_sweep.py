@@ -0,0 +1,29 @@
+import hyperparameter_sweep
+from hyperparameter_sweep import EVAL_MAX_LENGTH, SEARCH_SPACE, AshaScheduler, build_token_cache
+
+
+def test_all_trials_share_one_validation_cache(tmp_path, monkeypatch):
+    built = []
+    monkeypatch.setattr(hyperparameter_sweep, 'build_tokenizer', lambda model_name: object())
+    monkeypatch.setattr(hyperparameter_sweep.TokenizedTexts, 'build',
+                        staticmethod(lambda texts, tokenizer, max_length, path: built.append((path, max_length))))
+    texts = [f"<ayah>text {i}</ayah><context>Surah 2:{i}</context>" for i in range(200)]
+
+    train_paths, val_path = build_token_cache(texts, 'distilgpt2', [128, 512, 128], str(tmp_path), 16)
+
+    assert sorted(train_paths) == [128, 512]
+    assert EVAL_MAX_LENGTH == max(SEARCH_SPACE['max_length'][1])
+    assert [length for path, length in built if path == val_path] == [EVAL_MAX_LENGTH]
+
+
+def test_asha_promotes_best_third():
+    scheduler = AshaScheduler([{}] * 9, min_steps=10, max_steps=90, eta=3)
+    jobs = [scheduler.next_job() for _ in range(9)]
+    assert scheduler.budgets == [10, 30, 90]
+    assert jobs == [(trial, 0) for trial in range(9)]
+
+    for trial in range(9):
+        scheduler.report(trial, 0, loss=float(9 - trial))
+
+    promoted = {scheduler.next_job() for _ in range(3)}
+    assert promoted == {(8, 1), (7, 1), (6, 1)}
@@ -0,0 +1,105 @@
+import json
+import random
+
+import pytest
+
+from model_delta import apply_delta, create_delta
+from optimize_for_mobile import MobileModelOptimizer
+
+FILES = ('islamic_vocab.json', 'model_config.json')
+
+
+class FakeTokenizer:
+    pad_token = unk_token = bos_token = eos_token = '<|endoftext|>'
+
+    def __init__(self, vocab, seed):
+        items = list(vocab.items())
+        random.Random(seed).shuffle(items)
+        self.vocab = dict(items)
+
+    def get_vocab(self):
+        return dict(self.vocab)
+
+
+def export(directory, vocab, seed, config):
+    directory.mkdir()
+    MobileModelOptimizer('model', str(directory)).create_vocabulary(FakeTokenizer(vocab, seed))
+    (directory / 'model_config.json').write_text(json.dumps(config, indent=2))
+    return directory
+
+
+@pytest.fixture
+def vocab():
+    return {f"token{index}": index for index in range(5000)}
+
+
+def test_vocab_export_ignores_get_vocab_order(tmp_path, vocab):
+    first = export(tmp_path / 'a', vocab, 1, {})
+    second = export(tmp_path / 'b', vocab, 2, {})
+
+    assert (first / 'islamic_vocab.json').read_bytes() == (second / 'islamic_vocab.json').read_bytes()
+
+
+def test_unchanged_vocab_is_not_resent(tmp_path, vocab):
+    base = export(tmp_path / 'base', vocab, 1, {'version': '1.0.0'})
+    target = export(tmp_path / 'target', vocab, 2, {'version': '1.0.1'})
+
+    manifest = create_delta(str(base), str(target), str(tmp_path / 'update.delta'), FILES)
+
+    entry = manifest['files']['islamic_vocab.json']
+    assert entry['reused_chunks'] == entry['chunks']
+    assert manifest['delta_size'] < 2000
+
+
+def test_round_trip_rebuilds_target(tmp_path, vocab):
+    base = export(tmp_path / 'base', vocab, 1, {'version': '1.0.0'})
+    grown = {**vocab, '<tafsir>': len(vocab), '</tafsir>': len(vocab) + 1}
+    target = export(tmp_path / 'target', grown, 2, {'version': '1.1.0'})
+    create_delta(str(base), str(target), str(tmp_path / 'update.delta'), FILES)
+
+    written = apply_delta(str(base), str(tmp_path / 'update.delta'), str(tmp_path / 'out'))
+
+    assert len(written) == len(FILES)
+    for name in FILES:
+        assert (tmp_path / 'out' / name).read_bytes() == (target / name).read_bytes()
+
+
+def test_full_delta_needs_no_base(tmp_path, vocab):
+    target = export(tmp_path / 'target', vocab, 1, {})
+    create_delta(None, str(target), str(tmp_path / 'full.delta'), FILES)
+
+    apply_delta(None, str(tmp_path / 'full.delta'), str(tmp_path / 'out'))
+
+    assert (tmp_path / 'out' / 'islamic_vocab.json').read_bytes() == (target / 'islamic_vocab.json').read_bytes()
+
+
+def test_wrong_base_is_rejected(tmp_path, vocab):
+    base = export(tmp_path / 'base', vocab, 1, {'version': '1.0.0'})
+    target = export(tmp_path / 'target', vocab, 1, {'version': '1.0.1'})
+    create_delta(str(base), str(target), str(tmp_path / 'update.delta'), FILES)
+    (base / 'model_config.json').write_text('{"version": "0.9.0"}')
+
+    with pytest.raises(ValueError, match="not the version this delta was made against"):
+        apply_delta(str(base), str(tmp_path / 'update.delta'), str(tmp_path / 'out'))
+
+
+def test_corrupt_payload_is_rejected(tmp_path, vocab):
+    base = export(tmp_path / 'base', vocab, 1, {'version': '1.0.0'})
+    target = export(tmp_path / 'target', vocab, 1, {'version': '1.0.1'})
+    delta_path = tmp_path / 'update.delta'
+    create_delta(str(base), str(target), str(delta_path), FILES)
+    data = bytearray(delta_path.read_bytes())
+    data[-1] ^= 0xFF
+    delta_path.write_bytes(bytes(data))
+
+    with pytest.raises(ValueError, match="corrupt"):
+        apply_delta(str(base), str(delta_path), str(tmp_path / 'out'))
+
+
+def test_missing_base_is_reported(tmp_path, vocab):
+    base = export(tmp_path / 'base', vocab, 1, {})
+    target = export(tmp_path / 'target', vocab, 1, {'version': '2'})
+    create_delta(str(base), str(target), str(tmp_path / 'update.delta'), FILES)
+
+    with pytest.raises(FileNotFoundError):
+        apply_delta(str(tmp_path / 'missing'), str(tmp_path / 'update.delta'), str(tmp_path / 'out'))
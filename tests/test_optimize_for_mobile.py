@@ -0,0 +1,27 @@
+import os
+import subprocess
+
+import optimize_for_mobile
+from optimize_for_mobile import conversion_memory_report
+
+
+def test_memory_report_without_wait4_reads_child_peak(monkeypatch):
+    monkeypatch.delattr(os, 'wait4', raising=False)
+    peaks = {True: '900', False: '400'}
+
+    def fake_run(command, **kwargs):
+        legacy = '--legacy-conversion' in command
+        stdout = f"Peak RSS at start: 80 MB\nConverting...\nPeak RSS: {peaks[legacy]} MB\n"
+        return subprocess.CompletedProcess(command, 0, stdout=stdout)
+
+    monkeypatch.setattr(optimize_for_mobile.subprocess, 'run', fake_run)
+
+    assert conversion_memory_report('model') == {'full load': 900.0, 'streaming': 400.0}
+
+
+def test_memory_report_skips_unmeasurable_child(monkeypatch):
+    monkeypatch.delattr(os, 'wait4', raising=False)
+    monkeypatch.setattr(optimize_for_mobile.subprocess, 'run',
+                        lambda command, **kwargs: subprocess.CompletedProcess(command, 0, stdout="Peak RSS: nan MB\n"))
+
+    assert conversion_memory_report('model') == {}
@@ -0,0 +1,71 @@
+import pytest
+
+from build_search_index import SearchIndex, SearchIndexBuilder, tokenize
+
+DOCUMENTS = {
+    'quran:1:1': ['بِسْمِ اللَّهِ الرَّحْمَٰنِ الرَّحِيمِ', 'In the name of Allah, the Most Gracious, the Most Merciful'],
+    'quran:1:3': ['الرَّحْمَٰنِ الرَّحِيمِ', 'The Most Gracious, the Most Merciful'],
+    'quran:103:1': ['وَالْعَصْرِ', 'By time'],
+    'hadith:bukhari:1': ['إِنَّمَا الْأَعْمَالُ بِالنِّيَّاتِ', 'Actions are judged by intentions, and mercy is from Allah'],
+}
+
+
+def build(documents=DOCUMENTS, **kwargs):
+    builder = SearchIndexBuilder()
+    for key, fields in documents.items():
+        builder.add_document(key, fields)
+    return SearchIndex(builder.serialize(), **kwargs)
+
+
+def keys(results):
+    return [key for key, _ in results]
+
+
+def test_matching_ignores_harakat_and_article():
+    assert tokenize('الرَّحْمَٰنِ') == tokenize('رحمن') == ['رحمن']
+    assert tokenize('اللَّهِ') == ['الله']
+
+
+def test_bm25_prefers_shorter_document_for_same_term():
+    results = build().search('gracious')
+
+    assert keys(results) == ['quran:1:3', 'quran:1:1']
+    assert results[0][1] > results[1][1]
+
+
+def test_phrase_requires_consecutive_terms():
+    index = build()
+
+    assert set(keys(index.search('"most merciful"'))) == {'quran:1:1', 'quran:1:3'}
+    assert index.search('"merciful most"') == []
+
+
+def test_phrase_does_not_cross_fields():
+    # The Arabic field ends with الرحيم and the translation starts with in
+    assert build().search('"الرحيم in"') == []
+
+
+def test_prefix_matches_words_written_with_article():
+    index = build()
+
+    assert set(keys(index.search('رحم*'))) == {'quran:1:1', 'quran:1:3'}
+    assert set(keys(index.search('الرح*'))) == {'quran:1:1', 'quran:1:3'}
+    assert keys(index.search('الل*')) == ['quran:1:1']
+
+
+def test_prefix_over_the_limit_is_rejected():
+    documents = {f"doc:{i}": [f"word{i}"] for i in range(10)}
+    index = build(documents)
+
+    assert len(index.expand_prefix('word', limit=10)) == 10
+    with pytest.raises(ValueError, match="matches 10 terms"):
+        index.expand_prefix('word', limit=9)
+
+
+def test_postings_cache_is_bounded():
+    index = build(postings_cache_size=2)
+    for term in ('most', 'merciful', 'gracious', 'time'):
+        index.postings(term)
+
+    assert index._cached_postings.cache_info().currsize == 2
+    assert index.postings('most') == build().postings('most')
@@ -0,0 +1,91 @@
+import json
+import random
+from collections import Counter
+
+import pytest
+
+from shard_mixer import ShardMixer
+
+
+def write_shards(directory, sizes):
+    for source, size in sizes.items():
+        with open(directory / f"{source}-00000.jsonl", 'w', encoding='utf-8') as f:
+            for index in range(size):
+                f.write(json.dumps({'text': f"{source} {index}"}) + '\n')
+
+
+def mixed_sources(mixer, slot=0, num_slots=1):
+    return Counter(text.split()[0] for text in mixer._iter_mixed(random.Random(0), slot, num_slots))
+
+
+def test_yielded_proportions_match_weights(tmp_path):
+    # Very unequal sources: without restarting short ones the mix would follow their sizes
+    write_shards(tmp_path, {'quran': 2000, 'hadith': 50, 'tafsir': 10})
+    weights = {'quran': 0.5, 'hadith': 0.3, 'tafsir': 0.2}
+    mixer = ShardMixer(str(tmp_path), mixing_weights=weights, samples_per_epoch=20000)
+
+    counts = mixed_sources(mixer)
+
+    assert sum(counts.values()) == 20000
+    for source, weight in weights.items():
+        assert counts[source] / 20000 == pytest.approx(weight, abs=0.02)
+
+
+def test_default_epoch_is_total_record_count(tmp_path):
+    write_shards(tmp_path, {'quran': 300, 'hadith': 20, 'tafsir': 5})
+    mixer = ShardMixer(str(tmp_path))
+
+    counts = mixed_sources(mixer)
+
+    assert mixer.num_records() == 325
+    assert sum(counts.values()) == 325
+    # Tafsir has 5 records but keeps its 20% share by being restarted
+    assert counts['tafsir'] > 5 * 5
+
+
+def test_unmixed_reads_every_record_once(tmp_path):
+    write_shards(tmp_path, {'quran': 30, 'hadith': 7})
+    mixer = ShardMixer(str(tmp_path), mixing_weights={'quran': 1.0, 'hadith': 1.0}, mixed=False)
+
+    texts = list(mixer._iter_mixed(random.Random(0), 0, 1))
+
+    assert len(texts) == len(set(texts)) == mixer.num_records() == 37
+
+
+def test_readers_split_the_epoch(tmp_path):
+    write_shards(tmp_path, {'quran': 40, 'hadith': 40})
+    mixer = ShardMixer(str(tmp_path), mixing_weights={'quran': 1.0, 'hadith': 1.0}, mixed=False)
+
+    shares = [list(mixer.iter_texts(slot, 4)) for slot in range(4)]
+
+    assert sorted(text for share in shares for text in share) == sorted(mixer.iter_texts())
+    assert all(len(share) == 20 for share in shares)
+
+
+def test_shuffle_depends_on_epoch_only_through_seed(tmp_path):
+    write_shards(tmp_path, {'quran': 100})
+    mixer = ShardMixer(str(tmp_path), mixing_weights={'quran': 1.0}, shuffle_buffer=16, mixed=False)
+
+    first = list(mixer.iter_texts())
+    again = list(mixer.iter_texts())
+    mixer.set_epoch(1)
+    reshuffled = list(mixer.iter_texts())
+
+    assert first == again != reshuffled
+    assert sorted(first) == sorted(reshuffled)
+
+
+def test_sources_without_weight_are_reported(tmp_path, capsys):
+    write_shards(tmp_path, {'quran': 10, 'other': 10})
+
+    mixer = ShardMixer(str(tmp_path))
+
+    assert mixer.mixing_weights == {'quran': 0.5}
+    assert "Skipping other shards" in capsys.readouterr().out
+
+
+def test_no_weighted_source_is_an_error(tmp_path):
+    write_shards(tmp_path, {'other': 10})
+
+    with pytest.raises(ValueError):
+        ShardMixer(str(tmp_path))
@@ -0,0 +1,53 @@
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from tafsir_windows import TafsirWindower
+
+
+class WhitespaceTokenizer:
+    """One token per word, with character offsets like a fast tokenizer"""
+
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=False):
+        spans = [match.span() for match in re.finditer(r'\S+', text)]
+        encoding = {'input_ids': list(range(len(spans)))}
+        if return_offsets_mapping:
+            encoding['offset_mapping'] = spans
+        return encoding
+
+
+def test_windows_fit_and_overlap():
+    windower = TafsirWindower(WhitespaceTokenizer(), max_tokens=20, overlap=4, slack=0)
+    body = ' '.join(f"w{i}" for i in range(100))
+
+    texts = list(windower.window_texts(body, "<tafsir> ", " </tafsir> <author>Ibn Kathir</author>"))
+
+    assert all(windower.count(text) <= 20 for text in texts)
+    windows = [text.split()[1:-3] for text in texts]
+    assert windows[0][0] == 'w0' and windows[-1][-1] == 'w99'
+    for previous, current in zip(windows, windows[1:]):
+        assert previous[-4:] == current[:4]
+
+
+def test_short_body_is_one_window():
+    windower = TafsirWindower(WhitespaceTokenizer(), max_tokens=20)
+
+    assert list(windower.window_texts("a short note", "<tafsir> ", " </tafsir>")) == ["<tafsir> a short note </tafsir>"]
+
+
+def test_tags_longer_than_the_window_are_rejected():
+    windower = TafsirWindower(WhitespaceTokenizer(), max_tokens=6, slack=0)
+
+    with pytest.raises(ValueError, match="no room"):
+        list(windower.window_texts("body text", "<tafsir> ", " </tafsir> <author>a b c d e</author>"))
+
+
+def test_windowing_does_not_load_the_trainer():
+    code = "import sys, tafsir_windows; print('train_simple_model' in sys.modules)"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=Path(__file__).resolve().parents[1] / 'scripts')
+
+    assert result.stdout.strip() == 'False'